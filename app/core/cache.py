@@ -0,0 +1,97 @@
+"""Small in-process caches."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import metrics
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL.
+
+    Not thread-safe; meant to be used from the event loop. Hits and misses are
+    counted as `<name>_hits` / `<name>_misses` in the metrics registry.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = metrics.counter(f"{name}_hits", f"{name} lookups served from cache")
+        self.misses = metrics.counter(f"{name}_misses", f"{name} lookups that missed")
+        self.size = metrics.gauge(f"{name}_size", f"Entries currently held in {name}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses.inc()
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.size.set(len(self._data))
+            self.misses.inc()
+            return default
+        self._data.move_to_end(key)
+        self.hits.inc()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; `ttl` may shorten (never extend) the cache-wide TTL."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        self.size.set(len(self._data))
+
+    def pop(self, key: Hashable) -> None:
+        if self._data.pop(key, _MISSING) is not _MISSING:
+            self.size.set(len(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight task.
+
+    Every caller that arrives while the task is running awaits the same
+    result, or the same exception. Nothing is remembered once it finishes,
+    so a failure is retried by the next caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = metrics.counter(f"{name}_calls", f"{name} calls that ran upstream")
+        self.followers = metrics.counter(f"{name}_coalesced", f"{name} calls that joined an in-flight call")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders.inc()
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.followers.inc()
+        # Shield so one caller going away (client disconnect) doesn't cancel
+        # the shared call for everybody else.
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,204 @@
+"""
+Content-negotiated response compression.
+
+Picks brotli or gzip from `Accept-Encoding`, leaves small bodies and
+already-compressed media alone, and compresses streamed responses chunk by
+chunk once `minimum_size` bytes have arrived (flushing each one, so NDJSON
+lines still arrive as they are produced). Brotli needs the optional `brotli` package; without it only gzip
+is offered.
+"""
+
+import re
+import zlib
+from typing import Iterable, List, Optional, Pattern
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the installed extras
+    brotli = None
+
+# Content types that are already compressed; recompressing only costs CPU.
+SKIP_CONTENT_TYPES = ("audio/", "video/", "image/", "application/zip", "application/gzip", "application/octet-stream")
+
+bytes_in = metrics.counter("http_compression_bytes_in", "Response bytes before compression, by encoding")
+bytes_out = metrics.counter("http_compression_bytes_out", "Response bytes sent after compression, by encoding")
+skipped = metrics.counter("http_compression_skipped", "Responses sent uncompressed, by reason")
+
+
+def _accepted(accept_encoding: str) -> dict:
+    """{coding: q} from an Accept-Encoding header."""
+    codings = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if coding:
+            codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    codings = _accepted(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses the client can decode.
+
+    `exclude_paths` are regular expressions matched against the request path;
+    bodies smaller than `minimum_size` are sent as they are, however many
+    chunks they arrive in. HEAD requests and bodiless statuses pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths: List[Pattern] = [re.compile(pattern) for pattern in exclude_paths]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None or any(pattern.search(scope["path"]) for pattern in self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        if scope.get("method") == "HEAD":
+            skipped.labels(reason="head").inc()
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSend(send, encoding, self)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    """
+    Wraps `send`, holding body chunks back until it's clear whether the
+    response is worth compressing.
+
+    Many responses arrive in several chunks even when small (BaseHTTPMiddleware
+    re-streams every body and ends it with an empty chunk), so the decision is
+    made once `minimum_size` bytes have been seen or the body has ended.
+    """
+
+    def __init__(self, send: Send, encoding: str, options: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.options = options
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.buffered: List[bytes] = []
+        self.buffered_size = 0
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            reason = self._skip_reason(message["status"], Headers(raw=message["headers"]))
+            if reason:
+                skipped.labels(reason=reason).inc()
+                self.passthrough = True
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            self.buffered.append(body)
+            self.buffered_size += len(body)
+            if more_body and self.buffered_size < self.options.minimum_size:
+                return
+            body = b"".join(self.buffered)
+            self.buffered = []
+            if not more_body and len(body) < self.options.minimum_size:
+                await self._send_uncompressed(body)
+                return
+            self.compressor = _Compressor(self.encoding, self.options.gzip_level, self.options.brotli_quality)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            # The encoded bytes differ from the ones the strong tag was computed for.
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            compressed = self.compressor.chunk(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start)
+        else:
+            compressed = self.compressor.chunk(body, final=not more_body)
+
+        bytes_in.labels(encoding=self.encoding).inc(len(body))
+        bytes_out.labels(encoding=self.encoding).inc(len(compressed))
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    async def _send_uncompressed(self, body: bytes) -> None:
+        skipped.labels(reason="small").inc()
+        self.passthrough = True
+        headers = MutableHeaders(raw=self.start["headers"])
+        if "content-length" not in headers:
+            # The whole body is in hand, so it needn't go out chunked.
+            headers["Content-Length"] = str(len(body))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": False})
+
+    @staticmethod
+    def _skip_reason(status: int, headers: Headers) -> Optional[str]:
+        if status in (204, 304) or status < 200:
+            return "no_body"
+        if "content-encoding" in headers:
+            return "encoded"
+        if "content-range" in headers:
+            return "range"
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(SKIP_CONTENT_TYPES):
+            return "media"
+        return None
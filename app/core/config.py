@@ -6,7 +6,23 @@ class Settings(BaseSettings):
     MONGO_PASSWORD: str
     MONGO_ADDRESS: str
     MONGO_CLUSTER: str
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 5
+    MONGO_MAX_IDLE_TIME_MS: int = 300000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2000
+    MONGO_COMPRESSORS: str = "zlib"
+    MONGO_ENSURE_INDEXES: bool = True
+    MONGO_SLOW_QUERY_MS: int = 0  # 0 disables the slow-query log
+    MONGO_EXPLAIN_SAMPLE_RATE: float = 0.01
+    CATALOG_POLL_INTERVAL: float = 30.0
+    CATALOG_MAX_AGE: float = 3600.0
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    PROGRESS_FLUSH_INTERVAL: float = 2.0  # longest a flashcard progress update waits in memory; 0 writes through
+    PROGRESS_BUFFER_MAX: int = 5000  # pending (user, level) updates that trigger an early flush
     FIREBASE_API: str
+    FIREBASE_PROJECT_ID: str = ""
     ALLOWED_ORIGINS: List[str] = ["*"]
     STORAGE_ADDRESS: str = ""
     STORAGE_USER: str = ""
@@ -19,6 +35,22 @@ class Settings(BaseSettings):
     S3_SECRET_KEY: str = ""
     OPENAI_API_KEY: str = ""
     ELEVEN_LABS_KEY: str = ""
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 60
+    AUTH_NEGATIVE_CACHE_SIZE: int = 10000
+    AUTH_NEGATIVE_CACHE_TTL: int = 300
+    AUTH_FAILURE_RATE: float = 0.5
+    AUTH_FAILURE_BURST: int = 20
+    TRUSTED_PROXIES: List[str] = []  # CIDRs of reverse proxies whose X-Forwarded-For is believed
+    SESSION_SECRET: str = ""
+    SESSION_PREVIOUS_SECRETS: List[str] = []
+    SESSION_TOKEN_TTL: int = 900
+    SESSION_REVOCATION_SYNC_INTERVAL: int = 30
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
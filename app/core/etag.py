@@ -0,0 +1,54 @@
+"""
+Strong ETags and conditional GETs for catalog routes.
+
+An ETag is a hash of the content version a response is rendered from, so
+routes can compare it with `If-None-Match` and answer 304 before building
+(or querying) anything. Each route also states its Cache-Control policy.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.core.responses import dumps
+
+# Compiled into the app; changes only with a deploy.
+STATIC = "public, max-age=86400"
+# Shared content that can change at any time: always revalidate, usually for a 304.
+CATALOG = "public, no-cache"
+# Same, for responses behind authentication or shaped per user.
+PRIVATE = "private, no-cache"
+
+
+def content_etag(*parts: Any) -> str:
+    """Strong ETag over JSON-serializable `parts`."""
+    return '"' + hashlib.blake2b(dumps(parts), digest_size=16).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match uses the weak comparison; compression weakens our tags.
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """A 304 if the client already holds `etag`, else None."""
+    if matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def tag(response: Response, etag: str, cache_control: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
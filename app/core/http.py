@@ -0,0 +1,43 @@
+"""Application-lifetime HTTP client for outbound calls (Firebase, Google keys)."""
+
+import httpx
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    client: httpx.AsyncClient = None
+
+http = HTTPClient()
+
+def create_http_client(**overrides) -> httpx.AsyncClient:
+    """Build a keep-alive, HTTP/2 capable client with the configured pool limits."""
+    options = dict(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    )
+    options.update(overrides)
+    return httpx.AsyncClient(**options)
+
+def open_http_client(**overrides) -> httpx.AsyncClient:
+    if http.client is None:
+        http.client = create_http_client(**overrides)
+        logger.info("Opened shared HTTP client")
+    return http.client
+
+def get_http_client() -> httpx.AsyncClient:
+    # Scripts and tests that never run the app lifespan still get a client.
+    if http.client is None:
+        return open_http_client()
+    return http.client
+
+async def close_http_client():
+    if http.client is not None:
+        await http.client.aclose()
+        http.client = None
@@ -0,0 +1,42 @@
+"""Keyed token buckets for throttling."""
+
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class KeyedTokenBucket:
+    """
+    One token bucket per key (e.g. client IP), bounded to `maxsize` keys.
+
+    Buckets refill at `rate` tokens per second up to `burst`. Keys that have
+    not been touched for a while are evicted first; a fresh bucket is full,
+    so evicting one can only ever be lenient.
+    """
+
+    def __init__(self, rate: float, burst: float, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.burst
+        tokens, updated_at = bucket
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+    def is_limited(self, key: Hashable) -> bool:
+        """True if `key` has no tokens left. Does not consume anything."""
+        if key not in self._buckets:
+            return False
+        return self._tokens(key, time.monotonic()) < 1
+
+    def consume(self, key: Hashable, amount: float = 1) -> None:
+        now = time.monotonic()
+        tokens = max(self._tokens(key, now) - amount, 0)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
@@ -0,0 +1,35 @@
+"""
+Fast JSON responses for hot endpoints.
+
+Handlers that already build exactly the payload their `response_model`
+describes can return `FastJSONResponse(payload)`: FastAPI then skips
+validating and re-encoding it, and the `response_model` still documents the
+schema in OpenAPI. Payloads are plain dicts and lists; orjson writes
+datetimes the way Pydantic does, with UTC as `Z`.
+"""
+
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
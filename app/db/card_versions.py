@@ -0,0 +1,24 @@
+"""
+Per-level fingerprints of the word cards.
+
+Lets /words/{level} answer a revalidation and a flashcard session tell
+whether its snapshot is current without reading any cards.
+"""
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.core.config import settings
+from app.db.catalog import Catalog, catalogs
+from app.db.word_cards import WORD_CARDS_COLLECTION
+
+
+async def _build_word_card_versions(db: AsyncDatabase) -> dict:
+    """Per level, a fingerprint that changes whenever a card is written or removed."""
+    pipeline = [{"$group": {"_id": "$level", "cards": {"$sum": 1}, "built_at": {"$max": "$built_at"}}}]
+    cursor = await db[WORD_CARDS_COLLECTION].aggregate(pipeline)
+    return {doc["_id"]: [doc["cards"], doc["built_at"]] async for doc in cursor if doc["_id"]}
+
+
+word_card_versions = catalogs.register(Catalog(
+    "word_card_versions", WORD_CARDS_COLLECTION, _build_word_card_versions, settings.CATALOG_MAX_AGE
+))
@@ -0,0 +1,157 @@
+"""
+In-process read models over content collections.
+
+Catalogs such as the word decks change only when content is ingested, so
+they are built once and served from memory until their source collection
+changes. Changes are picked up from a change stream on the collection; on
+deployments without change streams (a standalone mongod) the watcher falls
+back to polling a version document that ingest scripts bump with
+`bump_version`.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.cache import SingleFlight
+from app.core.etag import content_etag
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSIONS_COLLECTION = "catalog_versions"
+
+
+async def bump_version(db: AsyncDatabase, collection: str) -> None:
+    """Tell running servers that `collection` changed; call after ingesting into it."""
+    await db[CATALOG_VERSIONS_COLLECTION].update_one(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+class Catalog:
+    """
+    One cached value derived from a collection.
+
+    Concurrent misses share a single rebuild. A rebuild that was overtaken by
+    an invalidation still answers its callers but is not kept, so a change
+    that lands mid-build is never masked. `max_age` is a backstop in case an
+    invalidation is missed. Every value carries a content-hash ETag, which
+    is the same in every process serving the same content.
+    """
+
+    def __init__(self, name: str, collection: str, build: Callable[[AsyncDatabase], Awaitable[Any]], max_age: float):
+        self.name = name
+        self.collection = collection
+        self.build = build
+        self.max_age = max_age
+        self.generation = 0
+        self._entry: Optional[Tuple[int, float, Any, str]] = None
+        self._flight = SingleFlight(f"{name}_catalog_build")
+        self.hits = metrics.counter(f"{name}_catalog_hits", f"{name} reads served from memory")
+        self.misses = metrics.counter(f"{name}_catalog_misses", f"{name} reads that needed a rebuild")
+        self.invalidations = metrics.counter(f"{name}_catalog_invalidations", f"Times {name} was invalidated")
+
+    async def get(self, db: AsyncDatabase) -> Any:
+        value, _ = await self.get_tagged(db)
+        return value
+
+    async def get_tagged(self, db: AsyncDatabase) -> Tuple[Any, str]:
+        """The value and its ETag."""
+        entry = self._entry
+        if entry is not None and entry[0] == self.generation and time.monotonic() - entry[1] < self.max_age:
+            self.hits.inc()
+            return entry[2], entry[3]
+        self.misses.inc()
+        return await self._flight.do(self.generation, lambda: self._rebuild(db))
+
+    async def _rebuild(self, db: AsyncDatabase) -> Tuple[Any, str]:
+        generation = self.generation
+        value = await self.build(db)
+        etag = content_etag(self.name, value)
+        if generation == self.generation:
+            self._entry = (generation, time.monotonic(), value, etag)
+        return value, etag
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._entry = None
+        self.invalidations.inc()
+
+
+class CatalogRegistry:
+    """The catalogs of this process and the tasks that keep them fresh."""
+
+    def __init__(self):
+        self._catalogs: Dict[str, List[Catalog]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, catalog: Catalog) -> Catalog:
+        self._catalogs.setdefault(catalog.collection, []).append(catalog)
+        return catalog
+
+    def invalidate(self, collection: str) -> None:
+        for catalog in self._catalogs.get(collection, []):
+            catalog.invalidate()
+
+    async def _watch(self, db: AsyncDatabase, collection: str, poll_interval: float) -> None:
+        opened = False
+        while True:
+            try:
+                # Only the event's existence matters; keep the payload to the resume token.
+                async with await db[collection].watch([{"$project": {"operationType": 1}}]) as stream:
+                    opened = True
+                    # Changes made while no stream was open would otherwise go unnoticed.
+                    self.invalidate(collection)
+                    async for _ in stream:
+                        self.invalidate(collection)
+            except OperationFailure as e:
+                if not opened:
+                    logger.info(f"No change stream on {collection} ({e}); polling its catalog version instead")
+                    await self._poll(db, collection, poll_interval)
+                    return
+                logger.warning(f"Change stream on {collection} failed: {e}")
+                await asyncio.sleep(poll_interval)
+            except PyMongoError as e:
+                logger.warning(f"Change stream on {collection} failed: {e}")
+                await asyncio.sleep(poll_interval)
+
+    async def _poll(self, db: AsyncDatabase, collection: str, interval: float) -> None:
+        seen = None
+        while True:
+            try:
+                doc = await db[CATALOG_VERSIONS_COLLECTION].find_one({"_id": collection}, {"version": 1})
+                version = doc["version"] if doc else 0
+                if seen is not None and version != seen:
+                    self.invalidate(collection)
+                seen = version
+            except PyMongoError as e:
+                logger.warning(f"Failed to poll catalog version for {collection}: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, db: AsyncDatabase, poll_interval: float) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._watch(db, collection, poll_interval))
+                for collection in self._catalogs
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+catalogs = CatalogRegistry()
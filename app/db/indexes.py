@@ -0,0 +1,299 @@
+"""
+Declarative index registry and query-plan audit.
+
+Indexes are applied idempotently at startup (MONGO_ENSURE_INDEXES) or from
+the command line:
+
+    python -m app.db.indexes            # create missing indexes
+    python -m app.db.indexes --audit    # create, then explain() every query shape
+
+The audit exits non-zero if any winning plan contains a COLLSCAN or an
+in-memory SORT stage.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from bson import ObjectId
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Words that carry at least one test question. Equivalent to
+# {"tests": {"$exists": True, "$type": "array", "$ne": []}} for array fields,
+# but also usable as a partial-index filter.
+HAS_TESTS = {"tests.0": {"$exists": True}}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "words": [
+        IndexModel([("cerf_level", ASCENDING)], name="cerf_level"),
+        IndexModel(
+            [("cerf_level", ASCENDING)],
+            name="cerf_level_with_tests",
+            partialFilterExpression=HAS_TESTS,
+        ),
+    ],
+    "word_cards": [
+        # Covers the per-level list and the id-only sample the flashcard pick makes.
+        IndexModel([("level", ASCENDING), ("_id", ASCENDING)], name="level_id"),
+        # Lets word search pick up only the cards written since its last refresh.
+        IndexModel([("built_at", ASCENDING)], name="built_at"),
+    ],
+    "flashcard_sessions": [
+        IndexModel([("user_id", ASCENDING), ("level", ASCENDING), ("is_active", ASCENDING)], name="user_level_active"),
+    ],
+    "flashcard_reviews": [
+        # The due queue: one range scan per session, however many cards a user has.
+        IndexModel([("user_id", ASCENDING), ("level", ASCENDING), ("due_at", ASCENDING)], name="user_level_due"),
+        IndexModel([("user_id", ASCENDING), ("word_id", ASCENDING)], name="user_word", unique=True),
+    ],
+    "test_results": [
+        IndexModel([("userId", ASCENDING), ("level", ASCENDING), ("score", DESCENDING)], name="user_level_score"),
+        IndexModel([("userId", ASCENDING), ("completedAt", DESCENDING)], name="user_completed"),
+    ],
+    "pronunciation_modules": [
+        IndexModel([("sound_id", ASCENDING)], name="sound_id"),
+        IndexModel([("difficulty_level", ASCENDING), ("name", ASCENDING)], name="difficulty_name"),
+    ],
+    "pronunciation_sessions": [
+        IndexModel(
+            [("userId", ASCENDING), ("sound_id", ASCENDING), ("exercise_index", ASCENDING), ("overall_score", DESCENDING)],
+            name="user_sound_exercise_score",
+        ),
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="user_created"),
+        IndexModel([("userId", ASCENDING), ("sound_id", ASCENDING), ("createdAt", DESCENDING)], name="user_sound_created"),
+    ],
+    "user_pronunciation_progress": [
+        IndexModel([("userId", ASCENDING), ("sound_id", ASCENDING)], name="user_sound"),
+    ],
+    "speaking_sessions": [
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="user_created"),
+    ],
+    "speaking_questions": [
+        IndexModel([("theme", ASCENDING)], name="theme"),
+        IndexModel([("level", ASCENDING), ("theme", ASCENDING)], name="level_theme"),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+    ],
+    "podcasts": [
+        IndexModel([("created_at", DESCENDING)], name="created"),
+        IndexModel([("cefr_level", ASCENDING), ("context", ASCENDING), ("created_at", DESCENDING)], name="level_context_created"),
+        IndexModel([("cefr_level", ASCENDING), ("created_at", DESCENDING)], name="level_created"),
+        IndexModel([("context", ASCENDING), ("created_at", DESCENDING)], name="context_created"),
+    ],
+    "revoked_sessions": [
+        # Mongo drops revocations once the token they cover has expired.
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncDatabase) -> List[str]:
+    """Create every registered index; existing identical indexes are a no-op."""
+    created = []
+    for collection, models in INDEXES.items():
+        created.extend(await db[collection].create_indexes(models))
+    logger.info(f"Ensured {len(created)} indexes across {len(INDEXES)} collections")
+    return created
+
+
+# --- Query-plan audit -------------------------------------------------------
+
+AUDIT_USER = "index-audit-user"
+AUDIT_LEVEL = "A1"
+AUDIT_SOUND = "sound_st_initial"
+
+
+class QueryShape(NamedTuple):
+    """One query a router issues, expressed as an explainable command."""
+    name: str
+    command: dict
+
+
+def _find(collection: str, filter: dict, sort: Optional[dict] = None, limit: int = 0) -> dict:
+    command = {"find": collection, "filter": filter}
+    if sort:
+        command["sort"] = sort
+    if limit:
+        command["limit"] = limit
+    return command
+
+
+def _aggregate(collection: str, pipeline: List[dict]) -> dict:
+    return {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+
+
+def _count(collection: str, filter: dict) -> dict:
+    return _aggregate(collection, [{"$match": filter}, {"$group": {"_id": 1, "n": {"$sum": 1}}}])
+
+
+QUERY_SHAPES: List[QueryShape] = [
+    # auth / users
+    QueryShape("user by id", _find("user", {"_id": AUDIT_USER}, limit=1)),
+    QueryShape("notifications", _find("notifications", {"user_id": AUDIT_USER}, sort={"created_at": -1}, limit=50)),
+    # words / flashcards
+    QueryShape("word decks", _aggregate("words", [
+        {"$sort": {"cerf_level": 1}},
+        {"$group": {"_id": "$cerf_level", "wordCount": {"$sum": 1}}},
+    ])),
+    QueryShape("words by level", _find("word_cards", {"level": AUDIT_LEVEL}, sort={"_id": 1})),
+    QueryShape("words by level after cursor", _find(
+        "word_cards", {"level": AUDIT_LEVEL, "_id": {"$gt": ObjectId("0" * 24)}}, sort={"_id": 1}, limit=100,
+    )),
+    QueryShape("word search changes", _find("word_cards", {"built_at": {"$gte": datetime(2025, 1, 1)}})),
+    QueryShape("flashcard sample", _aggregate("word_cards", [
+        {"$match": {"level": AUDIT_LEVEL}}, {"$project": {"_id": 1}}, {"$sample": {"size": 30}},
+    ])),
+    QueryShape("flashcard review card", _find(
+        "word_cards", {"_id": ObjectId("0" * 24), "level": AUDIT_LEVEL}, limit=1,
+    )),
+    QueryShape("active flashcard session", _find(
+        "flashcard_sessions", {"user_id": AUDIT_USER, "level": AUDIT_LEVEL, "is_active": True}, limit=1,
+    )),
+    QueryShape("due flashcard reviews", _find(
+        "flashcard_reviews", {"user_id": AUDIT_USER, "level": AUDIT_LEVEL, "due_at": {"$lte": datetime(2025, 1, 1)}},
+        sort={"due_at": 1}, limit=30,
+    )),
+    QueryShape("flashcard review state", _find(
+        "flashcard_reviews", {"user_id": AUDIT_USER, "word_id": {"$in": [ObjectId("0" * 24)]}},
+    )),
+    # tests
+    QueryShape("test levels", _aggregate("words", [
+        {"$match": HAS_TESTS},
+        {"$sort": {"cerf_level": 1}},
+        {"$unwind": "$tests"},
+        {"$group": {"_id": "$cerf_level", "question_count": {"$sum": 1}}},
+    ])),
+    QueryShape("test questions for level", _aggregate("words", [
+        {"$match": {"cerf_level": AUDIT_LEVEL, **HAS_TESTS}},
+        {"$unwind": "$tests"},
+        {"$sample": {"size": 20}},
+    ])),
+    QueryShape("test level stats", _aggregate("test_results", [
+        {"$match": {"userId": AUDIT_USER, "level": {"$in": ["A1", "A2", "B1"]}}},
+        {"$group": {"_id": "$level", "best_score": {"$max": "$score"}, "attempts": {"$sum": 1}}},
+    ])),
+    QueryShape("test history", _find("test_results", {"userId": AUDIT_USER}, sort={"completedAt": -1}, limit=20)),
+    # pronunciation
+    QueryShape("pronunciation modules", _find(
+        "pronunciation_modules", {}, sort={"difficulty_level": 1, "name": 1},
+    )),
+    QueryShape("pronunciation modules by difficulty", _find(
+        "pronunciation_modules", {"difficulty_level": "beginner"}, sort={"difficulty_level": 1, "name": 1},
+    )),
+    QueryShape("pronunciation module", _find("pronunciation_modules", {"sound_id": AUDIT_SOUND}, limit=1)),
+    QueryShape("pronunciation progress", _find(
+        "user_pronunciation_progress", {"userId": AUDIT_USER, "sound_id": AUDIT_SOUND}, limit=1,
+    )),
+    QueryShape("pronunciation progress for user", _find("user_pronunciation_progress", {"userId": AUDIT_USER})),
+    QueryShape("pronunciation progress for modules", _find(
+        "user_pronunciation_progress", {"userId": AUDIT_USER, "sound_id": {"$in": [AUDIT_SOUND, "sound_ch_ich"]}},
+    )),
+    QueryShape("best pronunciation attempt", _find(
+        "pronunciation_sessions",
+        {"userId": AUDIT_USER, "sound_id": AUDIT_SOUND, "exercise_index": 0},
+        sort={"overall_score": -1},
+        limit=1,
+    )),
+    QueryShape("pronunciation history", _find(
+        "pronunciation_sessions", {"userId": AUDIT_USER}, sort={"createdAt": -1}, limit=20,
+    )),
+    QueryShape("pronunciation history by sound", _find(
+        "pronunciation_sessions", {"userId": AUDIT_USER, "sound_id": AUDIT_SOUND}, sort={"createdAt": -1}, limit=20,
+    )),
+    QueryShape("pronunciation stats", _aggregate("pronunciation_sessions", [
+        {"$match": {"userId": AUDIT_USER}},
+        {"$group": {"_id": None, "n": {"$sum": 1}, "avg": {"$avg": "$overall_score"}}},
+    ])),
+    QueryShape("difficulty levels", {"distinct": "pronunciation_modules", "key": "difficulty_level", "query": {}}),
+    # speaking
+    QueryShape("speaking question by theme and level", _aggregate("speaking_questions", [
+        {"$match": {"theme": "Introduction", "level": AUDIT_LEVEL}},
+        {"$sample": {"size": 1}},
+    ])),
+    QueryShape("speaking themes for level", _aggregate("speaking_questions", [
+        {"$match": {"level": AUDIT_LEVEL}},
+        {"$group": {"_id": "$theme"}},
+    ])),
+    QueryShape("speaking themes", {"distinct": "speaking_questions", "key": "theme", "query": {}}),
+    QueryShape("speaking history", _find("speaking_sessions", {"userId": AUDIT_USER}, sort={"createdAt": -1}, limit=20)),
+    QueryShape("speaking history count", _count("speaking_sessions", {"userId": AUDIT_USER})),
+    # podcasts
+    QueryShape("podcasts", _find("podcasts", {}, sort={"created_at": -1}, limit=50)),
+    QueryShape("podcasts by level", _find("podcasts", {"cefr_level": AUDIT_LEVEL}, sort={"created_at": -1}, limit=50)),
+    QueryShape("podcasts by context", _find("podcasts", {"context": "Das Café"}, sort={"created_at": -1}, limit=50)),
+    QueryShape("podcasts by level and context", _find(
+        "podcasts", {"cefr_level": AUDIT_LEVEL, "context": "Das Café"}, sort={"created_at": -1}, limit=50,
+    )),
+]
+
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+
+def _winning_plans(explain: dict) -> Iterator[dict]:
+    """Yield every winningPlan in an explain document (find, aggregate or sharded)."""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            else:
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for item in explain:
+            yield from _winning_plans(item)
+
+
+def _stages(plan) -> Iterator[str]:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def audit_query_plans(db: AsyncDatabase) -> List[str]:
+    """Explain every registered query shape; return a description of each bad plan."""
+    problems = []
+    for shape in QUERY_SHAPES:
+        explain = await db.command("explain", shape.command, verbosity="queryPlanner")
+        stages = {stage for plan in _winning_plans(explain) for stage in _stages(plan)}
+        bad = stages & BAD_STAGES
+        if bad:
+            problems.append(f"{shape.name}: {', '.join(sorted(bad))}")
+        logger.info(f"{shape.name}: {', '.join(sorted(stages)) or 'no plan'}")
+    return problems
+
+
+async def _main(audit: bool) -> int:
+    from app.db.mongodb import close_mongo_connection, get_database
+
+    db = await get_database()
+    try:
+        created = await ensure_indexes(db)
+        print(f"Ensured indexes: {', '.join(created)}")
+        if not audit:
+            return 0
+        problems = await audit_query_plans(db)
+        for problem in problems:
+            print(f"BAD PLAN  {problem}")
+        print(f"Audited {len(QUERY_SHAPES)} query shapes, {len(problems)} bad plans")
+        return 1 if problems else 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create registered MongoDB indexes")
+    parser.add_argument("--audit", action="store_true", help="explain() every router query shape afterwards")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args.audit)))
@@ -0,0 +1,125 @@
+"""
+Request-scoped batch loaders (DataLoader style).
+
+Keys requested within one event-loop tick are collected and resolved with a
+single `$in` / aggregation round trip, so an endpoint that needs data for N
+items costs one query instead of N:
+
+    progress = await loaders.pronunciation_progress(user.id).load_many(sound_ids)
+
+Results are memoized for the lifetime of the loader, i.e. one request.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+from fastapi import Depends, Request
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.core.metrics import metrics
+from app.db import queries
+from app.db.mongodb import get_database
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+loader_batches = metrics.counter("loader_batches", "Batched queries issued by request loaders")
+loader_keys = metrics.counter("loader_keys", "Keys resolved by request loaders")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesce `load(key)` calls from the same tick into one `batch_fn(keys)`.
+
+    `batch_fn` returns a mapping of the keys it found; missing keys load as
+    None. A failed batch fails every caller in it and is not memoized.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]]):
+        self.name = name
+        self._batch_fn = batch_fn
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+
+    async def load(self, key: K) -> Optional[V]:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                loop.call_soon(self._dispatch)
+        # Shield so a cancelled caller doesn't cancel the result for the others.
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        asyncio.ensure_future(self._run(keys))
+
+    async def _run(self, keys: List[K]) -> None:
+        loader_batches.labels(loader=self.name).inc()
+        loader_keys.labels(loader=self.name).inc(len(keys))
+        try:
+            found = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """The loaders available to one request, created lazily per user."""
+
+    def __init__(self, db: AsyncDatabase):
+        self.db = db
+        self._loaders: Dict[tuple, BatchLoader] = {}
+
+    def _get(self, name: str, user_id: str, batch_fn) -> BatchLoader:
+        loader = self._loaders.get((name, user_id))
+        if loader is None:
+            loader = self._loaders[(name, user_id)] = BatchLoader(name, batch_fn)
+        return loader
+
+    def pronunciation_progress(self, user_id: str) -> BatchLoader[str, dict]:
+        """sound_id -> the user's progress document."""
+        async def batch(sound_ids: List[str]) -> Dict[str, dict]:
+            cursor = self.db["user_pronunciation_progress"].find(
+                {"userId": user_id, "sound_id": {"$in": sound_ids}},
+                queries.PRONUNCIATION_PROGRESS
+            )
+            return {doc["sound_id"]: doc async for doc in cursor}
+
+        return self._get("pronunciation_progress", user_id, batch)
+
+    def test_level_stats(self, user_id: str) -> BatchLoader[str, dict]:
+        """CEFR level -> {"best_score", "attempts"} over the user's test results."""
+        async def batch(levels: List[str]) -> Dict[str, dict]:
+            cursor = await self.db["test_results"].aggregate([
+                {"$match": {"userId": user_id, "level": {"$in": levels}}},
+                {"$group": {
+                    "_id": "$level",
+                    "best_score": {"$max": "$score"},
+                    "attempts": {"$sum": 1},
+                }},
+            ])
+            return {doc["_id"]: doc async for doc in cursor}
+
+        return self._get("test_level_stats", user_id, batch)
+
+
+def get_loaders(request: Request, db: AsyncDatabase = Depends(get_database)) -> Loaders:
+    """Request-scoped Loaders, shared by every dependency of the request."""
+    loaders = getattr(request.state, "loaders", None)
+    if loaders is None:
+        loaders = request.state.loaders = Loaders(db)
+    return loaders
@@ -1,34 +1,100 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 from app.core.config import settings
+from app.db.monitoring import CommandMetricsListener, PoolMetricsListener
+from typing import Awaitable, Callable, List
+import asyncio
 import certifi
 import logging
 logger = logging.getLogger(__name__)
 
+DATABASE_NAME = "hackathon"
+
 class MongoDB:
-    client: AsyncIOMotorClient = None
+    client: AsyncMongoClient = None
+    database: AsyncDatabase = None
 
 db = MongoDB()
+_connect_lock = asyncio.Lock()
+# Run once, by whichever call creates the client.
+_on_connect: List[Callable[[AsyncDatabase], Awaitable[None]]] = []
+
+
+def on_connect(callback: Callable[[AsyncDatabase], Awaitable[None]]) -> None:
+    """
+    Run `callback(database)` once the shared client exists.
+
+    The lifespan starts its background tasks this way, so they still start
+    when Mongo was unreachable at startup and `get_database()` connects later.
+    """
+    _on_connect.append(callback)
+
+
+def create_mongo_client(**overrides) -> AsyncMongoClient:
+    commands = CommandMetricsListener(settings.MONGO_SLOW_QUERY_MS, settings.MONGO_EXPLAIN_SAMPLE_RATE)
+    uri = f"mongodb+srv://{settings.MONGO_USER}:{settings.MONGO_PASSWORD}@{settings.MONGO_ADDRESS}/?appName={settings.MONGO_CLUSTER}"
+    options = dict(
+        # Use certifi for SSL certificate verification to fix SSL handshake issues
+        tlsCAFile=certifi.where(),
+        serverSelectionTimeoutMS=5000,  # Reduce timeout for faster feedback
+        connectTimeoutMS=5000,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=[PoolMetricsListener(), commands],
+    )
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    options.update(overrides)
+    client = AsyncMongoClient(uri, **options)
+    # Sampled explains are issued through the client being monitored.
+    commands.client = client
+    return client
+
+
+async def connect_to_mongo() -> AsyncDatabase:
+    """
+    Create the shared client once; called from the app lifespan.
+
+    Concurrent callers wait on the same lock, so only one client is built. A
+    failed ping is logged but the client is kept: the driver keeps monitoring
+    the cluster and queries succeed as soon as it is reachable again.
+    """
+    callbacks = []
+    async with _connect_lock:
+        if db.client is None:
+            try:
+                client = create_mongo_client()
+            except Exception as e:
+                # Bad URI or SRV lookup failure: nothing to keep, let the caller retry.
+                logger.error(f"Failed to create MongoDB client: {str(e)}")
+                raise
+            db.client = client
+            db.database = client.get_database(DATABASE_NAME)
+            try:
+                await db.client.admin.command('ping')
+                logger.info("Successfully connected to MongoDB")
+            except Exception as e:
+                logger.error(f"Failed to connect to MongoDB: {str(e)}")
+            callbacks, _on_connect[:] = list(_on_connect), []
+    # Outside the lock: callbacks may query through get_database().
+    for callback in callbacks:
+        await callback(db.database)
+    return db.database
+
 
 async def get_database():
-    if db.client is None:
-        uri = f"mongodb+srv://{settings.MONGO_USER}:{settings.MONGO_PASSWORD}@{settings.MONGO_ADDRESS}/?appName={settings.MONGO_CLUSTER}"
-        try:
-            # Use certifi for SSL certificate verification to fix SSL handshake issues
-            db.client = AsyncIOMotorClient(
-                uri, 
-                tlsCAFile=certifi.where(),
-                serverSelectionTimeoutMS=5000,  # Reduce timeout for faster feedback
-                connectTimeoutMS=5000,
-            )
-            # Test the connection
-            await db.client.admin.command('ping')
-            logger.info("Successfully connected to MongoDB")
-        except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {str(e)}")
-            db.client = None
-            raise
-    return db.client.get_database("hackathon")
+    if db.database is None:
+        # Outside the app lifespan (scripts, tests) connect on first use.
+        return await connect_to_mongo()
+    return db.database
 
 async def close_mongo_connection():
-    if db.client:
-        db.client.close()
+    async with _connect_lock:
+        if db.client:
+            await db.client.close()
+        db.client = None
+        db.database = None
+        # Shutting down; nothing should start against a later client.
+        _on_connect.clear()
@@ -0,0 +1,299 @@
+"""PyMongo event listeners that feed the metrics registry."""
+
+import asyncio
+import logging
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Checkouts are normally sub-millisecond; anything near waitQueueTimeoutMS means the pool is exhausted.
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool health: checkout wait, connections in use and open.
+
+    Called synchronously from the driver, so every handler is a cheap,
+    thread-safe metrics update.
+    """
+
+    def __init__(self):
+        self.checkout_wait = metrics.histogram(
+            "mongo_pool_checkout_seconds", "Time spent waiting for a pooled connection", CHECKOUT_BUCKETS
+        )
+        self.checkout_failed = metrics.counter("mongo_pool_checkout_failed", "Connection checkouts that failed")
+        self.in_use = metrics.gauge("mongo_pool_in_use", "Connections currently checked out")
+        self.open = metrics.gauge("mongo_pool_connections", "Connections currently open")
+        self.cleared = metrics.counter("mongo_pool_cleared", "Times a pool was cleared after an error")
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.cleared.inc()
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failed.labels(reason=event.reason).inc()
+        if event.duration is not None:
+            self.checkout_wait.observe(event.duration)
+
+    def connection_checked_out(self, event):
+        self.in_use.inc()
+        if event.duration is not None:
+            self.checkout_wait.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        self.in_use.dec()
+
+
+# --- Command monitoring -----------------------------------------------------
+
+# Queries issued by the request being handled; None outside a request.
+_route_queries: ContextVar[Optional["RouteQueries"]] = ContextVar("mongo_route_queries", default=None)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+# Keys that describe the connection, not the query.
+_NOISE_KEYS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern"}
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+route_query_count = metrics.histogram(
+    "mongo_route_queries", "Mongo commands issued per request, by route", QUERY_COUNT_BUCKETS
+)
+route_query_time = metrics.histogram("mongo_route_query_seconds", "Time spent in Mongo per request, by route")
+route_commands = metrics.counter("mongo_route_commands", "Mongo commands by route, command and collection")
+route_docs_returned = metrics.counter("mongo_route_docs_returned", "Documents returned by route and collection")
+command_time = metrics.histogram("mongo_command_seconds", "Mongo command duration by command and collection")
+command_failed = metrics.counter("mongo_command_failed", "Mongo commands that failed")
+docs_examined = metrics.histogram(
+    "mongo_docs_examined", "Sampled documents examined per query, by collection",
+    (0, 1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+
+
+class RouteQueries:
+    """Mongo commands seen while one request was being handled."""
+
+    def __init__(self, route: Optional[str] = None):
+        self.count = 0
+        self.seconds = 0.0
+        # (command, collection) -> [commands, documents returned]
+        self.commands: Dict[Tuple[str, str], List[int]] = {}
+        self.route = route
+
+    def record(self, command: str, collection: str, seconds: float, returned: int) -> None:
+        self.count += 1
+        self.seconds += seconds
+        entry = self.commands.setdefault((command, collection), [0, 0])
+        entry[0] += 1
+        entry[1] += returned
+
+    def observe(self, route: Optional[str] = None) -> None:
+        route = self.route = route or self.route or "unmatched"
+        route_query_count.labels(route=route).observe(self.count)
+        route_query_time.labels(route=route).observe(self.seconds)
+        for (command, collection), (count, returned) in self.commands.items():
+            route_commands.labels(route=route, command=command, collection=collection).inc(count)
+            if returned:
+                route_docs_returned.labels(route=route, collection=collection).inc(returned)
+
+
+@contextmanager
+def track_route_queries(route: Optional[str] = None) -> Iterator[RouteQueries]:
+    """Attribute every Mongo command issued inside the block to one request."""
+    queries = RouteQueries(route)
+    token = _route_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _route_queries.reset(token)
+
+
+def route_template(routes: Sequence[BaseRoute], scope: Scope) -> Optional[str]:
+    """The path template of the route `scope` will be dispatched to, as the router would pick it."""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+    return partial
+
+
+class RouteQueriesMiddleware:
+    """
+    ASGI middleware counting the Mongo commands of each request by route.
+
+    The route is matched before the app runs, so slow-query logs name it,
+    and the counts are observed only once the app has returned, i.e. after
+    a streamed body has been sent along with the queries that produced it.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Sequence[BaseRoute]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_route_queries(route_template(self.routes, scope)) as queries:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                queries.observe()
+
+
+def _query_fields(command: Mapping) -> dict:
+    """The command without session, transaction and `$db`-style envelope fields."""
+    return {k: v for k, v in command.items() if k not in _NOISE_KEYS and not k.startswith("$")}
+
+
+def query_shape(value: Any) -> Any:
+    """The command with every literal replaced by `?`, e.g. for the slow-query log."""
+    if isinstance(value, Mapping):
+        return {k: _literal_shape(v) for k, v in _query_fields(value).items()}
+    return _literal_shape(value)
+
+
+def _literal_shape(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _literal_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = _literal_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def _collection(event) -> str:
+    if event.command_name == "getMore":
+        return event.command.get("collection", "")
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+def _returned(reply: Mapping) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, Mapping):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    return 0
+
+
+def _total_docs_examined(explain: Any) -> int:
+    if isinstance(explain, Mapping):
+        total = explain.get("totalDocsExamined", 0)
+        if "totalDocsExamined" in explain:
+            return total
+        return sum(_total_docs_examined(v) for v in explain.values())
+    if isinstance(explain, list):
+        return sum(_total_docs_examined(v) for v in explain)
+    return 0
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Attribute every command to the current route and time it.
+
+    A random `explain_sample_rate` share of reads is re-run as an
+    executionStats explain in the background to record docsExamined, and
+    commands slower than `slow_query_ms` are logged with their filter shape.
+    """
+
+    EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+
+    def __init__(self, slow_query_ms: float = 0, explain_sample_rate: float = 0.0):
+        self.slow_query_ms = slow_query_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.client = None
+        self._pending: Dict[Tuple[Any, int], tuple] = {}
+        self._explains: set = set()
+
+    def started(self, event):
+        command = None
+        if self.slow_query_ms or event.command_name in self.EXPLAINABLE:
+            command = event.command
+        self._pending[(event.connection_id, event.request_id)] = (
+            _route_queries.get(), _collection(event), event.database_name, command
+        )
+
+    def succeeded(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        queries, collection, database, command = pending
+        seconds = event.duration_micros / 1e6
+        returned = _returned(event.reply)
+        command_time.labels(command=event.command_name, collection=collection).observe(seconds)
+        if queries is not None:
+            queries.record(event.command_name, collection, seconds, returned)
+
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            slow_query_logger.warning(
+                f"Slow query {seconds * 1000:.1f} ms on route {queries.route if queries else None}: "
+                f"{event.command_name} {database}.{collection} returned={returned} "
+                f"shape={query_shape(command)}"
+            )
+        if (
+            command is not None
+            and event.command_name in self.EXPLAINABLE
+            and self.client is not None
+            and self.explain_sample_rate
+            and random.random() < self.explain_sample_rate
+        ):
+            self._sample_explain(database, collection, command)
+
+    def failed(self, event):
+        self._pending.pop((event.connection_id, event.request_id), None)
+        command_failed.labels(command=event.command_name).inc()
+
+    def _sample_explain(self, database: str, collection: str, command: Mapping) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(database, collection, _query_fields(command)))
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, database: str, collection: str, command: dict) -> None:
+        # The explain itself must not be counted against the request that triggered it.
+        _route_queries.set(None)
+        try:
+            explain = await self.client[database].command("explain", command, verbosity="executionStats")
+        except Exception as e:
+            logger.debug(f"Sampled explain failed: {e}")
+            return
+        docs_examined.labels(collection=collection).observe(_total_docs_examined(explain))
@@ -0,0 +1,188 @@
+"""
+Named projections for router reads.
+
+`words` documents carry every test question, translations in every language
+and audio metadata, and podcasts carry full transcripts and quizzes. List
+and card endpoints only ever emit a handful of fields, so they read through
+the projections here instead of pulling whole documents.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.db.word_cards import WORD_CARDS_COLLECTION
+
+Projection = Dict[str, Any]
+
+
+def _size(field: str) -> dict:
+    return {"$size": {"$ifNull": [f"${field}", []]}}
+
+
+# --- words ----------------------------------------------------------------
+# Cards live in the precomputed word_cards collection (app.db.word_cards);
+# these projections only rename its fields into each endpoint's payload.
+
+WORD_LIST_ITEM: Projection = {
+    "_id": 0,
+    "id": 1,
+    "original": "$word",
+    "translation": 1,
+    "pronunciation": "$phonetic",
+    "audioMale": 1,
+    "audioFemale": 1,
+    "level": {"$literal": 0},
+}
+
+TARGET_WORD: Projection = {"_id": 0, "wordId": "$id", "word": 1, "translation": 1}
+
+WORD_ID: Projection = {"_id": 1}
+
+
+def flashcard(language: str) -> Projection:
+    return {
+        "_id": 0,
+        "id": 1,
+        "targetWord": "$word",
+        "translation": 1,
+        "phonetic": 1,
+        "language": {"$literal": language},
+        "audioMale": 1,
+        "audioFemale": 1,
+    }
+
+
+def word_list_by_level(
+    db: AsyncDatabase, level: str, after: Optional[ObjectId] = None, limit: int = 0, batch_size: int = 500
+) -> AsyncCursor:
+    """Cursor over a level's word list in `_id` order, starting after `after`."""
+    filter: dict = {"level": level}
+    if after is not None:
+        filter["_id"] = {"$gt": after}
+    return db[WORD_CARDS_COLLECTION].find(
+        filter, WORD_LIST_ITEM, sort=[("_id", 1)], limit=limit, batch_size=batch_size
+    )
+
+
+async def flashcards_by_ids(db: AsyncDatabase, word_ids: Iterable[str], language: str) -> List[dict]:
+    """Flashcards for `word_ids`, in the order given; unknown ids are skipped."""
+    word_ids = list(word_ids)
+    cursor = db[WORD_CARDS_COLLECTION].find(
+        {"_id": {"$in": [ObjectId(wid) for wid in word_ids]}}, flashcard(language)
+    )
+    cards = {doc["id"]: doc async for doc in cursor}
+    return [cards[wid] for wid in word_ids if wid in cards]
+
+
+async def sample_word_ids(db: AsyncDatabase, level: str, size: int) -> List[str]:
+    """Up to `size` random word ids from `level`, picked by the server."""
+    # $match + $project is covered by the level_id index, so only the sampled ids leave the server.
+    pipeline = [{"$match": {"level": level}}, {"$project": WORD_ID}, {"$sample": {"size": size}}]
+    cursor = await db[WORD_CARDS_COLLECTION].aggregate(pipeline)
+    return [str(doc["_id"]) async for doc in cursor]
+
+
+async def word_at_level(db: AsyncDatabase, word_id: ObjectId, level: str) -> bool:
+    """Whether `word_id` is a card at `level`."""
+    return await db[WORD_CARDS_COLLECTION].find_one({"_id": word_id, "level": level}, WORD_ID) is not None
+
+
+async def sample_target_words(db: AsyncDatabase, size: int) -> List[dict]:
+    cursor = await db[WORD_CARDS_COLLECTION].aggregate([{"$sample": {"size": size}}, {"$project": TARGET_WORD}])
+    return await cursor.to_list(None)
+
+
+# --- podcasts -------------------------------------------------------------
+
+PODCAST_LIST_ITEM: Projection = {
+    "title": 1,
+    "cefr_level": 1,
+    "context": 1,
+    "duration": 1,
+    "created_at": 1,
+}
+
+PODCAST_AUDIO: Projection = {"audio_filename": 1, "audio_url": 1}
+
+
+# --- pronunciation --------------------------------------------------------
+
+MODULE_SUMMARY: Projection = {
+    "sound_id": 1,
+    "phoneme_ipa": 1,
+    "name": 1,
+    "description": 1,
+    "articulatory_tip": 1,
+    "difficulty_level": 1,
+    "exercises_count": _size("exercises"),
+}
+
+def module_exercise(index: int) -> Projection:
+    """Module header plus the single exercise at `index` (empty if out of range)."""
+    return {
+        "sound_id": 1,
+        "phoneme_ipa": 1,
+        "name": 1,
+        "articulatory_tip": 1,
+        "exercises": {"$slice": [index, 1]},
+    }
+
+
+PRONUNCIATION_PROGRESS: Projection = {
+    "sound_id": 1,
+    "total_attempts": 1,
+    "average_score": 1,
+    "best_score": 1,
+    "last_practiced": 1,
+    "mastery_level": 1,
+}
+
+PRONUNCIATION_SCORE: Projection = {"_id": 0, "overall_score": 1}
+
+PRONUNCIATION_HISTORY_ITEM: Projection = {
+    "createdAt": 1,
+    "sound_id": 1,
+    "sound_name": 1,
+    "word": 1,
+    "overall_score": 1,
+    "phoneme_errors_count": _size("phoneme_errors"),
+}
+
+
+# --- speaking -------------------------------------------------------------
+
+SPEAKING_QUESTION: Projection = {
+    "_id": 0,
+    "id": 1,
+    "question": 1,
+    "question_en": 1,
+    "theme": 1,
+    "level": 1,
+    "target_words": 1,
+}
+
+SPEAKING_HISTORY_ITEM: Projection = {
+    "createdAt": 1,
+    "question.text": 1,
+    "analysis.score": 1,
+    "analysis.cefrLevel": 1,
+    "targetWordsCount": _size("targetWords"),
+    "wordsUsedCorrectly": {"$size": {"$filter": {
+        "input": {"$ifNull": ["$analysis.wordUsage", []]},
+        "cond": {"$eq": ["$$this.isUsedCorrectly", True]},
+    }}},
+}
+
+
+# --- tests ----------------------------------------------------------------
+
+TEST_HISTORY_ITEM: Projection = {
+    "level": 1,
+    "score": 1,
+    "totalQuestions": 1,
+    "correctAnswers": 1,
+    "completedAt": 1,
+}
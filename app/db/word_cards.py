@@ -0,0 +1,127 @@
+"""
+Precomputed word cards.
+
+Every card endpoint used to pick the English translation, strip the slashes
+from the IPA transcription and rewrite the audio URLs for each word on each
+request. That work is done once here instead: `word_cards` holds one small
+document per word, keyed by the word's `_id` and indexed by level, and the
+routers read it through the projections in app.db.queries.
+
+Cards are written by the word upload script as it ingests, and can be
+rebuilt from `words` at any time; either way the `word_cards` catalog version
+is bumped so running servers drop what they derived from the old cards:
+
+    python -m app.db.word_cards
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from pymongo import ReplaceOne
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.db.catalog import bump_version
+
+logger = logging.getLogger(__name__)
+
+WORD_CARDS_COLLECTION = "word_cards"
+
+# The fields of a `words` document a card is built from.
+WORD_SOURCE = {
+    "word": 1,
+    "cerf_level": 1,
+    "ipa_transcription": 1,
+    "audio.male": 1,
+    "audio.female": 1,
+    "translations.language_code": 1,
+    "translations.content": 1,
+}
+
+
+def audio_path(url: str) -> str:
+    """Proxied /audio path for a storage URL."""
+    if not url:
+        return ""
+    # Extract filename from URL like https://storage.../hackathon/audio/word_m.mp3
+    filename = url.split("/")[-1] if "/" in url else url
+    return f"/audio/{filename}"
+
+
+def _translation(translations: list) -> str:
+    """The English translation, falling back to whichever comes first."""
+    chosen = next((t for t in translations if t.get("language_code") == "en"), None)
+    if chosen is None and translations:
+        chosen = translations[0]
+    return (chosen or {}).get("content") or ""
+
+
+def build_word_card(doc: dict) -> dict:
+    """The card for one `words` document."""
+    audio = doc.get("audio") or {}
+    return {
+        "_id": doc["_id"],
+        "id": str(doc["_id"]),
+        "level": doc.get("cerf_level"),
+        "word": doc.get("word", ""),
+        "translation": _translation(doc.get("translations") or []),
+        "phonetic": (doc.get("ipa_transcription") or "").replace("/", ""),
+        "audioMale": audio_path(audio.get("male", "")),
+        "audioFemale": audio_path(audio.get("female", "")),
+    }
+
+
+async def upsert_word_cards(db: AsyncDatabase, words: Iterable[dict], built_at: Optional[datetime] = None) -> int:
+    """(Re)write the cards for `words`; returns how many were written."""
+    built_at = built_at or datetime.now(timezone.utc)
+    requests = [
+        ReplaceOne({"_id": doc["_id"]}, {**build_word_card(doc), "built_at": built_at}, upsert=True)
+        for doc in words
+    ]
+    if requests:
+        await db[WORD_CARDS_COLLECTION].bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+async def rebuild_word_cards(db: AsyncDatabase, batch_size: int = 1000) -> int:
+    """Rebuild every card from `words` and drop cards whose word is gone."""
+    built_at = datetime.now(timezone.utc)
+    written = 0
+    batch = []
+    async for doc in db["words"].find({}, WORD_SOURCE):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            written += await upsert_word_cards(db, batch, built_at)
+            batch = []
+    written += await upsert_word_cards(db, batch, built_at)
+    result = await db[WORD_CARDS_COLLECTION].delete_many({"built_at": {"$lt": built_at}})
+    await bump_version(db, WORD_CARDS_COLLECTION)
+    logger.info(f"Rebuilt {written} word cards, removed {result.deleted_count} stale ones")
+    return written
+
+
+async def ensure_word_cards(db: AsyncDatabase) -> None:
+    """Build the cards on first start so a fresh deployment serves words straight away."""
+    if await db[WORD_CARDS_COLLECTION].estimated_document_count() == 0:
+        await rebuild_word_cards(db)
+
+
+async def _main() -> int:
+    from app.db.mongodb import close_mongo_connection, get_database
+
+    db = await get_database()
+    try:
+        written = await rebuild_word_cards(db)
+        print(f"Rebuilt {written} word cards")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Rebuild the word_cards collection from words").parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main()))
@@ -1,27 +1,64 @@
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, Request, status, Header
 from app.models.user import UserInDB
 from app.db.mongodb import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.services.firebase_auth import get_user_by_token
-from typing import List, Optional
+from app.core.cache import SingleFlight, TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.ratelimit import KeyedTokenBucket
+from pymongo.asynchronous.database import AsyncDatabase
+from app.services.firebase_auth import verify_id_token
+from app.services.session_tokens import (
+    InvalidSessionError,
+    is_session_token,
+    user_from_claims,
+    verify_session_token,
+)
+from typing import List, NamedTuple, Optional, Union
+import hashlib
+import ipaddress
+import time
+import jwt
 
-async def get_current_user(
-    authorization: str = Header(..., description="Bearer <token>"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-) -> UserInDB:
-    if not authorization.startswith("Bearer "):
-         raise HTTPException(status_code=401, detail="Invalid authorization header")
-    token = authorization.split(" ")[1]
-    
-    # Verify token with Firebase REST API
-    firebase_user = await get_user_by_token(token)
-    user_id = firebase_user["localId"]
-    
-    # Fetch from MongoDB
-    user_doc = await db["user"].find_one({"_id": user_id})
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found in database")
-        
+class ResolvedUser(NamedTuple):
+    doc: dict
+    user: UserInDB
+
+_UNRESOLVED = object()
+
+# Verified token (by hash) -> uid, valid until the token itself expires.
+token_cache = TTLCache("token_cache", settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+# uid -> ResolvedUser, dropped whenever the user document changes through the API.
+principal_cache = TTLCache("principal_cache", settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+# Parallel requests carrying the same token share one verification + user read.
+auth_flight = SingleFlight("auth_resolve")
+# Recently rejected tokens (by hash) are answered with 401 without asking Firebase.
+rejected_token_cache = TTLCache("rejected_token_cache", settings.AUTH_NEGATIVE_CACHE_SIZE, settings.AUTH_NEGATIVE_CACHE_TTL)
+# Clients that keep presenting bad tokens get 429 before any verification.
+auth_failures = KeyedTokenBucket(settings.AUTH_FAILURE_RATE, settings.AUTH_FAILURE_BURST)
+auth_throttled = metrics.counter("auth_throttled", "Requests refused with 429 after repeated auth failures")
+auth_rejected = metrics.counter("auth_rejected", "Requests refused with 401")
+_trusted_proxies = [ipaddress.ip_network(cidr, strict=False) for cidr in settings.TRUSTED_PROXIES]
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_ttl(token: str, firebase_user: dict) -> float:
+    """Seconds until the token expires, so a cached verification never outlives it."""
+    exp = firebase_user.get("exp")
+    if exp is None:
+        # Remote lookups don't echo the expiry; the token itself was just verified.
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+    if exp is None:
+        return 0
+    return exp - time.time()
+
+
+def user_from_doc(user_doc: dict) -> UserInDB:
     return UserInDB(
         id=user_doc["_id"],
         email=user_doc["email"],
@@ -30,34 +67,173 @@ async def get_current_user(
         created_at=user_doc.get("created_at")
     )
 
+
+def invalidate_user(user_id: str) -> None:
+    """Forget the cached principal after the user's document was changed."""
+    principal_cache.pop(user_id)
+
+
+async def _read_user(user_id: str, db: AsyncDatabase) -> Optional[ResolvedUser]:
+    user_doc = await db["user"].find_one({"_id": user_id})
+    if not user_doc:
+        return None
+    resolved = ResolvedUser(user_doc, user_from_doc(user_doc))
+    principal_cache.set(user_id, resolved)
+    return resolved
+
+
+async def _load_user(token: str, key: str, user_id: Optional[str], db: AsyncDatabase) -> Optional[ResolvedUser]:
+    if user_id is None:
+        firebase_user = await verify_id_token(token)
+        user_id = firebase_user["localId"]
+        token_cache.set(key, user_id, ttl=_token_ttl(token, firebase_user))
+    return await _read_user(user_id, db)
+
+
+async def _resolve_user(token: str, db: AsyncDatabase, ip: str) -> Optional[ResolvedUser]:
+    key = _token_key(token)
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        resolved = principal_cache.get(user_id)
+        if resolved is not None:
+            return resolved
+    elif rejected_token_cache.get(key):
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    elif auth_failures.is_limited(ip):
+        # Only an uncached token costs a verification; cache hits above are never throttled.
+        auth_throttled.inc()
+        raise HTTPException(status_code=429, detail="Too many failed authentication attempts")
+
+    try:
+        return await auth_flight.do(key, lambda: _load_user(token, key, user_id, db))
+    except HTTPException as e:
+        if e.status_code == 401:
+            rejected_token_cache.set(key, True)
+        raise
+
+
+def _trusted_proxy(ip: str) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def _client_ip(request: Request) -> str:
+    """
+    The address the request came from, looking through trusted proxies.
+
+    Behind nginx every peer is the proxy, so X-Forwarded-For is walked from
+    the right (the hop our proxy appended) past any trusted hops. Headers
+    from untrusted peers are ignored, since clients can set them freely.
+    """
+    client = getattr(request, "client", None)
+    if not client:
+        return "unknown"
+    if not _trusted_proxy(client.host):
+        return client.host
+    headers = getattr(request, "headers", None) or {}
+    hops = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else client.host
+
+
+async def _authenticate(token: str, db: AsyncDatabase, ip: str) -> Union[ResolvedUser, UserInDB, None]:
+    if is_session_token(token):
+        # Fast path: our own signed claims, no Firebase and no Mongo.
+        try:
+            claims = verify_session_token(token)
+        except InvalidSessionError:
+            raise HTTPException(status_code=401, detail="Invalid or expired session")
+        return user_from_claims(claims)
+    return await _resolve_user(token, db, ip)
+
+
+async def _resolve_request_user(request: Request, token: str, db: AsyncDatabase) -> Optional[UserInDB]:
+    """Resolve the principal once per request and keep it on request.state."""
+    user = getattr(request.state, "user", _UNRESOLVED)
+    if user is not _UNRESOLVED:
+        return user
+
+    ip = _client_ip(request)
+    try:
+        result = await _authenticate(token, db, ip)
+    except HTTPException as e:
+        if e.status_code == 401:
+            auth_rejected.inc()
+            auth_failures.consume(ip)
+        raise
+
+    if isinstance(result, UserInDB):
+        request.state.user = result
+        return result
+    request.state.user_doc = result.doc if result else None
+    request.state.user = result.user if result else None
+    return request.state.user
+
+
+async def get_current_user(
+    request: Request,
+    authorization: str = Header(..., description="Bearer <token>"),
+    db: AsyncDatabase = Depends(get_database)
+) -> UserInDB:
+    if not authorization.startswith("Bearer "):
+         raise HTTPException(status_code=401, detail="Invalid authorization header")
+    token = authorization.split(" ")[1]
+
+    user = await _resolve_request_user(request, token, db)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found in database")
+    return user
+
 async def get_optional_user(
+    request: Request,
     authorization: Optional[str] = Header(None, description="Bearer <token>"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ) -> Optional[UserInDB]:
     """Get the current user if authenticated, otherwise return None."""
     if not authorization or not authorization.startswith("Bearer "):
         return None
-    
+
     try:
         token = authorization.split(" ")[1]
-        firebase_user = await get_user_by_token(token)
-        user_id = firebase_user["localId"]
-        
-        user_doc = await db["user"].find_one({"_id": user_id})
-        if not user_doc:
-            return None
-            
-        return UserInDB(
-            id=user_doc["_id"],
-            email=user_doc["email"],
-            role=user_doc.get("role", "student_free"),
-            permissions=user_doc.get("permissions", []),
-            created_at=user_doc.get("created_at")
-        )
+        return await _resolve_request_user(request, token, db)
     except Exception:
         return None
 
 
+async def get_current_user_doc(
+    request: Request,
+    user: UserInDB = Depends(get_current_user),
+    db: AsyncDatabase = Depends(get_database)
+) -> dict:
+    """
+    The raw `user` document the principal was resolved from.
+
+    May be shared with the principal cache, so treat it as read-only.
+    """
+    user_doc = await load_user_doc(request, user, db)
+    if user_doc is None:
+        raise HTTPException(status_code=404, detail="User not found in database")
+    return user_doc
+
+
+async def load_user_doc(request: Request, user: UserInDB, db: AsyncDatabase) -> Optional[dict]:
+    """`get_current_user_doc` for handlers that also serve anonymous users; None if missing."""
+    user_doc = getattr(request.state, "user_doc", None)
+    if user_doc is None:
+        # Session-token requests authorize from claims and only read the
+        # document when a handler actually needs it.
+        resolved = principal_cache.get(user.id) or await _read_user(user.id, db)
+        if resolved is None:
+            return None
+        request.state.user_doc = user_doc = resolved.doc
+    return user_doc
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
@@ -1,13 +1,64 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 import logging
 import time
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, words, podcasts, audio, flashcards, speaking, tests, users, pronunciation
-from app.db.mongodb import close_mongo_connection
+from app.db.mongodb import close_mongo_connection, connect_to_mongo, on_connect
+from app.db.catalog import catalogs
+from app.db.indexes import ensure_indexes
+from app.db.word_cards import ensure_word_cards
+from app.db.monitoring import RouteQueriesMiddleware
+from app.services.firebase_auth import token_verifier
 from app.core.config import settings
+from app.core.security import UserRole
+from app.dependencies import RoleChecker
+from app.core.metrics import metrics
+from app.core.compression import CompressionMiddleware
+from app.core.http import open_http_client, close_http_client
+from app.services.session_tokens import revocations, session_signer
+from app.services.progress_buffer import progress_buffer
 
-app = FastAPI()
+async def _start_database_tasks(database):
+    if settings.MONGO_ENSURE_INDEXES:
+        try:
+            await ensure_indexes(database)
+        except Exception as e:
+            logger.error(f"Failed to ensure MongoDB indexes: {e}")
+    try:
+        await ensure_word_cards(database)
+    except Exception as e:
+        logger.error(f"Failed to build word cards: {e}")
+    if session_signer is not None:
+        revocations.start(database, settings.SESSION_REVOCATION_SYNC_INTERVAL)
+    catalogs.start(database, settings.CATALOG_POLL_INTERVAL)
+    progress_buffer.start(database, settings.PROGRESS_FLUSH_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    open_http_client()
+    if token_verifier is not None:
+        token_verifier.keys.start()
+    # Runs as soon as the client exists: now, or when get_database() connects
+    # on a later request if it can't be created yet (e.g. SRV lookup failure).
+    on_connect(_start_database_tasks)
+    try:
+        await connect_to_mongo()
+    except Exception:
+        # get_database() tries again on the first request that needs Mongo.
+        pass
+    yield
+    # Flush buffered writes while Mongo is still connected.
+    await progress_buffer.stop()
+    if token_verifier is not None:
+        await token_verifier.keys.stop()
+    await revocations.stop()
+    await catalogs.stop()
+    await close_http_client()
+    await close_mongo_connection()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure Logging
 logging.basicConfig(
@@ -24,6 +75,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.middleware("http")
@@ -50,6 +102,19 @@ async def log_requests(request: Request, call_next):
         logger.error(f"Request failed: {str(e)}", exc_info=True)
         raise
 
+# Labels by route template, not the raw path, and counts queries made while streaming a body.
+app.add_middleware(RouteQueriesMiddleware, routes=app.router.routes)
+
+# Added last so it wraps everything else and compresses the final body.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    # Audio is already compressed and served with range support.
+    exclude_paths=[r"^/audio/", r"^/podcasts/[^/]+/audio$"],
+)
+
 # Global exception handler to ensure CORS headers are included on errors
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -69,10 +134,11 @@ app.include_router(speaking.router, prefix="/speaking", tags=["speaking"])
 app.include_router(tests.router, prefix="/tests", tags=["tests"])
 app.include_router(pronunciation.router, prefix="/pronunciation", tags=["pronunciation"])
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    await close_mongo_connection()
-
 @app.get("/")
 def read_root():
     return {"message": "Hello from backend!"}
+
+# Auth failures, throttling and per-route query stats are not for the public.
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(RoleChecker([UserRole.ADMIN]))])
+def read_metrics():
+    return metrics.snapshot()
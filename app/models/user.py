@@ -38,3 +38,14 @@ class UserResponse(BaseModel):
 class EmailRequest(BaseModel):
     email: EmailStr
 
+class UserSettings(BaseModel):
+    flashcards_per_session: int = 30
+    word_repetitions: int = 3
+    questions_per_test: int = 20
+    cefr_level: str = "B1"
+
+class UserSettingsUpdate(BaseModel):
+    flashcards_per_session: Optional[int] = None
+    word_repetitions: Optional[int] = None
+    questions_per_test: Optional[int] = None
+    cefr_level: Optional[str] = None
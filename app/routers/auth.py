@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Body
+from typing import Optional
 from app.models.user import UserCreate, UserLogin, FirebaseTokenResponse, FirebaseLoginRequest, EmailRequest
 import logging
 from app.core.security import UserRole, ROLES_PERMISSIONS
@@ -7,17 +8,32 @@ from app.services.firebase_auth import (
     sign_in_with_email, 
     send_password_reset_email,
     send_email_verification,
-    get_user_by_token
+    verify_id_token
 )
 from app.db.mongodb import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.dependencies import invalidate_user, user_from_doc
+from app.services.session_tokens import (
+    InvalidSessionError,
+    is_session_token,
+    revocations,
+    session_signer,
+    verify_session_token,
+)
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def _session_fields(user_doc: dict) -> dict:
+    """Backend session token for the response, when session tokens are enabled."""
+    if session_signer is None:
+        return {}
+    token, expires_at = session_signer.issue(user_from_doc(user_doc))
+    return {"sessionToken": token, "sessionExpiresAt": expires_at}
+
 @router.post("/register", response_model=FirebaseTokenResponse, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def register(user: UserCreate, db: AsyncDatabase = Depends(get_database)):
     # 1. Sign up with Firebase
     firebase_response = await sign_up_with_email(user.email, user.password)
     
@@ -38,6 +54,7 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_data
         {"$set": user_doc}, 
         upsert=True
     )
+    invalidate_user(user_doc["_id"])
     
     return firebase_response
 
@@ -46,11 +63,11 @@ async def login(user: UserLogin):
     return await sign_in_with_email(user.email, user.password)
 
 @router.post("/firebase-login")
-async def firebase_login(request: FirebaseLoginRequest, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def firebase_login(request: FirebaseLoginRequest, db: AsyncDatabase = Depends(get_database)):
     # 1. Verify token with Firebase
     logger.debug(f"Attempting Firebase login with token: {request.idToken[:10]}...")
     try:
-        firebase_user = await get_user_by_token(request.idToken)
+        firebase_user = await verify_id_token(request.idToken)
         logger.debug(f"Firebase user retrieved: {firebase_user.get('email')}")
     except Exception as e:
         logger.error(f"Error validating validation token: {str(e)}", exc_info=True)
@@ -74,9 +91,35 @@ async def firebase_login(request: FirebaseLoginRequest, db: AsyncIOMotorDatabase
             "created_at": datetime.utcnow()
         }
         await db["user"].insert_one(user_doc)
-        return {"message": "User created", "user": user_doc}
+        invalidate_user(user_id)
+        return {"message": "User created", "user": user_doc, **_session_fields(user_doc)}
     
-    return {"message": "Login successful", "user": existing_user}
+    return {"message": "Login successful", "user": existing_user, **_session_fields(existing_user)}
+
+@router.post("/refresh")
+async def refresh_session(
+    authorization: str = Header(..., description="Bearer <session token>"),
+    db: AsyncDatabase = Depends(get_database)
+):
+    """Swap a valid session token for a new one carrying the current role and permissions."""
+    if session_signer is None:
+        raise HTTPException(status_code=404, detail="Session tokens are not enabled")
+    if not authorization.startswith("Bearer "):
+         raise HTTPException(status_code=401, detail="Invalid authorization header")
+    token = authorization.split(" ")[1]
+
+    try:
+        claims = verify_session_token(token)
+    except InvalidSessionError:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+    # Re-read the user so role/permission changes reach the new token.
+    user_doc = await db["user"].find_one({"_id": claims["sub"]})
+    if not user_doc:
+        raise HTTPException(status_code=404, detail="User not found in database")
+
+    await revocations.revoke(db, claims)
+    return _session_fields(user_doc)
 
 @router.post("/recover")
 async def request_password_reset(request: EmailRequest):
@@ -94,6 +137,17 @@ async def verify_user_email(authorization: str = Header(..., description="Bearer
     return {"message": "Verification email sent"}
 
 @router.post("/logout")
-async def logout():
-    # Stateless logout - client discards token
+async def logout(
+    authorization: Optional[str] = Header(None, description="Bearer <token>"),
+    db: AsyncDatabase = Depends(get_database)
+):
+    # Firebase tokens are stateless - the client discards them. Backend
+    # session tokens are revoked so they stop working before they expire.
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ")[1]
+        if is_session_token(token):
+            try:
+                await revocations.revoke(db, verify_session_token(token))
+            except InvalidSessionError:
+                pass
     return {"message": "Logged out successfully"}
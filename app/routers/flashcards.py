@@ -1,98 +1,95 @@
-from fastapi import APIRouter, Depends, Header
-from typing import Optional
-from app.dependencies import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.dependencies import get_optional_user, load_user_doc
+from app.core.responses import FastJSONResponse
+from app.db import queries
+from app.db.card_versions import word_card_versions
 from app.db.mongodb import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models.user import UserInDB
-from app.services.firebase_auth import get_user_by_token
-from pydantic import BaseModel
+from pymongo.asynchronous.database import AsyncDatabase
+from app.models.user import UserInDB, UserSettings
+from app.services import srs
+from app.services.progress_buffer import progress_buffer
 from bson import ObjectId
-import random
+from bson.errors import InvalidId
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
 class FlashcardProgressUpdate(BaseModel):
     current_index: int
+    # Lets a late update be dropped instead of landing on a session started since
+    session_id: Optional[str] = None
 
-async def get_optional_user(
-    authorization: Optional[str] = Header(None),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-) -> Optional[UserInDB]:
-    """Get user if authenticated, otherwise return None for anonymous access."""
-    if not authorization or not authorization.startswith("Bearer "):
+class LevelProgressUpdate(FlashcardProgressUpdate):
+    level: str
+
+class FlashcardProgressBatch(BaseModel):
+    updates: List[LevelProgressUpdate] = Field(..., max_length=100)
+
+class FlashcardReview(BaseModel):
+    word_id: str
+    # SM-2 recall quality: 0-2 forgotten, 3 hard, 4 good, 5 easy
+    grade: int = Field(..., ge=0, le=5)
+
+DEFAULT_SESSION_SIZE = UserSettings().flashcards_per_session
+# The settings endpoint doesn't bound flashcards_per_session, so the pick does.
+MAX_SESSION_SIZE = 200
+
+async def _session_size(request: Request, user: UserInDB, db: AsyncDatabase) -> int:
+    user_doc = await load_user_doc(request, user, db) or {}
+    size = (user_doc.get("settings") or {}).get("flashcards_per_session") or DEFAULT_SESSION_SIZE
+    return max(1, min(int(size), MAX_SESSION_SIZE))
+
+async def _snapshot_cards(db: AsyncDatabase, word_ids: list) -> list:
+    """Session cards in pick order; ids may be strings or ObjectIds."""
+    return await queries.flashcards_by_ids(db, [str(wid) for wid in word_ids], "fr-FR") # Hardcoded for now based on template
+
+def _remap_index(old_word_ids: list, cards: List[dict], index: int) -> int:
+    """Where position `index` in `old_word_ids` lands in `cards`, their surviving subsequence."""
+    kept = {card["id"] for card in cards}
+    moved = sum(1 for word_id in old_word_ids[:index] if str(word_id) in kept)
+    return max(0, min(moved, len(cards) - 1))
+
+def _session_object_id(session_id: Optional[str]) -> Optional[ObjectId]:
+    if session_id is None:
         return None
     try:
-        token = authorization.split(" ")[1]
-        firebase_user = await get_user_by_token(token)
-        user_id = firebase_user["localId"]
-        user_doc = await db["user"].find_one({"_id": user_id})
-        if not user_doc:
-            return None
-        return UserInDB(
-            id=user_doc["_id"],
-            email=user_doc["email"],
-            role=user_doc.get("role", "student_free"),
-            permissions=user_doc.get("permissions", []),
-            created_at=user_doc.get("created_at")
-        )
-    except Exception:
-        return None
+        return ObjectId(session_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid session id")
+
+async def _pick_word_ids(db: AsyncDatabase, level: str, size: int = DEFAULT_SESSION_SIZE) -> list:
+    # Mongo samples the ids; only the picked cards are then read.
+    return await queries.sample_word_ids(db, level, size)
+
+async def _pick_review_word_ids(db: AsyncDatabase, user: UserInDB, level: str, size: int) -> list:
+    # Cards that are due come first; the rest of the session is words the user hasn't seen.
+    due = await srs.due_word_ids(db, user.id, level, datetime.now(timezone.utc), size)
+    if len(due) >= size:
+        return due
+    # Oversample, since some picks may already be scheduled for later.
+    sampled = await _pick_word_ids(db, level, 2 * (size - len(due)))
+    seen = await srs.reviewed_word_ids(db, user.id, sampled) if sampled else set()
+    fresh = [wid for wid in sampled if wid not in seen]
+    return due + fresh[: size - len(due)]
 
 @router.get("/{level}/session")
 async def get_flashcard_session(
     level: str,
+    request: Request,
     user: Optional[UserInDB] = Depends(get_optional_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     # For anonymous users, just return random words without session tracking
     if not user:
-        cursor = db["words"].find({"cerf_level": level})
-        all_words = await cursor.to_list(length=None)
-
-        if not all_words:
-            return {
-                "sessionId": None,
-                "words": [],
-                "currentIndex": 0,
-                "totalWords": 0
-            }
-
-        selected_words = random.sample(all_words, min(len(all_words), 30))
-        formatted_words = []
-        for doc in selected_words:
-            translation = ""
-            translations = doc.get("translations", [])
-            for t in translations:
-                if t.get("language_code") == "en":
-                    translation = t.get("content", "")
-                    break
-            if not translation and translations:
-                translation = translations[0].get("content", "")
-
-            def get_audio_filename(url: str) -> str:
-                if not url:
-                    return ""
-                filename = url.split("/")[-1] if "/" in url else url
-                return f"/audio/{filename}"
-
-            audio = doc.get("audio", {})
-
-            formatted_words.append({
-                "id": str(doc["_id"]),
-                "targetWord": doc.get("word", ""),
-                "translation": translation,
-                "phonetic": doc.get("ipa_transcription", "").replace("/", ""),
-                "language": "de-DE",
-                "audioMale": get_audio_filename(audio.get("male", "")),
-                "audioFemale": get_audio_filename(audio.get("female", "")),
-            })
-
-        return {
+        formatted_words = await queries.flashcards_by_ids(db, await _pick_word_ids(db, level), "de-DE")
+        return FastJSONResponse({
             "sessionId": None,
             "words": formatted_words,
             "currentIndex": 0,
             "totalWords": len(formatted_words)
-        }
+        })
 
     # 1. Check if an active session exists for this user and level
     session = await db["flashcard_sessions"].find_one({
@@ -102,63 +99,42 @@ async def get_flashcard_session(
     })
 
     if session:
-        # Return existing session
-        # We need to fetch the full word details for the word_ids in the session
-        word_ids = session["word_ids"]
-        # Convert string IDs back to ObjectId if necessary, though word_ids in session probably stored as strings or ObjectIds
-        # Assuming stored as strings for simplicity in JSON
-        object_ids = [ObjectId(wid) for wid in word_ids]
-        
-        cursor = db["words"].find({"_id": {"$in": object_ids}})
-        words_data = []
-        async for doc in cursor:
-             # Try to find English translation first
-            translation = ""
-            translations = doc.get("translations", [])
-            for t in translations:
-                if t.get("language_code") == "en":
-                    translation = t.get("content", "")
-                    break
-            if not translation and translations:
-                translation = translations[0].get("content", "")
-            
-            # Helper to format audio path
-            def get_audio_filename(url: str) -> str:
-                if not url:
-                    return ""
-                filename = url.split("/")[-1] if "/" in url else url
-                return f"/audio/{filename}"
-
-            audio = doc.get("audio", {})
-
-            words_data.append({
-                "id": str(doc["_id"]),
-                "targetWord": doc.get("word", ""),
-                "translation": translation,
-                "phonetic": doc.get("ipa_transcription", "").replace("/", ""),
-                "language": "fr-FR", # Hardcoded for now based on template, or derive from doc
-                "audioMale": get_audio_filename(audio.get("male", "")),
-                "audioFemale": get_audio_filename(audio.get("female", "")),
-            })
-        
-        # Sort words_data to match the order in word_ids (optional but good for consistency if order matters)
-        # For random flashcards, order in `word_ids` might be the specific random order
-        words_map = {w["id"]: w for w in words_data}
-        ordered_words = [words_map[wid] for wid in word_ids if wid in words_map]
-
-        return {
+        # The cards were snapshotted when the session was created; they're only
+        # re-read if the level's cards have changed since (or for older sessions).
+        ordered_words = session.get("cards")
+        # A position still waiting in the write-behind buffer is newer than the stored one.
+        current_index = progress_buffer.pending(user.id, level, session["_id"])
+        if current_index is None:
+            current_index = session.get("current_index", 0)
+        version = (await word_card_versions.get(db)).get(level)
+        if ordered_words is None or session.get("catalog_version") != version:
+            ordered_words = await _snapshot_cards(db, session["word_ids"])
+            # Cards that are gone drop out, so the position moves with the card it pointed at
+            current_index = _remap_index(session["word_ids"], ordered_words, current_index)
+            await db["flashcard_sessions"].update_one(
+                {"_id": session["_id"]},
+                {"$set": {
+                    "cards": ordered_words,
+                    "catalog_version": version,
+                    "word_ids": [ObjectId(card["id"]) for card in ordered_words],
+                    "current_index": current_index,
+                }}
+            )
+            # The buffered position indexes the old list; the remapped one is written above
+            progress_buffer.discard(user.id, level)
+
+        return FastJSONResponse({
             "sessionId": str(session["_id"]),
             "words": ordered_words,
-            "currentIndex": session.get("current_index", 0),
+            "currentIndex": current_index,
             "totalWords": len(ordered_words)
-        }
+        })
 
     # 2. If no session, create a new one
-    # Fetch all words for the level
-    cursor = db["words"].find({"cerf_level": level})
-    all_words = await cursor.to_list(length=None)
-    
-    if not all_words:
+    # Due reviews, topped up with new words, as many as the user's settings ask for
+    selected_word_ids = await _pick_review_word_ids(db, user, level, await _session_size(request, user, db))
+
+    if not selected_word_ids:
         # If no words found for this level
          return {
             "sessionId": None,
@@ -167,90 +143,103 @@ async def get_flashcard_session(
             "totalWords": 0
         }
 
-    # Select random 30 words (or less if not enough words)
-    selected_words = random.sample(all_words, min(len(all_words), 30))
-    selected_word_ids = [str(w["_id"]) for w in selected_words]
+    # Format words for frontend, once: resuming reads them back from the session
+    formatted_words = await _snapshot_cards(db, selected_word_ids)
 
     new_session = {
         "user_id": user.id,
         "level": level,
-        "word_ids": selected_word_ids,
+        "word_ids": [ObjectId(card["id"]) for card in formatted_words],
+        "cards": formatted_words,
+        "catalog_version": (await word_card_versions.get(db)).get(level),
         "current_index": 0,
         "is_active": True,
         # created_at...
     }
     
     result = await db["flashcard_sessions"].insert_one(new_session)
-    
-    # Format words for frontend
-    formatted_words = []
-    for doc in selected_words:
-        translation = ""
-        translations = doc.get("translations", [])
-        for t in translations:
-            if t.get("language_code") == "en":
-                translation = t.get("content", "")
-                break
-        if not translation and translations:
-            translation = translations[0].get("content", "")
-
-        def get_audio_filename(url: str) -> str:
-            if not url:
-                return ""
-            filename = url.split("/")[-1] if "/" in url else url
-            return f"/audio/{filename}"
-        
-        audio = doc.get("audio", {})
 
-        formatted_words.append({
-            "id": str(doc["_id"]),
-            "targetWord": doc.get("word", ""),
-            "translation": translation,
-            "phonetic": doc.get("ipa_transcription", "").replace("/", ""),
-            "language": "fr-FR", 
-            "audioMale": get_audio_filename(audio.get("male", "")),
-            "audioFemale": get_audio_filename(audio.get("female", "")),
-        })
-
-    return {
+    return FastJSONResponse({
         "sessionId": str(result.inserted_id),
         "words": formatted_words,
         "currentIndex": 0,
         "totalWords": len(formatted_words)
-    }
+    })
 
 @router.post("/{level}/progress")
 async def update_flashcard_progress(
     level: str,
     progress: FlashcardProgressUpdate,
     user: Optional[UserInDB] = Depends(get_optional_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     # Anonymous users can't save progress
     if not user:
         return {"status": "success", "note": "anonymous"}
 
-    # Update the active session for this user and level
-    await db["flashcard_sessions"].update_one(
-        {
-            "user_id": user.id,
-            "level": level,
-            "is_active": True
-        },
-        {"$set": {"current_index": progress.current_index}}
+    # Buffered and coalesced per (user, level); written to the active session in batches
+    await progress_buffer.record(
+        db, user.id, level, progress.current_index, _session_object_id(progress.session_id)
     )
     return {"status": "success"}
 
+@router.post("/progress")
+async def update_flashcard_progress_batch(
+    batch: FlashcardProgressBatch,
+    user: Optional[UserInDB] = Depends(get_optional_user),
+    db: AsyncDatabase = Depends(get_database)
+):
+    """Several positions in one request, for clients that debounce card flips."""
+    if not user:
+        return {"status": "success", "note": "anonymous"}
+
+    for update in batch.updates:
+        await progress_buffer.record(
+            db, user.id, update.level, update.current_index, _session_object_id(update.session_id)
+        )
+    return {"status": "success"}
+
+@router.post("/{level}/review")
+async def review_flashcard(
+    level: str,
+    review: FlashcardReview,
+    user: Optional[UserInDB] = Depends(get_optional_user),
+    db: AsyncDatabase = Depends(get_database)
+):
+    # Anonymous users have no review schedule
+    if not user:
+        return {"status": "success", "note": "anonymous"}
+
+    try:
+        word_id = ObjectId(review.word_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid word id")
+    # Reviews are upserted, so an unknown id would otherwise get a schedule of its own
+    if not await queries.word_at_level(db, word_id, level):
+        raise HTTPException(status_code=404, detail="Word not found at this level")
+
+    state = await srs.record_review(db, user.id, word_id, level, review.grade, datetime.now(timezone.utc))
+    return FastJSONResponse({
+        "wordId": review.word_id,
+        "dueAt": state["due_at"],
+        "interval": state["interval"],
+        "ease": state["ease"],
+        "repetitions": state["reps"],
+    })
+
 @router.post("/{level}/reset")
 async def reset_flashcard_session(
     level: str,
     user: Optional[UserInDB] = Depends(get_optional_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     # Anonymous users don't have sessions to reset
     if not user:
         return {"status": "success", "note": "anonymous"}
 
+    # A buffered position belongs to the session being reset
+    progress_buffer.discard(user.id, level)
+
     # Deactivate current session so next fetch creates a new one
     await db["flashcard_sessions"].update_many(
         {
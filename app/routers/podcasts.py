@@ -1,6 +1,6 @@
 """Podcast API router for German language learning podcasts."""
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime
@@ -8,6 +8,9 @@ from bson import ObjectId
 import logging
 import httpx
 
+from app.core.etag import STATIC, content_etag, not_modified, tag
+from app.core.responses import FastJSONResponse
+from app.db import queries
 from app.db.mongodb import get_database
 from app.core.config import settings
 from app.models.podcast import (
@@ -25,16 +28,30 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+CEFR_LEVELS = [level.value for level in CEFRLevel]
+# Both lists are compiled in, so their tags are fixed for the process.
+CONTEXTS_ETAG = content_etag("podcast-contexts", PODCAST_CONTEXTS)
+LEVELS_ETAG = content_etag("podcast-levels", CEFR_LEVELS)
+
+
 @router.get("/contexts", response_model=List[str])
-async def get_podcast_contexts():
+async def get_podcast_contexts(request: Request, response: Response):
     """Get available context options for podcast generation."""
+    cached = not_modified(request, CONTEXTS_ETAG, STATIC)
+    if cached:
+        return cached
+    tag(response, CONTEXTS_ETAG, STATIC)
     return PODCAST_CONTEXTS
 
 
 @router.get("/levels", response_model=List[str])
-async def get_cefr_levels():
+async def get_cefr_levels(request: Request, response: Response):
     """Get available CEFR levels."""
-    return [level.value for level in CEFRLevel]
+    cached = not_modified(request, LEVELS_ETAG, STATIC)
+    if cached:
+        return cached
+    tag(response, LEVELS_ETAG, STATIC)
+    return CEFR_LEVELS
 
 
 @router.get("/voices", response_model=List[VoiceOption])
@@ -74,21 +91,21 @@ async def list_podcasts(
     if context:
         query["context"] = context
 
-    cursor = collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
+    cursor = collection.find(query, queries.PODCAST_LIST_ITEM).sort("created_at", -1).skip(skip).limit(limit)
     podcasts = await cursor.to_list(length=limit)
 
-    return [
-        PodcastListItem(
-            id=str(p["_id"]),
-            title=p["title"],
-            cefr_level=p["cefr_level"],
-            context=p["context"],
-            duration=p.get("duration"),
-            audio_url=str(request.url_for("get_podcast_audio", podcast_id=str(p["_id"]))),
-            created_at=p["created_at"]
-        )
+    return FastJSONResponse([
+        {
+            "id": str(p["_id"]),
+            "title": p["title"],
+            "cefr_level": p["cefr_level"],
+            "context": p["context"],
+            "duration": p.get("duration"),
+            "audio_url": str(request.url_for("get_podcast_audio", podcast_id=str(p["_id"]))),
+            "created_at": p["created_at"],
+        }
         for p in podcasts
-    ]
+    ])
 
 
 @router.get("/{podcast_id}", response_model=PodcastResponse)
@@ -205,7 +222,7 @@ async def get_podcast_audio(podcast_id: str):
     collection = db.podcasts
 
     try:
-        podcast = await collection.find_one({"_id": ObjectId(podcast_id)})
+        podcast = await collection.find_one({"_id": ObjectId(podcast_id)}, queries.PODCAST_AUDIO)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid podcast ID format")
 
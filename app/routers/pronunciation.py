@@ -1,12 +1,18 @@
 """Pronunciation practice endpoints for German language learning."""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
 import logging
 
+from app.core.config import settings
+from app.core.etag import CATALOG, PRIVATE, content_etag, not_modified, tag
+from app.core.responses import FastJSONResponse
+from app.db import queries
+from app.db.catalog import Catalog, catalogs
+from app.db.loaders import Loaders, get_loaders
 from app.db.mongodb import get_database
 from app.dependencies import get_current_user, get_optional_user
 from app.models.user import UserInDB
@@ -30,7 +36,7 @@ router = APIRouter()
 
 
 async def _get_user_progress(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     user_id: str,
     sound_id: str
 ) -> Optional[UserProgress]:
@@ -38,8 +44,12 @@ async def _get_user_progress(
     doc = await db["user_pronunciation_progress"].find_one({
         "userId": user_id,
         "sound_id": sound_id
-    })
+    }, queries.PRONUNCIATION_PROGRESS)
 
+    return _progress_from_doc(doc)
+
+
+def _progress_from_doc(doc: Optional[dict]) -> Optional[UserProgress]:
     if not doc:
         return None
 
@@ -53,7 +63,7 @@ async def _get_user_progress(
 
 
 async def _update_user_progress(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     user_id: str,
     sound_id: str,
     score: float
@@ -62,7 +72,7 @@ async def _update_user_progress(
     existing = await db["user_pronunciation_progress"].find_one({
         "userId": user_id,
         "sound_id": sound_id
-    })
+    }, queries.PRONUNCIATION_PROGRESS)
 
     if existing:
         # Update existing progress
@@ -102,11 +112,41 @@ async def _update_user_progress(
         })
 
 
+def _module_summary(doc: dict, progress: Optional[UserProgress]) -> PronunciationModuleSummary:
+    return PronunciationModuleSummary(
+        id=str(doc["_id"]),
+        sound_id=doc["sound_id"],
+        phoneme_ipa=doc["phoneme_ipa"],
+        name=doc["name"],
+        description=doc["description"],
+        articulatory_tip=doc["articulatory_tip"],
+        difficulty_level=DifficultyLevel(doc.get("difficulty_level", "intermediate")),
+        exercises_count=doc["exercises_count"],
+        user_progress=progress
+    )
+
+
+async def _build_module_summaries(db: AsyncDatabase) -> List[dict]:
+    cursor = db["pronunciation_modules"].find({}, queries.MODULE_SUMMARY).sort([
+        ("difficulty_level", 1),
+        ("name", 1)
+    ])
+    return await cursor.to_list(length=None)
+
+
+module_summaries = catalogs.register(Catalog(
+    "pronunciation_modules", "pronunciation_modules", _build_module_summaries, settings.CATALOG_MAX_AGE
+))
+
+
 @router.get("/modules", response_model=List[PronunciationModuleSummary])
 async def get_pronunciation_modules(
+    request: Request,
+    response: Response,
     user: Optional[UserInDB] = Depends(get_optional_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
-    difficulty: Optional[str] = Query(None, description="Filter by difficulty level")
+    db: AsyncDatabase = Depends(get_database),
+    difficulty: Optional[str] = Query(None, description="Filter by difficulty level"),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """
     Get all available pronunciation modules with user progress.
@@ -114,35 +154,29 @@ async def get_pronunciation_modules(
     Returns a list of modules grouped by difficulty level.
     """
     try:
-        query = {}
+        docs, version = await module_summaries.get_tagged(db)
         if difficulty:
-            query["difficulty_level"] = difficulty
-
-        cursor = db["pronunciation_modules"].find(query).sort([
-            ("difficulty_level", 1),
-            ("name", 1)
-        ])
+            docs = [doc for doc in docs if doc.get("difficulty_level") == difficulty]
 
-        modules = []
-        async for doc in cursor:
-            # Get user progress if authenticated
-            progress = None
-            if user:
-                progress = await _get_user_progress(db, user.id, doc["sound_id"])
-
-            modules.append(PronunciationModuleSummary(
-                id=str(doc["_id"]),
-                sound_id=doc["sound_id"],
-                phoneme_ipa=doc["phoneme_ipa"],
-                name=doc["name"],
-                description=doc["description"],
-                articulatory_tip=doc["articulatory_tip"],
-                difficulty_level=DifficultyLevel(doc.get("difficulty_level", "intermediate")),
-                exercises_count=len(doc.get("exercises", [])),
-                user_progress=progress
-            ))
-
-        return modules
+        # Get user progress if authenticated, for every module in one query
+        progress_docs = [None] * len(docs)
+        if user:
+            progress_docs = await loaders.pronunciation_progress(user.id).load_many(
+                doc["sound_id"] for doc in docs
+            )
+            # Progress is per user, so it is part of the tag and only saves the transfer.
+            etag, policy = content_etag(version, difficulty, progress_docs), PRIVATE
+        else:
+            etag, policy = content_etag(version, difficulty), CATALOG
+        cached = not_modified(request, etag, policy)
+        if cached:
+            return cached
+        tag(response, etag, policy)
+
+        return [
+            _module_summary(doc, _progress_from_doc(progress))
+            for doc, progress in zip(docs, progress_docs)
+        ]
 
     except Exception as e:
         logger.error(f"Failed to fetch pronunciation modules: {e}")
@@ -153,7 +187,7 @@ async def get_pronunciation_modules(
 async def get_pronunciation_module(
     sound_id: str,
     user: Optional[UserInDB] = Depends(get_optional_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get a specific pronunciation module with all exercises.
@@ -205,7 +239,7 @@ async def get_exercise_with_benchmark(
     sound_id: str,
     index: int,
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get a specific exercise with benchmark audio.
@@ -213,16 +247,19 @@ async def get_exercise_with_benchmark(
     Generates TTS audio if not already cached.
     """
     try:
-        doc = await db["pronunciation_modules"].find_one({"sound_id": sound_id})
+        if index < 0:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+
+        doc = await db["pronunciation_modules"].find_one({"sound_id": sound_id}, queries.module_exercise(index))
 
         if not doc:
             raise HTTPException(status_code=404, detail="Module not found")
 
         exercises = doc.get("exercises", [])
-        if index < 0 or index >= len(exercises):
+        if not exercises:
             raise HTTPException(status_code=404, detail="Exercise not found")
 
-        exercise = exercises[index]
+        exercise = exercises[0]
         audio_url = exercise.get("audio_url")
 
         # Generate benchmark audio if not cached
@@ -249,6 +286,7 @@ async def get_exercise_with_benchmark(
                 "sound_id": sound_id,
                 "exercise_index": index
             },
+            queries.PRONUNCIATION_SCORE,
             sort=[("overall_score", -1)]
         )
         if best_session:
@@ -279,7 +317,7 @@ async def analyze_pronunciation(
     sound_id: str = Form(..., description="Sound module ID"),
     exercise_index: int = Form(..., description="Index of the exercise in the module"),
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Analyze user's pronunciation attempt.
@@ -294,15 +332,20 @@ async def analyze_pronunciation(
     """
     try:
         # 1. Get the module and exercise
-        module_doc = await db["pronunciation_modules"].find_one({"sound_id": sound_id})
+        if exercise_index < 0:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+
+        module_doc = await db["pronunciation_modules"].find_one(
+            {"sound_id": sound_id}, queries.module_exercise(exercise_index)
+        )
         if not module_doc:
             raise HTTPException(status_code=404, detail="Module not found")
 
         exercises = module_doc.get("exercises", [])
-        if exercise_index < 0 or exercise_index >= len(exercises):
+        if not exercises:
             raise HTTPException(status_code=404, detail="Exercise not found")
 
-        exercise = exercises[exercise_index]
+        exercise = exercises[0]
 
         # 2. Read and validate audio
         audio_bytes = await audio.read()
@@ -391,7 +434,7 @@ async def analyze_pronunciation(
 @router.get("/history", response_model=List[PronunciationHistoryItem])
 async def get_pronunciation_history(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     sound_id: Optional[str] = Query(None, description="Filter by sound module")
@@ -406,23 +449,23 @@ async def get_pronunciation_history(
         if sound_id:
             query["sound_id"] = sound_id
 
-        cursor = db["pronunciation_sessions"].find(query).sort(
+        cursor = db["pronunciation_sessions"].find(query, queries.PRONUNCIATION_HISTORY_ITEM).sort(
             "createdAt", -1
         ).skip(skip).limit(limit)
 
         history = []
         async for doc in cursor:
-            history.append(PronunciationHistoryItem(
-                id=str(doc["_id"]),
-                created_at=doc["createdAt"],
-                sound_id=doc["sound_id"],
-                sound_name=doc.get("sound_name", doc["sound_id"]),
-                word=doc["word"],
-                score=doc["overall_score"],
-                phoneme_errors_count=len(doc.get("phoneme_errors", []))
-            ))
-
-        return history
+            history.append({
+                "id": str(doc["_id"]),
+                "created_at": doc["createdAt"],
+                "sound_id": doc["sound_id"],
+                "sound_name": doc.get("sound_name", doc["sound_id"]),
+                "word": doc["word"],
+                "score": float(doc["overall_score"]),
+                "phoneme_errors_count": doc["phoneme_errors_count"]
+            })
+
+        return FastJSONResponse(history)
 
     except Exception as e:
         logger.error(f"Failed to fetch pronunciation history: {e}")
@@ -432,7 +475,7 @@ async def get_pronunciation_history(
 @router.get("/stats", response_model=PronunciationStats)
 async def get_pronunciation_stats(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get user's overall pronunciation statistics.
@@ -449,7 +492,8 @@ async def get_pronunciation_stats(
             }}
         ]
 
-        result = await db["pronunciation_sessions"].aggregate(pipeline).to_list(1)
+        cursor = await db["pronunciation_sessions"].aggregate(pipeline)
+        result = await cursor.to_list(1)
 
         if not result:
             return PronunciationStats()
@@ -457,7 +501,7 @@ async def get_pronunciation_stats(
         stats = result[0]
 
         # Get progress per sound
-        progress_cursor = db["user_pronunciation_progress"].find({"userId": user.id})
+        progress_cursor = db["user_pronunciation_progress"].find({"userId": user.id}, queries.PRONUNCIATION_PROGRESS)
         weak_sounds = []
         strong_sounds = []
         modules_mastered = 0
@@ -486,8 +530,9 @@ async def get_pronunciation_stats(
 @router.get("/recommended", response_model=List[PronunciationModuleSummary])
 async def get_recommended_modules(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
-    limit: int = Query(3, ge=1, le=10)
+    db: AsyncDatabase = Depends(get_database),
+    limit: int = Query(3, ge=1, le=10),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """
     Get recommended modules based on user's weak areas and progress.
@@ -498,17 +543,14 @@ async def get_recommended_modules(
     3. Modules not practiced recently
     """
     try:
-        # Get user's progress per sound
-        progress_map = {}
-        async for doc in db["user_pronunciation_progress"].find({"userId": user.id}):
-            progress_map[doc["sound_id"]] = doc
+        # Get all modules, then the user's progress for them in one query
+        docs = await db["pronunciation_modules"].find({}, queries.MODULE_SUMMARY).to_list(length=None)
+        progress_docs = await loaders.pronunciation_progress(user.id).load_many(
+            doc["sound_id"] for doc in docs
+        )
 
-        # Get all modules
         all_modules = []
-        async for doc in db["pronunciation_modules"].find():
-            sound_id = doc["sound_id"]
-            progress = progress_map.get(sound_id)
-
+        for doc, progress in zip(docs, progress_docs):
             # Calculate priority score (lower = recommend first)
             if not progress:
                 priority = 0  # New modules first
@@ -519,27 +561,7 @@ async def get_recommended_modules(
             else:
                 priority = 3  # Mastered
 
-            user_progress = None
-            if progress:
-                user_progress = UserProgress(
-                    total_attempts=progress.get("total_attempts", 0),
-                    average_score=progress.get("average_score", 0.0),
-                    best_score=progress.get("best_score", 0.0),
-                    last_practiced=progress.get("last_practiced"),
-                    mastery_level=MasteryLevel(progress.get("mastery_level", "new"))
-                )
-
-            all_modules.append((priority, PronunciationModuleSummary(
-                id=str(doc["_id"]),
-                sound_id=doc["sound_id"],
-                phoneme_ipa=doc["phoneme_ipa"],
-                name=doc["name"],
-                description=doc["description"],
-                articulatory_tip=doc["articulatory_tip"],
-                difficulty_level=DifficultyLevel(doc.get("difficulty_level", "intermediate")),
-                exercises_count=len(doc.get("exercises", [])),
-                user_progress=user_progress
-            )))
+            all_modules.append((priority, _module_summary(doc, _progress_from_doc(progress))))
 
         # Sort by priority and return top N
         all_modules.sort(key=lambda x: x[0])
@@ -552,13 +574,22 @@ async def get_recommended_modules(
 
 @router.get("/difficulty-levels", response_model=List[str])
 async def get_difficulty_levels(
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    request: Request,
+    response: Response,
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get available difficulty levels.
     """
     try:
-        levels = await db["pronunciation_modules"].distinct("difficulty_level")
+        docs, version = await module_summaries.get_tagged(db)
+        etag = content_etag(version, "difficulty-levels")
+        cached = not_modified(request, etag, CATALOG)
+        if cached:
+            return cached
+        tag(response, etag, CATALOG)
+
+        levels = {doc.get("difficulty_level") for doc in docs}
         # Sort by order
         order = ["beginner", "intermediate", "advanced"]
         return [l for l in order if l in levels]
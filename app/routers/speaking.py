@@ -1,12 +1,17 @@
 """Speaking practice endpoints for language learning."""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from typing import List
 import json
 import logging
 
+from app.core.config import settings
+from app.core.etag import PRIVATE, content_etag, not_modified, tag
+from app.core.responses import FastJSONResponse
+from app.db import queries
+from app.db.catalog import Catalog, catalogs
 from app.db.mongodb import get_database
 from app.dependencies import get_current_user
 from app.models.user import UserInDB
@@ -16,7 +21,6 @@ from app.models.speaking import (
     AudioMetadata,
     PracticeSessionResponse,
     SpeakingSessionResponse,
-    SpeakingHistoryItem,
     SpeakingHistoryResponse,
     SpeakingQuestionResponse,
 )
@@ -30,7 +34,7 @@ router = APIRouter()
 @router.get("/questions/random", response_model=SpeakingQuestionResponse)
 async def get_random_question(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     theme: str = None,
     level: str = None
 ):
@@ -54,8 +58,9 @@ async def get_random_question(
         
         # Get random question
         pipeline.append({"$sample": {"size": 1}})
+        pipeline.append({"$project": queries.SPEAKING_QUESTION})
         
-        cursor = db["speaking_questions"].aggregate(pipeline)
+        cursor = await db["speaking_questions"].aggregate(pipeline)
         question = None
         
         async for doc in cursor:
@@ -84,10 +89,32 @@ async def get_random_question(
         raise HTTPException(status_code=500, detail="Failed to fetch random question")
 
 
+async def _build_themes(db: AsyncDatabase) -> dict:
+    """Sorted themes overall and per level."""
+    pipeline = [{"$group": {"_id": {"level": "$level", "theme": "$theme"}}}]
+    cursor = await db["speaking_questions"].aggregate(pipeline)
+    by_level = {}
+    async for doc in cursor:
+        theme = doc["_id"].get("theme")
+        if theme is not None:
+            by_level.setdefault(doc["_id"].get("level"), set()).add(theme)
+    return {
+        "all": sorted(set().union(*by_level.values())),
+        "by_level": {level: sorted(themes) for level, themes in by_level.items() if level},
+    }
+
+
+speaking_themes = catalogs.register(Catalog(
+    "speaking_themes", "speaking_questions", _build_themes, settings.CATALOG_MAX_AGE
+))
+
+
 @router.get("/questions/themes", response_model=List[str])
 async def get_available_themes(
+    request: Request,
+    response: Response,
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     level: str = None
 ):
     """
@@ -95,18 +122,16 @@ async def get_available_themes(
     Optionally filter by level (A1, A2, B1, etc.).
     """
     try:
+        themes, version = await speaking_themes.get_tagged(db)
+        etag = content_etag(version, level.upper() if level else None)
+        cached = not_modified(request, etag, PRIVATE)
+        if cached:
+            return cached
+        tag(response, etag, PRIVATE)
+
         if level:
-            # Get themes for a specific level
-            pipeline = [
-                {"$match": {"level": level.upper()}},
-                {"$group": {"_id": "$theme"}},
-                {"$sort": {"_id": 1}}
-            ]
-            cursor = db["speaking_questions"].aggregate(pipeline)
-            themes = [doc["_id"] async for doc in cursor]
-        else:
-            themes = await db["speaking_questions"].distinct("theme")
-        return sorted(themes)
+            return themes["by_level"].get(level.upper(), [])
+        return themes["all"]
     except Exception as e:
         logger.error(f"Failed to fetch themes: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch themes")
@@ -115,7 +140,7 @@ async def get_available_themes(
 @router.get("/questions/levels", response_model=List[str])
 async def get_available_levels(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get a list of all available CEFR levels.
@@ -133,7 +158,7 @@ async def get_available_levels(
 @router.get("/practice", response_model=PracticeSessionResponse)
 async def get_practice_session(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     theme: str = None,
     level: str = None
 ):
@@ -154,8 +179,9 @@ async def get_practice_session(
         if match_conditions:
             pipeline.append({"$match": match_conditions})
         pipeline.append({"$sample": {"size": 1}})
+        pipeline.append({"$project": queries.SPEAKING_QUESTION})
         
-        cursor = db["speaking_questions"].aggregate(pipeline)
+        cursor = await db["speaking_questions"].aggregate(pipeline)
         db_question = None
         
         async for doc in cursor:
@@ -203,35 +229,9 @@ async def get_practice_session(
         # Fallback: Fetch random words and generate a question if no questions in DB
         logger.warning("No questions in database, falling back to word-based generation")
         
-        word_pipeline = [
-            {"$sample": {"size": 5}},
-            {"$limit": 5}
-        ]
-        
-        cursor = db["words"].aggregate(word_pipeline)
-        words = []
-        word_dicts = []
-        
-        async for doc in cursor:
-            translation = ""
-            translations = doc.get("translations", [])
-            for t in translations:
-                if t.get("language_code") == "en":
-                    translation = t.get("content", "")
-                    break
-            if not translation and translations:
-                translation = translations[0].get("content", "")
-            
-            word_text = doc.get("word", "")
-            words.append(TargetWord(
-                wordId=str(doc["_id"]),
-                word=word_text,
-                translation=translation
-            ))
-            word_dicts.append({
-                "word": word_text,
-                "translation": translation
-            })
+        target_words = await queries.sample_target_words(db, 5)
+        words = [TargetWord(**doc) for doc in target_words]
+        word_dicts = [{"word": doc["word"], "translation": doc["translation"]} for doc in target_words]
         
         if len(words) < 3:
             raise HTTPException(
@@ -265,7 +265,7 @@ async def analyze_speaking(
     questionText: str = Form(..., description="The question that was asked"),
     targetWords: str = Form(..., description="JSON array of target words"),
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Process and analyze a speaking practice submission.
@@ -370,7 +370,7 @@ async def analyze_speaking(
 @router.get("/history", response_model=SpeakingHistoryResponse)
 async def get_speaking_history(
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     skip: int = 0,
     limit: int = 20
 ):
@@ -385,29 +385,25 @@ async def get_speaking_history(
         
         # Fetch sessions sorted by createdAt descending
         cursor = db["speaking_sessions"].find(
-            {"userId": user.id}
+            {"userId": user.id}, queries.SPEAKING_HISTORY_ITEM
         ).sort("createdAt", -1).skip(skip).limit(limit)
         
         sessions = []
         async for doc in cursor:
-            # Count words used correctly
-            word_usage = doc.get("analysis", {}).get("wordUsage", [])
-            words_used_correctly = sum(1 for w in word_usage if w.get("isUsedCorrectly", False))
-            
-            sessions.append(SpeakingHistoryItem(
-                id=str(doc["_id"]),
-                createdAt=doc.get("createdAt", datetime.utcnow()),
-                questionText=doc.get("question", {}).get("text", ""),
-                score=doc.get("analysis", {}).get("score", 0),
-                cefrLevel=doc.get("analysis", {}).get("cefrLevel", "A1"),
-                targetWordsCount=len(doc.get("targetWords", [])),
-                wordsUsedCorrectly=words_used_correctly
-            ))
-        
-        return SpeakingHistoryResponse(
-            sessions=sessions,
-            total=total
-        )
+            sessions.append({
+                "id": str(doc["_id"]),
+                "createdAt": doc.get("createdAt", datetime.utcnow()),
+                "questionText": doc.get("question", {}).get("text", ""),
+                "score": int(doc.get("analysis", {}).get("score", 0)),
+                "cefrLevel": doc.get("analysis", {}).get("cefrLevel", "A1"),
+                "targetWordsCount": doc["targetWordsCount"],
+                "wordsUsedCorrectly": doc["wordsUsedCorrectly"]
+            })
+        
+        return FastJSONResponse({
+            "sessions": sessions,
+            "total": total
+        })
         
     except Exception as e:
         logger.error(f"Failed to fetch speaking history: {e}")
@@ -418,7 +414,7 @@ async def get_speaking_history(
 async def get_speaking_session(
     session_id: str,
     user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get details of a specific speaking session.
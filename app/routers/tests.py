@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from bson import ObjectId
 from datetime import datetime
 from typing import List, Optional
 
+from app.core.responses import FastJSONResponse
 from app.db.mongodb import get_database
+from app.db import queries
+from app.db.indexes import HAS_TESTS
+from app.db.loaders import Loaders, get_loaders
 from app.dependencies import get_current_user, get_optional_user
 from app.models.user import UserInDB
 from app.models.test import (
-    TestQuestion,
     TestSession,
     TestLevelInfo,
     TestSubmission,
@@ -23,7 +26,7 @@ QUESTIONS_PER_TEST = 20
 
 @router.get("/debug")
 async def debug_words_structure(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
 ):
     """Debug endpoint to check words collection structure."""
     # Get a sample word document
@@ -55,14 +58,17 @@ async def debug_words_structure(
 
 @router.get("/levels", response_model=List[TestLevelInfo])
 async def get_test_levels(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     user: Optional[UserInDB] = Depends(get_optional_user),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """Get available CEFR levels with test question counts and user's best scores."""
     
     # Aggregate words by cerf_level that have test questions
     pipeline = [
-        {"$match": {"tests": {"$exists": True, "$type": "array", "$ne": []}}},
+        {"$match": HAS_TESTS},
+        # Walk the partial cerf_level index instead of scanning the collection.
+        {"$sort": {"cerf_level": 1}},
         {"$unwind": "$tests"},
         {
             "$group": {
@@ -73,7 +79,7 @@ async def get_test_levels(
         {"$sort": {"_id": 1}}
     ]
     
-    cursor = db["words"].aggregate(pipeline)
+    cursor = await db["words"].aggregate(pipeline)
     levels = []
     
     async for doc in cursor:
@@ -97,22 +103,13 @@ async def get_test_levels(
         )
         levels.append(level_info)
     
-    # If user is authenticated, get their best scores
+    # If user is authenticated, get their best scores and attempts in one query
     if user:
-        for level_info in levels:
-            # Get best score for this level
-            best_result = await db["test_results"].find_one(
-                {"userId": user.id, "level": level_info.level},
-                sort=[("score", -1)]
-            )
-            if best_result:
-                level_info.best_score = best_result.get("score")
-            
-            # Count attempts
-            attempts = await db["test_results"].count_documents(
-                {"userId": user.id, "level": level_info.level}
-            )
-            level_info.attempts = attempts
+        stats = await loaders.test_level_stats(user.id).load_many(l.level for l in levels)
+        for level_info, level_stats in zip(levels, stats):
+            if level_stats:
+                level_info.best_score = level_stats["best_score"]
+                level_info.attempts = level_stats["attempts"]
     
     return levels
 
@@ -120,7 +117,7 @@ async def get_test_levels(
 @router.get("/{level}/start", response_model=TestSession)
 async def start_test(
     level: str,
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
 ):
     """Start a new test session for a specific CEFR level with 20 random questions."""
     
@@ -128,7 +125,7 @@ async def start_test(
     # Options are stored as [{text: "...", is_correct: true/false}, ...] 
     # We need to extract just the text values
     pipeline = [
-        {"$match": {"cerf_level": level, "tests": {"$exists": True, "$type": "array", "$ne": []}}},
+        {"$match": {"cerf_level": level, **HAS_TESTS}},
         {"$unwind": "$tests"},
         {"$sample": {"size": QUESTIONS_PER_TEST}},
         {
@@ -145,7 +142,7 @@ async def start_test(
         }
     ]
     
-    cursor = db["words"].aggregate(pipeline)
+    cursor = await db["words"].aggregate(pipeline)
     questions = []
     
     async for doc in cursor:
@@ -159,16 +156,16 @@ async def start_test(
             # Options are already strings
             options = options_raw if options_raw else []
         
-        questions.append(TestQuestion(
-            word_id=doc["word_id"],
-            word=doc.get("word", ""),
-            question_type=doc.get("question_type", "meaning"),
-            question=doc.get("question", ""),
-            options=options,
-            correct_answer=doc.get("correct_answer", ""),
-            explanation=doc.get("explanation", ""),
-            difficulty=doc.get("difficulty", "easy"),
-        ))
+        questions.append({
+            "word_id": doc["word_id"],
+            "word": doc.get("word", ""),
+            "question_type": doc.get("question_type", "meaning"),
+            "question": doc.get("question", ""),
+            "options": options,
+            "correct_answer": doc.get("correct_answer", ""),
+            "explanation": doc.get("explanation", ""),
+            "difficulty": doc.get("difficulty", "easy"),
+        })
     
     if not questions:
         raise HTTPException(
@@ -176,18 +173,18 @@ async def start_test(
             detail=f"No test questions found for level {level}"
         )
     
-    return TestSession(
-        level=level,
-        questions=questions,
-        total_questions=len(questions),
-    )
+    return FastJSONResponse({
+        "level": level,
+        "questions": questions,
+        "total_questions": len(questions),
+    })
 
 
 @router.post("/{level}/submit", response_model=TestResultResponse)
 async def submit_test(
     level: str,
     submission: TestSubmission,
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     user: UserInDB = Depends(get_current_user),
 ):
     """Submit test answers and store results."""
@@ -238,25 +235,25 @@ async def submit_test(
 async def get_test_history(
     skip: int = 0,
     limit: int = 20,
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     user: UserInDB = Depends(get_current_user),
 ):
     """Get the user's test history."""
     
     cursor = db["test_results"].find(
-        {"userId": user.id}
+        {"userId": user.id}, queries.TEST_HISTORY_ITEM
     ).sort("completedAt", -1).skip(skip).limit(limit)
     
     history = []
     async for doc in cursor:
-        history.append(TestHistoryItem(
-            id=str(doc["_id"]),
-            level=doc["level"],
-            score=doc["score"],
-            total_questions=doc["totalQuestions"],
-            correct_answers=doc["correctAnswers"],
-            percentage=doc["score"],
-            completed_at=doc["completedAt"],
-        ))
+        history.append({
+            "id": str(doc["_id"]),
+            "level": doc["level"],
+            "score": int(doc["score"]),
+            "total_questions": doc["totalQuestions"],
+            "correct_answers": doc["correctAnswers"],
+            "percentage": float(doc["score"]),
+            "completed_at": doc["completedAt"],
+        })
     
-    return history
+    return FastJSONResponse(history)
@@ -2,10 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timedelta
-from app.dependencies import get_current_user
-from app.models.user import UserInDB
+from app.dependencies import RoleChecker, get_current_user, get_current_user_doc, invalidate_user
+from app.core.security import ROLES_PERMISSIONS, UserRole
+from app.models.user import UserInDB, UserResponse, UserSettings, UserSettingsUpdate
+from app.services.session_tokens import revocations
 from app.db.mongodb import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ReturnDocument
 import logging
 
 router = APIRouter()
@@ -13,18 +16,6 @@ logger = logging.getLogger(__name__)
 
 # --- Models ---
 
-class UserSettings(BaseModel):
-    flashcards_per_session: int = 30
-    word_repetitions: int = 3
-    questions_per_test: int = 20
-    cefr_level: str = "B1"
-
-class UserSettingsUpdate(BaseModel):
-    flashcards_per_session: Optional[int] = None
-    word_repetitions: Optional[int] = None
-    questions_per_test: Optional[int] = None
-    cefr_level: Optional[str] = None
-
 class UserProfile(BaseModel):
     id: str
     email: str
@@ -48,30 +39,24 @@ class Notification(BaseModel):
 class NotificationUpdate(BaseModel):
     read: bool
 
+class UserRoleUpdate(BaseModel):
+    role: UserRole
+
 
 # --- Endpoints ---
 
-@router.get("/me", response_model=UserProfile)
-async def get_current_user_profile(
-    current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """Get the current user's profile including settings and subscription."""
-    user_doc = await db["user"].find_one({"_id": current_user.id})
-    
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get or create default settings
+def _settings_from_doc(user_doc: dict) -> UserSettings:
     settings = user_doc.get("settings", {})
     default_settings = UserSettings()
-    user_settings = UserSettings(
+    return UserSettings(
         flashcards_per_session=settings.get("flashcards_per_session", default_settings.flashcards_per_session),
         word_repetitions=settings.get("word_repetitions", default_settings.word_repetitions),
         questions_per_test=settings.get("questions_per_test", default_settings.questions_per_test),
         cefr_level=settings.get("cefr_level", default_settings.cefr_level)
     )
-    
+
+
+async def _build_profile(user_doc: dict, db: AsyncDatabase) -> UserProfile:
     # Get or create trial subscription
     subscription = user_doc.get("subscription")
     if not subscription:
@@ -87,9 +72,10 @@ async def get_current_user_profile(
         }
         # Save the subscription to DB
         await db["user"].update_one(
-            {"_id": current_user.id},
+            {"_id": user_doc["_id"]},
             {"$set": {"subscription": subscription}}
         )
+        invalidate_user(user_doc["_id"])
     
     return UserProfile(
         id=user_doc["_id"],
@@ -97,74 +83,74 @@ async def get_current_user_profile(
         name=user_doc.get("name"),
         role=user_doc.get("role", "student_free"),
         created_at=user_doc.get("created_at"),
-        settings=user_settings,
+        settings=_settings_from_doc(user_doc),
         subscription=subscription
     )
 
 
+async def _update_user_doc(db: AsyncDatabase, user_doc: dict, update_data: dict) -> dict:
+    """Apply `$set` fields and return the updated document without a second read."""
+    if not update_data:
+        return user_doc
+    updated = await db["user"].find_one_and_update(
+        {"_id": user_doc["_id"]},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    invalidate_user(user_doc["_id"])
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated
+
+
+@router.get("/me", response_model=UserProfile)
+async def get_current_user_profile(
+    user_doc: dict = Depends(get_current_user_doc),
+    db: AsyncDatabase = Depends(get_database)
+):
+    """Get the current user's profile including settings and subscription."""
+    return await _build_profile(user_doc, db)
+
+
 @router.put("/me", response_model=UserProfile)
 async def update_user_profile(
     update: UserProfileUpdate,
-    current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_doc: dict = Depends(get_current_user_doc),
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Update the current user's profile (name)."""
     update_data = {k: v for k, v in update.dict().items() if v is not None}
-    
-    if update_data:
-        await db["user"].update_one(
-            {"_id": current_user.id},
-            {"$set": update_data}
-        )
+    user_doc = await _update_user_doc(db, user_doc, update_data)
     
     # Return updated profile
-    return await get_current_user_profile(current_user, db)
+    return await _build_profile(user_doc, db)
 
 
 @router.get("/me/settings", response_model=UserSettings)
 async def get_user_settings(
-    current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_doc: dict = Depends(get_current_user_doc)
 ):
     """Get the current user's settings."""
-    user_doc = await db["user"].find_one({"_id": current_user.id})
-    
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    settings = user_doc.get("settings", {})
-    default_settings = UserSettings()
-    
-    return UserSettings(
-        flashcards_per_session=settings.get("flashcards_per_session", default_settings.flashcards_per_session),
-        word_repetitions=settings.get("word_repetitions", default_settings.word_repetitions),
-        questions_per_test=settings.get("questions_per_test", default_settings.questions_per_test),
-        cefr_level=settings.get("cefr_level", default_settings.cefr_level)
-    )
+    return _settings_from_doc(user_doc)
 
 
 @router.put("/me/settings", response_model=UserSettings)
 async def update_user_settings(
     settings_update: UserSettingsUpdate,
-    current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    user_doc: dict = Depends(get_current_user_doc),
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Update the current user's settings."""
     update_data = {f"settings.{k}": v for k, v in settings_update.dict().items() if v is not None}
+    user_doc = await _update_user_doc(db, user_doc, update_data)
     
-    if update_data:
-        await db["user"].update_one(
-            {"_id": current_user.id},
-            {"$set": update_data}
-        )
-    
-    return await get_user_settings(current_user, db)
+    return _settings_from_doc(user_doc)
 
 
 @router.get("/me/notifications", response_model=List[Notification])
 async def get_user_notifications(
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Get the current user's notifications."""
     notifications = await db["notifications"].find(
@@ -212,7 +198,7 @@ async def mark_notification_read(
     notification_id: str,
     update: NotificationUpdate,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Mark a notification as read/unread."""
     from bson import ObjectId
@@ -235,7 +221,7 @@ async def mark_notification_read(
 @router.put("/me/notifications/mark-all-read")
 async def mark_all_notifications_read(
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Mark all notifications as read."""
     await db["notifications"].update_many(
@@ -243,3 +229,33 @@ async def mark_all_notifications_read(
         {"$set": {"read": True}}
     )
     return {"message": "All notifications marked as read"}
+
+
+@router.put(
+    "/{user_id}/role",
+    response_model=UserResponse,
+    dependencies=[Depends(RoleChecker([UserRole.ADMIN]))]
+)
+async def update_user_role(
+    user_id: str,
+    update: UserRoleUpdate,
+    db: AsyncDatabase = Depends(get_database)
+):
+    """Change a user's role and permissions (admin only)."""
+    user_doc = await db["user"].find_one_and_update(
+        {"_id": user_id},
+        {"$set": {"role": update.role.value, "permissions": ROLES_PERMISSIONS[update.role]}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not user_doc:
+        raise HTTPException(status_code=404, detail="User not found")
+    invalidate_user(user_id)
+    # Session tokens carry the old role in their claims and can't be refreshed once revoked;
+    # the client signs in with its Firebase token again to get one with the new role.
+    await revocations.revoke_user(db, user_id)
+    return UserResponse(
+        id=user_doc["_id"],
+        email=user_doc["email"],
+        role=user_doc["role"],
+        permissions=user_doc["permissions"]
+    )
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from app.dependencies import RoleChecker
 from app.core.security import UserRole
+from app.core.config import settings
+from app.core.etag import CATALOG, content_etag, not_modified, tag
+from app.core.responses import FastJSONResponse, dumps
+from app.db import queries
+from app.db.card_versions import word_card_versions
+from app.db.catalog import Catalog, catalogs
 from app.db.mongodb import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List
+from app.services.word_search import word_search
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import AsyncIterator, List, Optional
 
 router = APIRouter()
 
-@router.get("/")
-async def get_word_decks(db: AsyncIOMotorDatabase = Depends(get_database)):
+async def _build_word_decks(db: AsyncDatabase) -> List[dict]:
     # Aggregate words by cerf_level to create "decks"
     pipeline = [
+        # Sorting first lets the $group stream over the cerf_level index.
+        {"$sort": {"cerf_level": 1}},
         {
             "$group": {
                 "_id": "$cerf_level",
@@ -20,7 +32,7 @@ async def get_word_decks(db: AsyncIOMotorDatabase = Depends(get_database)):
         {"$sort": {"_id": 1}}
     ]
 
-    cursor = db["words"].aggregate(pipeline)
+    cursor = await db["words"].aggregate(pipeline)
     decks = []
     async for doc in cursor:
         level = doc["_id"]
@@ -52,43 +64,87 @@ async def get_word_decks(db: AsyncIOMotorDatabase = Depends(get_database)):
     
     return decks
 
-def get_audio_filename(url: str) -> str:
-    """Extract filename from audio URL and return proxied path."""
-    if not url:
-        return ""
-    # Extract filename from URL like https://storage.../hackathon/audio/word_m.mp3
-    filename = url.split("/")[-1] if "/" in url else url
-    return f"/audio/{filename}"
+
+word_decks = catalogs.register(Catalog("word_decks", "words", _build_word_decks, settings.CATALOG_MAX_AGE))
+
+
+@router.get("/")
+async def get_word_decks(request: Request, db: AsyncDatabase = Depends(get_database)):
+    decks, etag = await word_decks.get_tagged(db)
+    cached = not_modified(request, etag, CATALOG)
+    if cached:
+        return cached
+    return tag(FastJSONResponse(decks), etag, CATALOG)
+
+@router.get("/search")
+async def search_words(
+    q: str = Query(..., min_length=1, max_length=64, description="Start of a German word or its English translation"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncDatabase = Depends(get_database)
+):
+    # Case- and umlaut-insensitive: "hau", "Hau" and "häu" all find "Häuser".
+    return FastJSONResponse(await word_search.search(db, q, limit))
+
+NDJSON = "application/x-ndjson"
+# Cards per chunk written to a streamed response.
+STREAM_CHUNK_SIZE = 200
+
+
+async def _stream_cards(cursor: AsyncCursor, ndjson: bool) -> AsyncIterator[bytes]:
+    """Encode cards as the cursor yields them, so memory doesn't grow with the level."""
+    chunk = [] if ndjson else [b"["]
+    first = True
+    try:
+        async for doc in cursor:
+            if ndjson:
+                chunk.append(dumps(doc) + b"\n")
+            else:
+                chunk.append(dumps(doc) if first else b"," + dumps(doc))
+            first = False
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield b"".join(chunk)
+                chunk = []
+    finally:
+        await cursor.close()
+    if not ndjson:
+        chunk.append(b"]")
+    if chunk:
+        yield b"".join(chunk)
 
 
 @router.get("/{level}")
-async def get_words_by_level(level: str, db: AsyncIOMotorDatabase = Depends(get_database)):
-    cursor = db["words"].find({"cerf_level": level})
-    words = []
-    async for doc in cursor:
-        # Try to find English translation first
-        translation = ""
-        translations = doc.get("translations", [])
-        for t in translations:
-            if t.get("language_code") == "en":
-                translation = t.get("content", "")
-                break
-        if not translation and translations:
-            translation = translations[0].get("content", "")
-
-        # Get audio URLs and convert to proxy paths
-        audio = doc.get("audio", {})
-
-        words.append({
-            "id": str(doc["_id"]),
-            "original": doc.get("word", ""),
-            "translation": translation,
-            "pronunciation": doc.get("ipa_transcription", "").replace("/", ""),
-            "audioMale": get_audio_filename(audio.get("male", "")),
-            "audioFemale": get_audio_filename(audio.get("female", "")),
-            "level": 0
-        })
-    return words
+async def get_words_by_level(
+    level: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="`X-Next-Cursor` of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the whole level is streamed if omitted"),
+    db: AsyncDatabase = Depends(get_database)
+):
+    try:
+        after = ObjectId(cursor) if cursor else None
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    ndjson = NDJSON in request.headers.get("accept", "")
+    versions = await word_card_versions.get(db)
+    etag = content_etag("words", level, versions.get(level), cursor, limit, ndjson)
+    cached = not_modified(request, etag, CATALOG)
+    if cached:
+        return cached
+
+    cards = queries.word_list_by_level(db, level, after=after, limit=limit or 0)
+    if limit is None:
+        response = StreamingResponse(_stream_cards(cards, ndjson), media_type=NDJSON if ndjson else "application/json")
+        return tag(response, etag, CATALOG)
+
+    # A page is bounded by `limit`, so it is read whole to know the next cursor up front.
+    page = await cards.to_list(limit)
+    headers = {"X-Next-Cursor": page[-1]["id"]} if len(page) == limit else {}
+    if ndjson:
+        response = Response(b"".join(dumps(doc) + b"\n" for doc in page), media_type=NDJSON, headers=headers)
+    else:
+        response = FastJSONResponse(page, headers=headers)
+    return tag(response, etag, CATALOG)
 
 @router.post("/", dependencies=[Depends(RoleChecker([UserRole.ADMIN, UserRole.TEACHER]))])
 async def create_word_entry():
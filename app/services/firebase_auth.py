@@ -1,16 +1,24 @@
-import httpx
+import logging
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.services.token_verifier import (
+    FirebaseTokenVerifier,
+    InvalidTokenError,
+    UnknownKeyError,
+    claims_to_account,
+)
 from fastapi import HTTPException, status
 
+logger = logging.getLogger(__name__)
+
 FIREBASE_AUTH_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
 
 async def sign_up_with_email(email: str, password: str):
     url = f"{FIREBASE_AUTH_URL}:signUp?key={settings.FIREBASE_API}"
     payload = {"email": email, "password": password, "returnSecureToken": True}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        
+    response = await get_http_client().post(url, json=payload)
+
     if response.status_code != 200:
         error_data = response.json()
         error_msg = error_data.get("error", {}).get("message", "Unknown error")
@@ -24,8 +32,7 @@ async def sign_in_with_email(email: str, password: str):
     url = f"{FIREBASE_AUTH_URL}:signInWithPassword?key={settings.FIREBASE_API}"
     payload = {"email": email, "password": password, "returnSecureToken": True}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
+    response = await get_http_client().post(url, json=payload)
 
     if response.status_code != 200:
         error_data = response.json()
@@ -40,8 +47,7 @@ async def send_password_reset_email(email: str):
     url = f"{FIREBASE_AUTH_URL}:sendOobCode?key={settings.FIREBASE_API}"
     payload = {"requestType": "PASSWORD_RESET", "email": email}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
+    response = await get_http_client().post(url, json=payload)
 
     if response.status_code != 200:
         error_data = response.json()
@@ -56,8 +62,7 @@ async def send_email_verification(id_token: str):
     url = f"{FIREBASE_AUTH_URL}:sendOobCode?key={settings.FIREBASE_API}"
     payload = {"requestType": "VERIFY_EMAIL", "idToken": id_token}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
+    response = await get_http_client().post(url, json=payload)
 
     if response.status_code != 200:
         error_data = response.json()
@@ -72,9 +77,14 @@ async def get_user_by_token(id_token: str):
     url = f"{FIREBASE_AUTH_URL}:lookup?key={settings.FIREBASE_API}"
     payload = {"idToken": id_token}
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        
+    response = await get_http_client().post(url, json=payload)
+
+    if response.status_code >= 500:
+        # Firebase is having trouble; that says nothing about the token.
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service unavailable"
+        )
     if response.status_code != 200:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,3 +99,35 @@ async def get_user_by_token(id_token: str):
         )
         
     return data["users"][0]
+
+
+# Local verification needs the project id for the aud/iss checks; without it
+# every token goes through the remote lookup.
+token_verifier = (
+    FirebaseTokenVerifier(settings.FIREBASE_PROJECT_ID)
+    if settings.FIREBASE_PROJECT_ID else None
+)
+
+async def verify_id_token(id_token: str):
+    """
+    Verify an ID token locally and return an accounts:lookup-shaped user record.
+
+    Falls back to the remote lookup only when the token was signed with a key
+    that is not in the cached key set (or local verification is disabled).
+    """
+    if token_verifier is None:
+        return await get_user_by_token(id_token)
+
+    try:
+        claims = await token_verifier.verify(id_token)
+    except UnknownKeyError:
+        logger.info("Unknown signing key id, falling back to remote token lookup")
+        return await get_user_by_token(id_token)
+    except InvalidTokenError as e:
+        logger.debug(f"Rejected ID token: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+
+    return claims_to_account(claims)
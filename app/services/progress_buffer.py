@@ -0,0 +1,133 @@
+"""
+Write-behind buffer for flashcard progress.
+
+Clients report their position on every card flip. Only the latest position
+per (user, level) matters, so updates are held in memory, coalesced, and
+written in one unordered `bulk_write` every flush interval, as soon as
+`max_pending` keys have built up, and at shutdown. A crash loses at most one
+interval of positions, which the client simply re-reports.
+
+Until `start` is called (no database at startup, or an interval of 0) every
+update is written straight through.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_COLLECTION = "flashcard_sessions"
+
+Key = Tuple[str, str]
+
+
+def _update(user_id: str, level: str, current_index: int, session_id: Optional[ObjectId]) -> UpdateOne:
+    filter = {"user_id": user_id, "level": level, "is_active": True}
+    if session_id is not None:
+        # Pins the update to the session it was made in, should that one have been reset since.
+        filter["_id"] = session_id
+    return UpdateOne(filter, {"$set": {"current_index": current_index}})
+
+
+class ProgressBuffer:
+    def __init__(self, max_pending: int = 5000):
+        self.max_pending = max_pending
+        self._pending: Dict[Key, Tuple[int, Optional[ObjectId]]] = {}
+        self._db: Optional[AsyncDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.updates = metrics.counter("progress_updates", "Flashcard progress updates received")
+        self.coalesced = metrics.counter("progress_updates_coalesced", "Progress updates superseded before a flush")
+        self.writes = metrics.counter("progress_writes", "Progress updates written to Mongo")
+        self.flush_failures = metrics.counter("progress_flush_failures", "Progress flushes that failed and were retried")
+        self.pending_gauge = metrics.gauge("progress_pending", "Progress updates waiting to be flushed")
+
+    async def record(
+        self, db: AsyncDatabase, user_id: str, level: str, current_index: int, session_id: Optional[ObjectId] = None
+    ) -> None:
+        self.updates.inc()
+        if self._task is None:
+            await db[SESSIONS_COLLECTION].bulk_write([_update(user_id, level, current_index, session_id)])
+            self.writes.inc()
+            return
+        if (user_id, level) in self._pending:
+            self.coalesced.inc()
+        self._pending[(user_id, level)] = (current_index, session_id)
+        self.pending_gauge.set(len(self._pending))
+        if len(self._pending) >= self.max_pending:
+            self._wake.set()
+
+    def pending(self, user_id: str, level: str, session_id: ObjectId) -> Optional[int]:
+        """The buffered position in session `session_id`, newer than what Mongo holds."""
+        entry = self._pending.get((user_id, level))
+        if entry is None or entry[1] not in (None, session_id):
+            return None
+        return entry[0]
+
+    def discard(self, user_id: str, level: str) -> None:
+        """Drop a buffered position, e.g. because its session was reset."""
+        self._pending.pop((user_id, level), None)
+        self.pending_gauge.set(len(self._pending))
+
+    async def flush(self) -> int:
+        if not self._pending or self._db is None:
+            return 0
+        batch, self._pending = self._pending, {}
+        requests = [
+            _update(user_id, level, index, session_id) for (user_id, level), (index, session_id) in batch.items()
+        ]
+        try:
+            await self._db[SESSIONS_COLLECTION].bulk_write(requests, ordered=False)
+        except BaseException:
+            # Failed, or cancelled by shutdown mid-write: put the batch back
+            # under anything recorded while it was in flight.
+            self.flush_failures.inc()
+            for key, entry in batch.items():
+                self._pending.setdefault(key, entry)
+            raise
+        finally:
+            self.pending_gauge.set(len(self._pending))
+        self.writes.inc(len(requests))
+        return len(requests)
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to flush flashcard progress: {e}")
+
+    def start(self, db: AsyncDatabase, interval: float) -> None:
+        if self._task is None and interval > 0:
+            self._db = db
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Lost {len(self._pending)} flashcard progress updates at shutdown: {e}")
+
+
+progress_buffer = ProgressBuffer(settings.PROGRESS_BUFFER_MAX)
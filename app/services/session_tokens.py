@@ -0,0 +1,200 @@
+"""Short-lived backend session tokens (HS256) exchanged for Firebase ID tokens."""
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import jwt
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.core.config import settings
+from app.models.user import UserInDB
+
+logger = logging.getLogger(__name__)
+
+SESSION_ISSUER = "sprache-backend"
+REVOCATIONS_COLLECTION = "revoked_sessions"
+
+
+class InvalidSessionError(Exception):
+    """The session token is malformed, expired, badly signed or revoked."""
+
+
+def _key_id(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()[:12]
+
+
+class SessionSigner:
+    """
+    Signs with the first configured secret and accepts any configured one.
+
+    Rotating means putting the new secret first and keeping the old one in
+    SESSION_PREVIOUS_SECRETS for at least one token lifetime.
+    """
+
+    def __init__(self, secret: str, previous: List[str], ttl: int):
+        self.ttl = ttl
+        self.active_kid = _key_id(secret)
+        self._secrets: Dict[str, str] = {self.active_kid: secret}
+        for old in previous:
+            self._secrets.setdefault(_key_id(old), old)
+
+    def issue(self, user: UserInDB) -> Tuple[str, int]:
+        """Return (token, expires_at) for a resolved user."""
+        now = int(time.time())
+        expires_at = now + self.ttl
+        claims = {
+            "iss": SESSION_ISSUER,
+            "sub": user.id,
+            "email": user.email,
+            "role": user.role,
+            "permissions": user.permissions,
+            "iat": now,
+            "exp": expires_at,
+            "jti": uuid.uuid4().hex,
+        }
+        token = jwt.encode(
+            claims,
+            self._secrets[self.active_kid],
+            algorithm="HS256",
+            headers={"kid": self.active_kid},
+        )
+        return token, expires_at
+
+    def decode(self, token: str, verify_exp: bool = True) -> dict:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError as e:
+            raise InvalidSessionError(f"Malformed session token: {e}")
+        secret = self._secrets.get(kid)
+        if secret is None:
+            raise InvalidSessionError("Session token signed with a retired key")
+        try:
+            return jwt.decode(
+                token,
+                secret,
+                algorithms=["HS256"],
+                issuer=SESSION_ISSUER,
+                options={"require": ["exp", "iat", "sub", "jti"], "verify_exp": verify_exp},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidSessionError(str(e))
+
+
+class RevocationList:
+    """
+    Revoked session ids, held in memory and synced from Mongo.
+
+    Entries are either a single token (`jti`) or every token a user was
+    issued up to a cut-off (`uid` + `not_before`), e.g. after a role change.
+    `iat` has whole seconds, so the cut-off's own second counts as before it.
+    """
+
+    def __init__(self):
+        self._jtis: set = set()
+        self._user_cutoffs: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, claims: dict) -> bool:
+        if claims["jti"] in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(claims["sub"])
+        return cutoff is not None and claims["iat"] <= cutoff
+
+    async def revoke(self, db: AsyncDatabase, claims: dict) -> None:
+        self._jtis.add(claims["jti"])
+        await db[REVOCATIONS_COLLECTION].update_one(
+            {"_id": claims["jti"]},
+            {"$set": {"expires_at": datetime.fromtimestamp(claims["exp"], timezone.utc)}},
+            upsert=True
+        )
+
+    async def revoke_user(self, db: AsyncDatabase, user_id: str) -> None:
+        """Invalidate every session issued to `user_id` so far."""
+        now = int(time.time())
+        self._user_cutoffs[user_id] = now
+        await db[REVOCATIONS_COLLECTION].update_one(
+            {"_id": f"user:{user_id}"},
+            {"$set": {
+                "uid": user_id,
+                "not_before": now,
+                # Nothing issued before the cut-off outlives one token lifetime.
+                "expires_at": datetime.fromtimestamp(now + settings.SESSION_TOKEN_TTL, timezone.utc),
+            }},
+            upsert=True
+        )
+
+    async def sync(self, db: AsyncDatabase) -> None:
+        jtis = set()
+        cutoffs = {}
+        cursor = db[REVOCATIONS_COLLECTION].find(
+            {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+        )
+        async for doc in cursor:
+            if "uid" in doc:
+                cutoffs[doc["uid"]] = doc["not_before"]
+            else:
+                jtis.add(doc["_id"])
+        self._jtis = jtis
+        self._user_cutoffs = cutoffs
+
+    async def _sync_loop(self, db: AsyncDatabase, interval: float) -> None:
+        while True:
+            try:
+                await self.sync(db)
+            except Exception as e:
+                logger.warning(f"Failed to sync session revocations: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, db: AsyncDatabase, interval: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop(db, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Disabled (Firebase-only auth) unless a secret is configured.
+session_signer = (
+    SessionSigner(settings.SESSION_SECRET, settings.SESSION_PREVIOUS_SECRETS, settings.SESSION_TOKEN_TTL)
+    if settings.SESSION_SECRET else None
+)
+revocations = RevocationList()
+
+
+def is_session_token(token: str) -> bool:
+    """Session tokens are HS256; Firebase ID tokens are always RS256."""
+    try:
+        return jwt.get_unverified_header(token).get("alg") == "HS256"
+    except jwt.PyJWTError:
+        return False
+
+
+def verify_session_token(token: str) -> dict:
+    if session_signer is None:
+        raise InvalidSessionError("Session tokens are not enabled")
+    claims = session_signer.decode(token)
+    if revocations.is_revoked(claims):
+        raise InvalidSessionError("Session has been revoked")
+    return claims
+
+
+def user_from_claims(claims: dict) -> UserInDB:
+    # The claims were written by us and are signed, so skip re-validation.
+    return UserInDB.model_construct(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role", "student_free"),
+        permissions=claims.get("permissions", []),
+        created_at=None,
+    )
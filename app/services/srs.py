@@ -0,0 +1,118 @@
+"""
+SM-2 spaced repetition for flashcards.
+
+Review state is one small document per (user, word) in `flashcard_reviews`:
+ease factor, interval in days, successful repetitions in a row, lapses and
+the next due time. A grade is applied as a single upserting update whose
+pipeline computes the new state from the stored one, so concurrent reviews
+of the same card can't overwrite each other. `schedule` is the same rule in
+Python, for reading and testing.
+
+Grades follow SM-2: 0-2 is a lapse (back to a one-day interval), 3-5 a
+successful recall (1 day, then 6, then the previous interval times ease).
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.asynchronous.database import AsyncDatabase
+
+REVIEWS_COLLECTION = "flashcard_reviews"
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_GRADE = 3
+DAY_MS = 24 * 60 * 60 * 1000
+
+REVIEW_FIELDS = {"_id": 0, "word_id": 1, "due_at": 1, "ease": 1, "interval": 1, "reps": 1, "lapses": 1}
+
+
+def _ease_delta(grade: int) -> float:
+    miss = 5 - grade
+    return 0.1 - miss * (0.08 + miss * 0.02)
+
+
+def schedule(state: Optional[dict], grade: int, now: datetime) -> dict:
+    """The review fields after grading a card whose stored state is `state` (None if new)."""
+    state = state or {}
+    ease = state.get("ease", INITIAL_EASE)
+    interval = state.get("interval", 0)
+    reps = state.get("reps", 0)
+    lapses = state.get("lapses", 0)
+
+    if grade >= PASSING_GRADE:
+        interval = 1 if reps == 0 else 6 if reps == 1 else round(interval * ease)
+        reps += 1
+    else:
+        interval, reps, lapses = 1, 0, lapses + 1
+    return {
+        "ease": max(MIN_EASE, ease + _ease_delta(grade)),
+        "interval": interval,
+        "reps": reps,
+        "lapses": lapses,
+        "reviewed_at": now,
+        "due_at": now + timedelta(days=interval),
+    }
+
+
+def review_pipeline(user_id: str, word_id: ObjectId, level: str, grade: int, now: datetime) -> List[dict]:
+    """Update pipeline applying `schedule` to the stored document, server-side."""
+    ease = {"$ifNull": ["$ease", INITIAL_EASE]}
+    reps = {"$ifNull": ["$reps", 0]}
+    lapses = {"$ifNull": ["$lapses", 0]}
+    if grade >= PASSING_GRADE:
+        interval = {"$switch": {
+            "branches": [{"case": {"$eq": [reps, 0]}, "then": 1}, {"case": {"$eq": [reps, 1]}, "then": 6}],
+            "default": {"$round": [{"$multiply": [{"$ifNull": ["$interval", 0]}, ease]}, 0]},
+        }}
+        state = {"interval": interval, "reps": {"$add": [reps, 1]}, "lapses": lapses}
+    else:
+        state = {"interval": 1, "reps": 0, "lapses": {"$add": [lapses, 1]}}
+    return [
+        # Every expression in a stage reads the document as it was before the stage.
+        {"$set": {
+            "user_id": {"$literal": user_id},
+            "word_id": {"$literal": word_id},
+            "level": {"$literal": level},
+            "ease": {"$max": [MIN_EASE, {"$add": [ease, _ease_delta(grade)]}]},
+            **state,
+            "reviewed_at": {"$literal": now},
+        }},
+        {"$set": {"due_at": {"$add": ["$reviewed_at", {"$multiply": ["$interval", DAY_MS]}]}}},
+    ]
+
+
+async def record_review(
+    db: AsyncDatabase, user_id: str, word_id: ObjectId, level: str, grade: int, now: datetime
+) -> dict:
+    """Apply `grade` to the user's card in one atomic write and return the new state."""
+    return await db[REVIEWS_COLLECTION].find_one_and_update(
+        {"user_id": user_id, "word_id": word_id},
+        review_pipeline(user_id, word_id, level, grade, now),
+        projection=REVIEW_FIELDS,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def due_word_ids(db: AsyncDatabase, user_id: str, level: str, now: datetime, limit: int) -> List[str]:
+    """Up to `limit` of the user's cards at `level` that are due, most overdue first."""
+    # One range scan over (user_id, level, due_at), however many cards the user has reviewed.
+    cursor = db[REVIEWS_COLLECTION].find(
+        {"user_id": user_id, "level": level, "due_at": {"$lte": now}},
+        {"_id": 0, "word_id": 1},
+        sort=[("due_at", 1)],
+        limit=limit,
+    )
+    return [str(doc["word_id"]) async for doc in cursor]
+
+
+async def reviewed_word_ids(db: AsyncDatabase, user_id: str, word_ids: List[str]) -> set:
+    """Which of `word_ids` the user already has review state for."""
+    cursor = db[REVIEWS_COLLECTION].find(
+        {"user_id": user_id, "word_id": {"$in": [ObjectId(wid) for wid in word_ids]}},
+        {"_id": 0, "word_id": 1},
+    )
+    return {str(doc["word_id"]) async for doc in cursor}
@@ -0,0 +1,199 @@
+"""Local verification of Firebase ID tokens against Google's signing keys."""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+
+from app.core.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+
+# Used when Google omits Cache-Control; their keys normally live ~6 hours.
+DEFAULT_KEYS_MAX_AGE = 3600
+# Refresh a little before the advertised expiry so requests never wait on it.
+REFRESH_MARGIN = 300
+# Floor for retries after a failed refresh.
+MIN_REFRESH_INTERVAL = 30
+# Tolerated clock skew between us and Google, in seconds.
+CLOCK_SKEW = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# A key fetcher returns ({kid: PEM}, max_age_seconds).
+KeyFetcher = Callable[[], Awaitable[Tuple[Dict[str, str], int]]]
+
+
+class InvalidTokenError(Exception):
+    """The token is malformed, badly signed or fails a claim check."""
+
+
+class UnknownKeyError(Exception):
+    """The token was signed with a key we do not (yet) know about."""
+
+
+def parse_max_age(cache_control: Optional[str]) -> int:
+    """Extract max-age from a Cache-Control header value."""
+    if cache_control:
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return int(match.group(1))
+    return DEFAULT_KEYS_MAX_AGE
+
+
+async def fetch_google_keys() -> Tuple[Dict[str, str], int]:
+    """Download Google's x509 signing certificates for Firebase ID tokens."""
+    response = await get_http_client().get(GOOGLE_CERTS_URL)
+    response.raise_for_status()
+    return response.json(), parse_max_age(response.headers.get("cache-control"))
+
+
+def _load_public_key(pem: str):
+    """Load a public key from either an x509 certificate or a bare public key PEM."""
+    data = pem.encode()
+    if b"CERTIFICATE" in data:
+        return x509.load_pem_x509_certificate(data).public_key()
+    return load_pem_public_key(data)
+
+
+class SigningKeyCache:
+    """Google's public signing keys, refreshed according to Cache-Control."""
+
+    def __init__(self, fetcher: KeyFetcher = fetch_google_keys):
+        self._fetcher = fetcher
+        self._keys: Dict[str, object] = {}
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return bool(self._keys) and time.monotonic() < self._expires_at
+
+    async def _load(self) -> None:
+        pems, max_age = await self._fetcher()
+        self._keys = {kid: _load_public_key(pem) for kid, pem in pems.items()}
+        self._expires_at = time.monotonic() + max_age
+        logger.info(f"Loaded {len(self._keys)} Firebase signing keys (max-age={max_age}s)")
+
+    async def refresh(self) -> None:
+        """Fetch the current key set, replacing the cached one."""
+        async with self._lock:
+            await self._load()
+
+    async def _ensure_fresh(self) -> None:
+        async with self._lock:
+            # Another waiter may have refreshed while we queued on the lock.
+            if self.is_fresh:
+                return
+            try:
+                await self._load()
+            except Exception as e:
+                # Keep serving the old keys for a while rather than failing
+                # every request or retrying the fetch on each one.
+                logger.warning(f"Failed to refresh Firebase signing keys: {e}")
+                self._expires_at = time.monotonic() + MIN_REFRESH_INTERVAL
+
+    async def get(self, kid: str):
+        """Return the key for `kid`, loading the key set if it is missing or stale."""
+        if not self.is_fresh:
+            await self._ensure_fresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise UnknownKeyError(kid)
+        return key
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if not self.is_fresh or self._expires_at - time.monotonic() <= REFRESH_MARGIN:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.warning(f"Background refresh of Firebase signing keys failed: {e}")
+            delay = max(self._expires_at - time.monotonic() - REFRESH_MARGIN, MIN_REFRESH_INTERVAL)
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """Keep the key set warm from a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class FirebaseTokenVerifier:
+    """Verifies RS256 Firebase ID tokens without calling Firebase."""
+
+    def __init__(self, project_id: str, keys: Optional[SigningKeyCache] = None):
+        self.project_id = project_id
+        self.issuer = f"{FIREBASE_ISSUER_PREFIX}{project_id}"
+        self.keys = keys or SigningKeyCache()
+
+    async def verify(self, id_token: str) -> dict:
+        """
+        Verify the token signature and claims and return the decoded claims.
+
+        Raises UnknownKeyError if the `kid` is not in the current key set, and
+        InvalidTokenError for anything else that is wrong with the token.
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(f"Malformed token: {e}")
+
+        if header.get("alg") != "RS256":
+            raise InvalidTokenError("Unexpected signing algorithm")
+        kid = header.get("kid")
+        if not kid:
+            raise InvalidTokenError("Token has no key id")
+
+        key = await self.keys.get(kid)
+
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+                leeway=CLOCK_SKEW,
+                options={"require": ["exp", "iat", "aud", "iss", "sub", "auth_time"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+
+        if not claims["sub"] or len(claims["sub"]) > 128:
+            raise InvalidTokenError("Invalid subject")
+        if claims["auth_time"] > time.time() + CLOCK_SKEW:
+            raise InvalidTokenError("Authentication time is in the future")
+
+        return claims
+
+
+def claims_to_account(claims: dict) -> dict:
+    """Shape verified claims like an accounts:lookup user record."""
+    return {
+        "localId": claims["sub"],
+        "email": claims.get("email"),
+        "emailVerified": claims.get("email_verified", False),
+        "displayName": claims.get("name"),
+        "exp": claims["exp"],
+    }
@@ -0,0 +1,182 @@
+"""
+Prefix search over German headwords and their English translations.
+
+The index is two sorted arrays of (folded key, card id), one for headwords
+and one for translations, held in memory and searched with bisect. Keys are
+case- and accent-folded (Ä -> a, ß -> ss), and every word of a multi-word
+entry is indexed, so "haus" finds "das Haus" and "go" finds "to go".
+
+The index listens to the catalog registry like a Catalog does. When
+word_cards changes it is only marked stale. The next search then fetches
+the cards written since the newest `built_at` it has seen and merges them
+in. It falls back to a full reload when the card count shows deletions.
+As with a Catalog, `max_age` is a backstop in case an invalidation is missed.
+"""
+
+import bisect
+import logging
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.core.cache import SingleFlight
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.catalog import catalogs
+from app.db.word_cards import WORD_CARDS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = {"_id": 0, "id": 1, "word": 1, "translation": 1, "level": 1, "built_at": 1}
+# Past this many changed cards, re-sorting beats inserting one by one.
+MERGE_LIMIT = 200
+# A rebuild stamps every batch with one build time; while that may still be
+# writing, the newest batch is re-read rather than assumed complete.
+SETTLE_TIME = timedelta(minutes=5)
+
+Entry = Tuple[str, str]
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and umlauts, and expand ß, for matching."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip()
+
+
+def _keys(text: Optional[str]) -> List[str]:
+    """The folded text and each of its word-starting suffixes."""
+    folded = fold(text or "")
+    if not folded:
+        return []
+    words = folded.split()
+    return sorted({" ".join(words[i:]) for i in range(len(words))})
+
+
+class WordSearchIndex:
+    def __init__(self, max_age: float = settings.CATALOG_MAX_AGE):
+        self.collection = WORD_CARDS_COLLECTION
+        self.max_age = max_age
+        self.cards: Dict[str, dict] = {}
+        self.headwords: List[Entry] = []
+        self.translations: List[Entry] = []
+        self.built_at: Optional[datetime] = None
+        self.loaded = False
+        self.stale = True
+        self.refreshed_at = 0.0
+        self._flight = SingleFlight("word_search_refresh")
+        self.refreshes = metrics.counter("word_search_refreshes", "Word search index refreshes, by kind")
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    async def search(self, db: AsyncDatabase, q: str, limit: int = 10) -> List[dict]:
+        if self.stale or time.monotonic() - self.refreshed_at >= self.max_age:
+            await self._flight.do("refresh", lambda: self.refresh(db))
+        return self.lookup(q, limit)
+
+    def lookup(self, q: str, limit: int) -> List[dict]:
+        """Headword matches first, then translation matches, each in key order."""
+        prefix = fold(q)
+        if not prefix:
+            return []
+        found: Dict[str, dict] = {}
+        for entries in (self.headwords, self.translations):
+            i = bisect.bisect_left(entries, (prefix, ""))
+            while i < len(entries) and len(found) < limit and entries[i][0].startswith(prefix):
+                card_id = entries[i][1]
+                if card_id not in found:
+                    found[card_id] = self.cards[card_id]
+                i += 1
+        return [
+            {"id": card["id"], "word": card["word"], "translation": card["translation"], "level": card["level"]}
+            for card in found.values()
+        ]
+
+    async def refresh(self, db: AsyncDatabase) -> None:
+        # Cleared first: a change landing while we read marks the index stale again.
+        self.stale = False
+        self.refreshed_at = time.monotonic()
+        try:
+            if self.loaded:
+                await self._merge_changes(db)
+            else:
+                await self._load(db)
+        except Exception:
+            self.stale = True
+            raise
+
+    async def _load(self, db: AsyncDatabase) -> None:
+        cards = await db[WORD_CARDS_COLLECTION].find({}, SEARCH_FIELDS).to_list(None)
+        self.cards = {card["id"]: card for card in cards}
+        self._sort()
+        self.built_at = max((card["built_at"] for card in cards if card.get("built_at")), default=None)
+        self.loaded = True
+        self.refreshes.labels(kind="full").inc()
+        logger.info(f"Loaded word search index: {len(self.cards)} cards")
+
+    async def _merge_changes(self, db: AsyncDatabase) -> None:
+        fetched = await db[WORD_CARDS_COLLECTION].find(self._changes_filter(), SEARCH_FIELDS).to_list(None)
+        total = await db[WORD_CARDS_COLLECTION].count_documents({})
+        changed = [card for card in fetched if not _same_entry(self.cards.get(card["id"]), card)]
+
+        if len(changed) > MERGE_LIMIT:
+            for card in changed:
+                self.cards[card["id"]] = card
+            self._sort()
+        else:
+            for card in changed:
+                self._remove(self.cards.get(card["id"]))
+                self.cards[card["id"]] = card
+                self._insert(card)
+        self.built_at = max([self.built_at] + [c["built_at"] for c in fetched if c.get("built_at")], key=_sort_time)
+
+        if total != len(self.cards):
+            # Something was deleted (or written without a build time); start over.
+            await self._load(db)
+            return
+        self.refreshes.labels(kind="incremental").inc()
+
+    def _changes_filter(self) -> dict:
+        if self.built_at is None:
+            return {}
+        now = datetime.now(timezone.utc)
+        if self.built_at.tzinfo is None:
+            # Dates come back naive (UTC) unless the client is tz_aware.
+            now = now.replace(tzinfo=None)
+        op = "$gte" if now - self.built_at < SETTLE_TIME else "$gt"
+        return {"built_at": {op: self.built_at}}
+
+    def _sort(self) -> None:
+        self.headwords = sorted((key, card_id) for card_id, card in self.cards.items() for key in _keys(card.get("word")))
+        self.translations = sorted(
+            (key, card_id) for card_id, card in self.cards.items() for key in _keys(card.get("translation"))
+        )
+
+    def _insert(self, card: dict) -> None:
+        for key in _keys(card.get("word")):
+            bisect.insort(self.headwords, (key, card["id"]))
+        for key in _keys(card.get("translation")):
+            bisect.insort(self.translations, (key, card["id"]))
+
+    def _remove(self, card: Optional[dict]) -> None:
+        if card is None:
+            return
+        for entries, text in ((self.headwords, card.get("word")), (self.translations, card.get("translation"))):
+            for key in _keys(text):
+                i = bisect.bisect_left(entries, (key, card["id"]))
+                if i < len(entries) and entries[i] == (key, card["id"]):
+                    del entries[i]
+
+
+def _same_entry(old: Optional[dict], new: dict) -> bool:
+    return old is not None and all(old.get(field) == new.get(field) for field in ("word", "translation", "level"))
+
+
+def _sort_time(value: Optional[datetime]) -> datetime:
+    return value or datetime.min
+
+
+word_search = catalogs.register(WordSearchIndex())
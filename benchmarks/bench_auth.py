@@ -0,0 +1,292 @@
+"""
+Authentication load benchmark.
+
+Drives get_current_user, get_optional_user and RoleChecker through the real
+FastAPI app (middleware included) at a fixed concurrency, against a local
+identitytoolkit stand-in with configurable latency and error rate. Mongo is
+replaced by an in-memory user store with its own latency so that only the
+auth path is measured.
+
+Each mode wires the auth layer differently; add an entry to MODES to compare
+a new strategy against the baseline:
+
+    python -m benchmarks.bench_auth --requests 2000 --concurrency 32 --latency 0.05
+    python -m benchmarks.bench_auth --modes baseline session
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import Depends
+
+from app import dependencies
+from app.core import http
+from app.core.cache import SingleFlight, TTLCache
+from app.core.ratelimit import KeyedTokenBucket
+from app.core.security import UserRole
+from app.db.mongodb import get_database
+from app.main import app
+from app.models.user import UserInDB
+from app.services import firebase_auth, session_tokens
+from app.services.token_verifier import FirebaseTokenVerifier, SigningKeyCache
+from benchmarks.fake_identity import IdentityServer
+
+PROJECT_ID = "bench-project"
+KID = "bench-key"
+ENDPOINTS = {
+    "get_current_user": "/_bench/current",
+    "get_optional_user": "/_bench/optional",
+    "RoleChecker": "/_bench/role",
+}
+
+
+# --- In-process stand-ins -------------------------------------------------
+
+class FakeUsers:
+    """Just enough of a Mongo collection for the auth dependencies."""
+
+    def __init__(self, docs: Dict[str, dict], latency: float):
+        self.docs = docs
+        self.latency = latency
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.docs.get(query["_id"])
+
+
+class NoFlight:
+    """Stand-in for SingleFlight that never coalesces."""
+
+    async def do(self, key, fn):
+        return await fn()
+
+
+def _install_probe_routes():
+    async def current(user: UserInDB = Depends(dependencies.get_current_user)):
+        return {"id": user.id}
+
+    async def optional(user=Depends(dependencies.get_optional_user)):
+        return {"id": user.id if user else None}
+
+    async def role():
+        return {"ok": True}
+
+    app.add_api_route(ENDPOINTS["get_current_user"], current, include_in_schema=False)
+    app.add_api_route(ENDPOINTS["get_optional_user"], optional, include_in_schema=False)
+    app.add_api_route(
+        ENDPOINTS["RoleChecker"],
+        role,
+        dependencies=[Depends(dependencies.RoleChecker([UserRole.ADMIN, UserRole.TEACHER]))],
+        include_in_schema=False,
+    )
+
+
+# --- Modes ----------------------------------------------------------------
+
+@dataclass
+class Context:
+    private_key: object
+    public_pem: str
+    users: List[str]
+    firebase_tokens: Dict[str, str] = field(default_factory=dict)
+
+
+def _reset_auth_layer(cache: bool, flight: bool):
+    size = 10000 if cache else 0
+    ttl = 60 if cache else 0
+    dependencies.token_cache = TTLCache("token_cache", size, ttl)
+    dependencies.principal_cache = TTLCache("principal_cache", size, ttl)
+    dependencies.rejected_token_cache = TTLCache("rejected_token_cache", size, ttl)
+    dependencies.auth_flight = SingleFlight("auth_resolve") if flight else NoFlight()
+    dependencies.auth_failures = KeyedTokenBucket(rate=1e9, burst=1e9)
+    session_tokens.session_signer = None
+
+
+def _local_verifier(ctx: Context) -> FirebaseTokenVerifier:
+    async def fetcher():
+        return {KID: ctx.public_pem}, 3600
+
+    return FirebaseTokenVerifier(PROJECT_ID, SigningKeyCache(fetcher))
+
+
+def mode_baseline(ctx: Context) -> Dict[str, str]:
+    """Remote accounts:lookup + user read on every request."""
+    _reset_auth_layer(cache=False, flight=False)
+    firebase_auth.token_verifier = None
+    return ctx.firebase_tokens
+
+
+def mode_cached(ctx: Context) -> Dict[str, str]:
+    """Remote lookup behind the token/principal caches and single flight."""
+    _reset_auth_layer(cache=True, flight=True)
+    firebase_auth.token_verifier = None
+    return ctx.firebase_tokens
+
+
+def mode_local(ctx: Context) -> Dict[str, str]:
+    """Local RS256 verification, no caches."""
+    _reset_auth_layer(cache=False, flight=False)
+    firebase_auth.token_verifier = _local_verifier(ctx)
+    return ctx.firebase_tokens
+
+
+def mode_local_cached(ctx: Context) -> Dict[str, str]:
+    """Local RS256 verification behind the caches and single flight."""
+    _reset_auth_layer(cache=True, flight=True)
+    firebase_auth.token_verifier = _local_verifier(ctx)
+    return ctx.firebase_tokens
+
+
+def mode_session(ctx: Context) -> Dict[str, str]:
+    """Backend HS256 session tokens."""
+    _reset_auth_layer(cache=True, flight=True)
+    signer = session_tokens.SessionSigner("bench-session-secret-0123456789abcdef", [], ttl=3600)
+    session_tokens.session_signer = signer
+    return {
+        uid: signer.issue(UserInDB(id=uid, email=f"{uid}@example.com", role="teacher", permissions=[]))[0]
+        for uid in ctx.users
+    }
+
+
+MODES: Dict[str, Callable[[Context], Dict[str, str]]] = {
+    "baseline": mode_baseline,
+    "cached": mode_cached,
+    "local": mode_local,
+    "local+cached": mode_local_cached,
+    "session": mode_session,
+}
+
+
+# --- Load generation ------------------------------------------------------
+
+def percentile(samples: List[float], q: float) -> float:
+    index = min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))
+    return samples[index]
+
+
+async def drive(client: httpx.AsyncClient, path: str, tokens: List[str], requests: int, concurrency: int, fanout: int):
+    """Send `requests` GETs with `concurrency` workers; `fanout` consecutive requests share a token."""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            token = tokens[(i // fanout) % len(tokens)]
+            start = time.perf_counter()
+            response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "statuses": statuses,
+    }
+
+
+def make_context(user_count: int) -> Context:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    ctx = Context(private_key, public_pem, [f"bench-user-{i}" for i in range(user_count)])
+    now = int(time.time())
+    for uid in ctx.users:
+        ctx.firebase_tokens[uid] = jwt.encode(
+            {
+                "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+                "aud": PROJECT_ID,
+                "sub": uid,
+                "iat": now,
+                "exp": now + 3600,
+                "auth_time": now,
+                "email": f"{uid}@example.com",
+            },
+            private_key,
+            algorithm="RS256",
+            headers={"kid": KID},
+        )
+    return ctx
+
+
+async def run(args):
+    ctx = make_context(args.users)
+    users = FakeUsers(
+        {uid: {"_id": uid, "email": f"{uid}@example.com", "role": "teacher", "permissions": []} for uid in ctx.users},
+        latency=args.db_latency,
+    )
+    app.dependency_overrides[get_database] = lambda: {"user": users}
+    _install_probe_routes()
+
+    print(
+        f"{args.requests} requests/endpoint, concurrency {args.concurrency}, fan-out {args.fanout}, "
+        f"{args.users} users, identity latency {args.latency * 1000:.0f} ms, "
+        f"error rate {args.error_rate:.0%}, db latency {args.db_latency * 1000:.1f} ms"
+    )
+    header = f"{'mode':<13} {'endpoint':<18} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'upstream':>9} {'db reads':>9}  statuses"
+    print(header)
+    print("-" * len(header))
+
+    with IdentityServer(latency=args.latency, error_rate=args.error_rate) as server:
+        firebase_auth.FIREBASE_AUTH_URL = server.base_url
+        http.open_http_client(verify=server.certfile)
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for mode in args.modes:
+                    token_map = MODES[mode](ctx)
+                    tokens = [token_map[uid] for uid in ctx.users]
+                    for endpoint, path in ENDPOINTS.items():
+                        calls_before, reads_before = server.calls, users.reads
+                        result = await drive(client, path, tokens, args.requests, args.concurrency, args.fanout)
+                        print(
+                            f"{mode:<13} {endpoint:<18} {result['rps']:>8.0f} "
+                            f"{result['p50'] * 1000:>8.2f} {result['p95'] * 1000:>8.2f} {result['p99'] * 1000:>8.2f} "
+                            f"{server.calls - calls_before:>9} {users.reads - reads_before:>9}  "
+                            f"{dict(sorted(result['statuses'].items()))}"
+                        )
+        finally:
+            await http.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Authentication load benchmark")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fanout", type=int, default=6, help="consecutive requests sharing one token (SPA page load)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.03, help="identitytoolkit latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of identitytoolkit calls answered with 503")
+    parser.add_argument("--db-latency", type=float, default=0.001, help="user lookup latency in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
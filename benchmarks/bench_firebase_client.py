@@ -0,0 +1,78 @@
+"""
+Per-call latency of Firebase REST calls: fresh client per call vs shared pool.
+
+The "fresh" mode reproduces the old behaviour (a new httpx.AsyncClient, and
+so a new TCP+TLS handshake, for every call); "shared" goes through
+app.core.http exactly as the app does after startup.
+
+    python -m benchmarks.bench_firebase_client --calls 300
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+import httpx
+
+from app.core import http
+from app.services import firebase_auth
+from benchmarks.fake_identity import IdentityServer
+
+
+def summarize(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:>7}: mean {statistics.mean(samples) * 1000:7.2f} ms  "
+        f"p50 {statistics.median(samples) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+    )
+
+
+async def fresh_client_call(url: str, certfile: str):
+    async with httpx.AsyncClient(verify=certfile) as client:
+        response = await client.post(url, json={"idToken": "bench.uid"})
+    response.raise_for_status()
+
+
+async def run(calls: int, latency: float):
+    with IdentityServer(latency=latency) as server:
+        firebase_auth.FIREBASE_AUTH_URL = server.base_url
+        lookup_url = f"{server.base_url}:lookup?key=bench"
+
+        fresh = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            await fresh_client_call(lookup_url, server.certfile)
+            fresh.append(time.perf_counter() - start)
+
+        http.open_http_client(verify=server.certfile)
+        shared = []
+        try:
+            for _ in range(calls):
+                start = time.perf_counter()
+                await firebase_auth.get_user_by_token("bench.uid")
+                shared.append(time.perf_counter() - start)
+        finally:
+            await http.close_http_client()
+
+    print(f"{calls} sequential accounts:lookup calls, {latency * 1000:.0f} ms server latency")
+    summarize("fresh", fresh)
+    summarize("shared", shared)
+    print(f"speedup (mean): {statistics.mean(fresh) / statistics.mean(shared):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial server latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Motor vs the native PyMongo async client on the hot read endpoints.
+
+Calls the real `get_words_by_level` and `get_flashcard_session` handlers at a
+fixed concurrency against a local mongod, once per driver. Motor hands every
+operation to its own thread pool (cpu_count * 5 workers) and back; PyMongo's
+AsyncMongoClient does its I/O on the event loop. Motor is no longer an app
+dependency, so install it separately to get the "before" numbers:
+
+    pip install motor
+    python -m benchmarks.bench_mongo_driver --uri mongodb://localhost:27017 --seed 2000
+    python -m benchmarks.bench_mongo_driver --uri mongodb://localhost:27017 --concurrency 64 --drivers pymongo
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+from pymongo import AsyncMongoClient
+from starlette.requests import Request
+
+from app.models.user import UserInDB
+from app.routers.flashcards import get_flashcard_session
+from app.routers.words import get_words_by_level
+from benchmarks.bench_projections import seed
+
+DATABASE = "bench_driver"
+# A bare JSON request; the handlers only look at its Accept header and state.
+REQUEST = Request({"type": "http", "headers": []})
+USER = UserInDB(id="bench-driver-user", email="bench@example.com", role="student_free", permissions=[])
+
+
+def pymongo_client(uri: str, pool_size: int):
+    return AsyncMongoClient(uri, maxPoolSize=pool_size)
+
+
+def motor_client(uri: str, pool_size: int):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(uri, maxPoolSize=pool_size)
+
+
+DRIVERS: Dict[str, Callable] = {"motor": motor_client, "pymongo": pymongo_client}
+
+
+async def read_words(level: str, db) -> None:
+    response = await get_words_by_level(level=level, request=REQUEST, cursor=None, limit=None, db=db)
+    async for _ in response.body_iterator:
+        pass
+
+
+def percentile(samples: List[float], q: float) -> float:
+    index = min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))
+    return samples[index]
+
+
+async def drive(call, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            next_index += 1
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+async def run_driver(name: str, args) -> None:
+    client = DRIVERS[name](args.uri, args.pool_size)
+    db = client.get_database(DATABASE)
+    # One active session, so the authenticated path measures the read side.
+    await db["flashcard_sessions"].delete_many({"user_id": USER.id})
+    await get_flashcard_session(level=args.level, request=REQUEST, user=USER, db=db)
+
+    endpoints = {
+        "get_words_by_level": lambda: read_words(args.level, db),
+        "flashcards (anon)": lambda: get_flashcard_session(level=args.level, request=REQUEST, user=None, db=db),
+        "flashcards (session)": lambda: get_flashcard_session(level=args.level, request=REQUEST, user=USER, db=db),
+    }
+    for endpoint, call in endpoints.items():
+        for _ in range(args.warmup):
+            await call()
+        threads_before = threading.active_count()
+        result = await drive(call, args.requests, args.concurrency)
+        print(
+            f"{name:<8} {endpoint:<22} {result['rps']:>8.0f} {result['p50'] * 1000:>8.2f} "
+            f"{result['p99'] * 1000:>8.2f} {max(threading.active_count(), threads_before):>8}"
+        )
+
+    closed = client.close()
+    if asyncio.iscoroutine(closed):
+        await closed
+
+
+async def run(args):
+    if args.seed:
+        client = AsyncMongoClient(args.uri)
+        await seed(client.get_database(DATABASE), args.seed)
+        await client.close()
+
+    print(
+        f"{args.requests} requests/endpoint, concurrency {args.concurrency}, "
+        f"pool {args.pool_size}, level {args.level}"
+    )
+    header = f"{'driver':<8} {'endpoint':<22} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'threads':>8}"
+    print(header)
+    print("-" * len(header))
+    for name in args.drivers:
+        try:
+            await run_driver(name, args)
+        except ImportError as e:
+            print(f"{name:<8} skipped: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor vs PyMongo async benchmark")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--drivers", nargs="+", choices=list(DRIVERS), default=list(DRIVERS))
+    parser.add_argument("--seed", type=int, default=0, help="insert N synthetic words per level first")
+    parser.add_argument("--level", default="A1")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
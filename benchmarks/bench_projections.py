@@ -0,0 +1,155 @@
+"""
+Bytes over the wire and decode time, whole documents vs named projections.
+
+Runs every router read shape twice against a real MongoDB, once reading
+whole source documents and once the way the router does: through the
+projections in app.db.queries, and from word_cards for word reads. Documents are fetched
+as RawBSONDocument, so the byte count is exactly what the server sent and
+decoding is timed separately from the round trip:
+
+    python -m benchmarks.bench_projections                       # app settings
+    python -m benchmarks.bench_projections --uri mongodb://localhost:27017 --seed 3000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from typing import List, Optional
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import AsyncMongoClient
+
+from app.db import queries
+from app.db.mongodb import DATABASE_NAME, create_mongo_client
+from app.db.word_cards import WORD_CARDS_COLLECTION, rebuild_word_cards
+
+RAW = CodecOptions(document_class=RawBSONDocument)
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+LANGUAGES = ["en", "fr", "es", "it", "pt", "pl", "tr", "ru", "uk", "ar", "zh", "ja"]
+
+
+def synthetic_word(level: str, i: int) -> dict:
+    """A word shaped like the ingested ones: tests, all translations, audio metadata."""
+    word = f"Wort{i}"
+    return {
+        "word": word,
+        "cerf_level": level,
+        "ipa_transcription": f"/vɔʁt{i}/",
+        "part_of_speech": "noun",
+        "gender": random.choice(["der", "die", "das"]),
+        "translations": [
+            {"language_code": code, "content": f"{code}-{word}", "examples": [f"{word} example in {code}."] * 2}
+            for code in LANGUAGES
+        ],
+        "audio": {
+            gender: f"https://storage.example/hackathon/audio/{word.lower()}_{gender[0]}.mp3"
+            for gender in ("male", "female")
+        } | {"voice_ids": ["rachel", "drew"], "duration_ms": 830, "generated_at": "2025-01-01T00:00:00Z"},
+        "tests": [
+            {
+                "question_type": "multiple_choice",
+                "question": f"Was bedeutet '{word}'? Wählen Sie die richtige Übersetzung aus der Liste.",
+                "options": [{"text": f"option {j} for {word}", "is_correct": j == 0} for j in range(4)],
+                "explanation": f"'{word}' ist ein häufiges Substantiv auf Niveau {level}." * 2,
+            }
+            for _ in range(5)
+        ],
+    }
+
+
+async def seed(db, per_level: int) -> None:
+    await db["words"].drop()
+    for level in LEVELS:
+        await db["words"].insert_many([synthetic_word(level, i) for i in range(per_level)])
+    await db["words"].create_index("cerf_level")
+    await db[WORD_CARDS_COLLECTION].create_index([("level", 1), ("_id", 1)])
+    await rebuild_word_cards(db)
+
+
+async def fetch(collection, filter: dict, projection: Optional[dict], pipeline: Optional[List[dict]] = None):
+    start = time.perf_counter()
+    if pipeline is not None:
+        docs = await (await collection.aggregate(pipeline)).to_list(None)
+    else:
+        docs = await collection.find(filter, projection).to_list(None)
+    round_trip = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for doc in docs:
+        bson.decode(doc.raw)
+    decode = time.perf_counter() - start
+    return len(docs), sum(len(doc.raw) for doc in docs), round_trip, decode
+
+
+async def compare(name: str, repeat: int, run_full, run_projected) -> None:
+    full = [await run_full() for _ in range(repeat)]
+    projected = [await run_projected() for _ in range(repeat)]
+    count, full_bytes = full[0][0], full[0][1]
+    projected_bytes = projected[0][1]
+    med = lambda runs, i: statistics.median(r[i] for r in runs) * 1000
+    print(
+        f"{name:<22} {count:>6} {full_bytes / 1024:>10.1f} {projected_bytes / 1024:>10.1f} "
+        f"{(1 - projected_bytes / full_bytes) if full_bytes else 0:>7.0%} "
+        f"{med(full, 3):>9.2f} {med(projected, 3):>9.2f} "
+        f"{med(full, 2):>9.2f} {med(projected, 2):>9.2f}"
+    )
+
+
+async def run(args):
+    client = AsyncMongoClient(args.uri) if args.uri else create_mongo_client()
+    db = client.get_database(args.database or (DATABASE_NAME if not args.seed else "bench_projections"))
+    if args.seed:
+        await seed(db, args.seed)
+
+    words = db["words"].with_options(codec_options=RAW)
+    cards = db[WORD_CARDS_COLLECTION].with_options(codec_options=RAW)
+    podcasts = db["podcasts"].with_options(codec_options=RAW)
+    levels = args.levels or sorted(l for l in await db["words"].distinct("cerf_level") if l)
+
+    header = (
+        f"{'shape':<22} {'docs':>6} {'full KiB':>10} {'proj KiB':>10} {'saved':>7} "
+        f"{'dec full':>9} {'dec proj':>9} {'rt full':>9} {'rt proj':>9}"
+    )
+    print(f"median of {args.repeat} runs, times in ms")
+    print(header)
+    print("-" * len(header))
+    for level in levels:
+        await compare(
+            f"words/{level}", args.repeat,
+            lambda: fetch(words, {"cerf_level": level}, None),
+            lambda: fetch(cards, {"level": level}, queries.WORD_LIST_ITEM),
+        )
+    await compare(
+        "speaking fallback", args.repeat,
+        lambda: fetch(words, {}, None, [{"$sample": {"size": 5}}]),
+        lambda: fetch(cards, {}, None, [{"$sample": {"size": 5}}, {"$project": queries.TARGET_WORD}]),
+    )
+    if await db["podcasts"].estimated_document_count():
+        await compare(
+            "podcasts list", args.repeat,
+            lambda: fetch(podcasts, {}, None),
+            lambda: fetch(podcasts, {}, queries.PODCAST_LIST_ITEM),
+        )
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Projection bytes/decode benchmark")
+    parser.add_argument("--uri", help="MongoDB URI (defaults to the app settings)")
+    parser.add_argument("--database", help="database name (defaults to the app's, or a scratch one with --seed)")
+    parser.add_argument("--levels", nargs="+", help="CEFR levels to read (default: all in the collection)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="insert N synthetic words per level into a scratch database first")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
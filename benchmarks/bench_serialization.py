@@ -0,0 +1,206 @@
+"""
+CPU per request, default FastAPI serialization vs FastJSONResponse.
+
+Each hot list payload is served twice from an in-process app: once the way
+the routers used to (Pydantic models checked against `response_model`, or
+plain dicts through jsonable_encoder), once as pre-shaped dicts returned in
+a FastJSONResponse. Requests go through the ASGI stack with httpx, without
+a socket or a database, and process CPU time is divided by the number of
+requests:
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --requests 2000 --words 1000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.core.responses import FastJSONResponse
+from app.models.podcast import PodcastListItem
+from app.models.speaking import SpeakingHistoryItem, SpeakingHistoryResponse
+from app.models.test import TestHistoryItem, TestQuestion, TestSession
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def podcasts(n: int) -> List[dict]:
+    return [
+        {
+            "id": str(ObjectId()),
+            "title": f"Im Café, Folge {i}",
+            "cefr_level": "A2",
+            "context": "Das Café",
+            "duration": "4:12",
+            "audio_url": f"http://testserver/podcasts/{i}/audio",
+            "created_at": NOW - timedelta(hours=i),
+        }
+        for i in range(n)
+    ]
+
+
+def test_session(n: int) -> dict:
+    return {
+        "level": "A1",
+        "questions": [
+            {
+                "word_id": str(ObjectId()),
+                "word": f"Wort{i}",
+                "question_type": "meaning",
+                "question": f"Was bedeutet 'Wort{i}'?",
+                "options": [f"option {j}" for j in range(4)],
+                "correct_answer": "option 0",
+                "explanation": f"'Wort{i}' ist ein häufiges Substantiv.",
+                "difficulty": "easy",
+            }
+            for i in range(n)
+        ],
+        "total_questions": n,
+    }
+
+
+def test_history(n: int) -> List[dict]:
+    return [
+        {
+            "id": str(ObjectId()),
+            "level": "A1",
+            "score": 80,
+            "total_questions": 20,
+            "correct_answers": 16,
+            "percentage": 80.0,
+            "completed_at": NOW - timedelta(days=i),
+        }
+        for i in range(n)
+    ]
+
+
+def speaking_history(n: int) -> dict:
+    return {
+        "sessions": [
+            {
+                "id": str(ObjectId()),
+                "createdAt": NOW - timedelta(days=i),
+                "questionText": "Beschreiben Sie Ihren Tag.",
+                "score": 72,
+                "cefrLevel": "A2",
+                "targetWordsCount": 5,
+                "wordsUsedCorrectly": 4,
+            }
+            for i in range(n)
+        ],
+        "total": n,
+    }
+
+
+def words(n: int) -> List[dict]:
+    return [
+        {
+            "id": str(ObjectId()),
+            "original": f"Wort{i}",
+            "translation": f"word {i}",
+            "pronunciation": f"vɔʁt{i}",
+            "audioMale": f"/audio/wort{i}_m.mp3",
+            "audioFemale": f"/audio/wort{i}_f.mp3",
+            "level": 0,
+        }
+        for i in range(n)
+    ]
+
+
+def build_app(args) -> Tuple[FastAPI, Dict[str, Tuple[str, str]]]:
+    app = FastAPI()
+    data = {
+        "podcasts": podcasts(50),
+        "test_start": test_session(20),
+        "test_history": test_history(args.history),
+        "speaking_history": speaking_history(args.history),
+        "words": words(args.words),
+    }
+
+    # Before: what the routers did, building models and letting FastAPI check them.
+    @app.get("/before/podcasts", response_model=List[PodcastListItem])
+    async def podcasts_before():
+        return [PodcastListItem(**p) for p in data["podcasts"]]
+
+    @app.get("/before/test_start", response_model=TestSession)
+    async def test_start_before():
+        session = data["test_start"]
+        return TestSession(
+            level=session["level"],
+            questions=[TestQuestion(**q) for q in session["questions"]],
+            total_questions=session["total_questions"],
+        )
+
+    @app.get("/before/test_history", response_model=List[TestHistoryItem])
+    async def test_history_before():
+        return [TestHistoryItem(**h) for h in data["test_history"]]
+
+    @app.get("/before/speaking_history", response_model=SpeakingHistoryResponse)
+    async def speaking_history_before():
+        history = data["speaking_history"]
+        return SpeakingHistoryResponse(
+            sessions=[SpeakingHistoryItem(**s) for s in history["sessions"]], total=history["total"]
+        )
+
+    @app.get("/before/words")
+    async def words_before():
+        return data["words"]
+
+    # After: the same payloads, already shaped, straight to bytes.
+    def fast(name: str) -> Callable:
+        async def endpoint():
+            return FastJSONResponse(data[name])
+        return endpoint
+
+    for name in data:
+        app.add_api_route(f"/after/{name}", fast(name), methods=["GET"])
+
+    return app, {name: (f"/before/{name}", f"/after/{name}") for name in data}
+
+
+async def cpu_per_request(client: httpx.AsyncClient, path: str, requests: int) -> Tuple[float, int]:
+    for _ in range(min(50, requests)):
+        response = await client.get(path)
+    start = time.process_time()
+    for _ in range(requests):
+        response = await client.get(path)
+    return (time.process_time() - start) / requests, len(response.content)
+
+
+async def run(args):
+    app, routes = build_app(args)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        print(f"{args.requests} requests per path, CPU µs per request")
+        header = f"{'payload':<18} {'bytes':>9} {'before':>10} {'after':>10} {'saved':>7}"
+        print(header)
+        print("-" * len(header))
+        for name, (before_path, after_path) in routes.items():
+            before, size = await cpu_per_request(client, before_path, args.requests)
+            after, _ = await cpu_per_request(client, after_path, args.requests)
+            print(
+                f"{name:<18} {size:>9} {before * 1e6:>10.0f} {after * 1e6:>10.0f} "
+                f"{1 - after / before:>7.0%}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization CPU benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--words", type=int, default=500, help="cards in the /words/{level} payload")
+    parser.add_argument("--history", type=int, default=20, help="items in the history payloads")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Latency of /words/search lookups against the in-memory index.
+
+Builds the index from synthetic cards (no database) and times prefix
+lookups of one to four characters, the way autocomplete sends them, then
+times an incremental merge of a small batch of changed cards:
+
+    python -m benchmarks.bench_word_search
+    python -m benchmarks.bench_word_search --cards 50000 --lookups 20000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import string
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "bench")
+
+from app.services.word_search import WordSearchIndex
+
+LETTERS = string.ascii_lowercase + "äöüß"
+T0 = datetime(2025, 1, 1)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class _Cards:
+    def __init__(self, cards):
+        self.cards = {card["id"]: card for card in cards}
+
+    def find(self, filter, projection=None):
+        since = filter.get("built_at", {}).get("$gte")
+        return _Cursor([c for c in self.cards.values() if since is None or c["built_at"] >= since])
+
+    async def count_documents(self, filter):
+        return len(self.cards)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 12)))
+
+
+def cards(n: int, rng: random.Random) -> List[dict]:
+    articles = ["der ", "die ", "das ", ""]
+    return [
+        {
+            "id": str(i),
+            "word": rng.choice(articles) + _word(rng).capitalize(),
+            "translation": rng.choice(["to ", "the ", ""]) + _word(rng),
+            "level": rng.choice(["A1", "A2", "B1", "B2", "C1"]),
+            "built_at": T0,
+        }
+        for i in range(n)
+    ]
+
+
+def percentile(samples: List[float], p: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def run(args):
+    rng = random.Random(7)
+    store = _Cards(cards(args.cards, rng))
+    db = {"word_cards": store}
+    index = WordSearchIndex()
+
+    start = time.perf_counter()
+    await index.search(db, "a")
+    print(f"full load of {args.cards} cards: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    queries = [_word(rng)[: rng.randint(1, 4)] for _ in range(args.lookups)]
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        index.lookup(q, args.limit)
+        samples.append(time.perf_counter() - start)
+    print(
+        f"{args.lookups} lookups, limit {args.limit}: "
+        f"p50 {percentile(samples, 0.5) * 1e6:.0f} µs, p99 {percentile(samples, 0.99) * 1e6:.0f} µs, "
+        f"max {max(samples) * 1e6:.0f} µs"
+    )
+
+    changed = rng.sample(list(store.cards), args.changes)
+    for card_id in changed:
+        store.cards[card_id] = dict(store.cards[card_id], word=_word(rng), built_at=T0 + timedelta(minutes=1))
+    index.invalidate()
+    start = time.perf_counter()
+    await index.search(db, "a")
+    print(f"incremental merge of {args.changes} cards: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word search latency benchmark")
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=50, help="cards rewritten before the incremental merge")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local stand-in for the Firebase identitytoolkit REST API.
+
+Serves the accounts:* endpoints used by app/services/firebase_auth.py over
+HTTPS with a self-signed certificate, with optional artificial latency and
+a configurable share of 5xx errors.
+"""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+
+import jwt
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks._tls import make_self_signed_cert
+
+
+def _uid_for_token(token: str) -> str:
+    """JWTs resolve to their `sub`; anything else to its last dotted segment."""
+    try:
+        return jwt.decode(token, options={"verify_signature": False})["sub"]
+    except (jwt.PyJWTError, KeyError):
+        return token.split(".")[-1] or "uid"
+
+
+def create_identity_app(latency: float = 0.0, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.errors = 0
+
+    @app.post("/v1/{action}")
+    async def accounts(action: str, request: Request):
+        app.state.calls += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            app.state.errors += 1
+            return JSONResponse(status_code=503, content={"error": {"message": "BACKEND_ERROR"}})
+        body = await request.json()
+        if action == "accounts:lookup":
+            token = body.get("idToken", "")
+            return {"users": [{"localId": _uid_for_token(token), "email": "bench@example.com"}]}
+        if action in ("accounts:signInWithPassword", "accounts:signUp"):
+            return {
+                "idToken": "bench-token",
+                "email": body["email"],
+                "refreshToken": "refresh",
+                "expiresIn": "3600",
+                "localId": "bench-uid",
+            }
+        if action == "accounts:sendOobCode":
+            return {"email": body.get("email", "bench@example.com")}
+        return JSONResponse(status_code=404, content={"error": {"message": "UNKNOWN_ACTION"}})
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class IdentityServer:
+    """Runs the stand-in in a background thread; use as a context manager."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.app = create_identity_app(latency, error_rate)
+        self.port = _free_port()
+        self.certfile, self.keyfile = make_self_signed_cert()
+        self.server = uvicorn.Server(uvicorn.Config(
+            self.app,
+            host="127.0.0.1",
+            port=self.port,
+            ssl_certfile=self.certfile,
+            ssl_keyfile=self.keyfile,
+            log_level="warning",
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"https://127.0.0.1:{self.port}/v1/accounts"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    @property
+    def errors(self) -> int:
+        return self.app.state.errors
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
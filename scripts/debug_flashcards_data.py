@@ -1,11 +1,11 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from app.core.config import settings
 
 async def check_words():
     uri = f"mongodb+srv://{settings.MONGO_USER}:{settings.MONGO_PASSWORD}@{settings.MONGO_ADDRESS}/?appName={settings.MONGO_CLUSTER}"
     print(f"Connecting to: {uri.split('@')[1]}") # Log safe part of URI
-    client = AsyncIOMotorClient(uri)
+    client = AsyncMongoClient(uri)
     db = client.get_database("hackathon")
     
     count = await db["words"].count_documents({"cerf_level": "A1"})
@@ -3,7 +3,7 @@
 
 import os
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 import urllib.parse
 
@@ -28,7 +28,7 @@ COLLECTION_NAME = "words"
 
 async def check_test_fields():
     print("Connecting to MongoDB...")
-    client = AsyncIOMotorClient(MONGO_URI)
+    client = AsyncMongoClient(MONGO_URI)
     db = client[DB_NAME]
     collection = db[COLLECTION_NAME]
     
@@ -111,10 +111,10 @@ async def check_test_fields():
         {"$group": {"_id": "$cerf_level", "count": {"$sum": 1}}},
         {"$sort": {"_id": 1}}
     ]
-    async for doc in collection.aggregate(pipeline):
+    async for doc in await collection.aggregate(pipeline):
         print(f"  {doc['_id']}: {doc['count']} words")
     
-    client.close()
+    await client.close()
     print("\nDone!")
 
 
@@ -1,7 +1,7 @@
 
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,7 +21,7 @@ async def debug_mongo():
     print(f"Connecting to: {uri.replace(password, '****')}")
 
     try:
-        client = AsyncIOMotorClient(uri)
+        client = AsyncMongoClient(uri)
         # Using "hackathon" database as in app/db/mongodb.py
         db = client.get_database("hackathon")
         
@@ -38,7 +38,7 @@ async def debug_mongo():
             { "$match": { "cerf_level": "A1" } },
             { "$limit": 10 }
         ]
-        cursor = db["words"].aggregate(pipeline)
+        cursor = await db["words"].aggregate(pipeline)
         
         print("\nChecking audio for first 10 A1 words:")
         async for doc in cursor:
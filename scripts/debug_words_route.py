@@ -1,7 +1,7 @@
 
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 # Import the route handler directly
 # We need to hack the path to make imports work if running from root
@@ -20,8 +20,8 @@ class MockDB:
     def __getitem__(self, item):
         return self.client.get_database("hackathon")[item]
         
-    def aggregate(self, pipeline):
-        return self.client.get_database("hackathon")["words"].aggregate(pipeline)
+    async def aggregate(self, pipeline):
+        return await self.client.get_database("hackathon")["words"].aggregate(pipeline)
 
 async def debug_route():
     try:
@@ -32,7 +32,7 @@ async def debug_route():
         uri = f"mongodb+srv://{user}:{password}@{address}/?appName={cluster}"
         
         print("Connecting to DB...")
-        client = AsyncIOMotorClient(uri)
+        client = AsyncMongoClient(uri)
         db = client.get_database("hackathon")
         
         print("Calling get_word_decks directly...")
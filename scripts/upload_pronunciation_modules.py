@@ -14,9 +14,11 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 
+from app.db.catalog import bump_version
+
 load_dotenv()
 
 # Pronunciation modules data
@@ -266,7 +268,7 @@ async def upload_modules():
     uri = f"mongodb+srv://{mongo_user}:{mongo_password}@{mongo_address}/?appName={mongo_cluster}"
 
     print(f"Connecting to MongoDB...")
-    client = AsyncIOMotorClient(uri)
+    client = AsyncMongoClient(uri)
     db = client.get_database("hackathon")
 
     collection = db["pronunciation_modules"]
@@ -298,6 +300,9 @@ async def upload_modules():
         elif result.modified_count > 0:
             updated_count += 1
 
+    # Running servers without change streams poll this to drop cached module summaries.
+    await bump_version(db, "pronunciation_modules")
+
     print(f"\nUpload complete!")
     print(f"  - Inserted: {inserted_count} new modules")
     print(f"  - Updated: {updated_count} existing modules")
@@ -330,7 +335,7 @@ async def upload_modules():
         print(f"    Exercises: {len(module['exercises'])}")
         print(f"    Description: {module['description'][:50]}...")
 
-    client.close()
+    await client.close()
     print("\nDone!")
 
 
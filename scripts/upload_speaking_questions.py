@@ -14,9 +14,11 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 
+from app.db.catalog import bump_version
+
 load_dotenv()
 
 # Speaking questions data - organized by level
@@ -1752,7 +1754,7 @@ async def upload_questions():
     uri = f"mongodb+srv://{mongo_user}:{mongo_password}@{mongo_address}/?appName={mongo_cluster}"
     
     print(f"Connecting to MongoDB...")
-    client = AsyncIOMotorClient(uri)
+    client = AsyncMongoClient(uri)
     db = client.get_database("hackathon")
     
     collection = db["speaking_questions"]
@@ -1786,6 +1788,9 @@ async def upload_questions():
         elif result.modified_count > 0:
             updated_count += 1
     
+    # Running servers without change streams poll this to drop cached themes.
+    await bump_version(db, "speaking_questions")
+
     print(f"\nUpload complete!")
     print(f"  - Inserted: {inserted_count} new questions")
     print(f"  - Updated: {updated_count} existing questions")
@@ -1815,7 +1820,7 @@ async def upload_questions():
             count = await collection.count_documents({"level": level, "theme": theme})
             print(f"    - {theme}: {count} question(s)")
     
-    client.close()
+    await client.close()
     print("\nDone!")
 
 
@@ -2,9 +2,15 @@
 import os
 import json
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 import urllib.parse
+import sys
+
+# Run from the repository root so the app package is importable.
+sys.path.append(os.getcwd())
+from app.db.catalog import bump_version
+from app.db.word_cards import WORD_CARDS_COLLECTION, upsert_word_cards
 
 # Load environment variables
 load_dotenv()
@@ -26,7 +32,7 @@ DB_NAME = "hackathon" # Using a generic name, or could be 'sprache' based on pro
 COLLECTION_NAME = "words"
 
 async def upload_files():
-    client = AsyncIOMotorClient(MONGO_URI)
+    client = AsyncMongoClient(MONGO_URI)
     db = client[DB_NAME]
     collection = db[COLLECTION_NAME]
     
@@ -60,6 +66,7 @@ async def upload_files():
                 
                 if len(batch) >= batch_size:
                     await collection.insert_many(batch)
+                    await upsert_word_cards(db, batch)
                     count += len(batch)
                     print(f"Uploaded {count} documents...")
                     batch = []
@@ -69,10 +76,16 @@ async def upload_files():
 
     if batch:
         await collection.insert_many(batch)
+        await upsert_word_cards(db, batch)
         count += len(batch)
 
+    if count:
+        # Running servers without change streams poll these to drop cached decks and cards.
+        await bump_version(db, COLLECTION_NAME)
+        await bump_version(db, WORD_CARDS_COLLECTION)
+
     print(f"Finished. Total documents uploaded: {count}")
-    client.close()
+    await client.close()
 
 if __name__ == "__main__":
     asyncio.run(upload_files())
@@ -1,7 +1,7 @@
 
 import os
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from dotenv import load_dotenv
 import urllib.parse
 
@@ -23,7 +23,7 @@ MONGO_URI = f"mongodb+srv://{escaped_username}:{escaped_password}@{MONGO_ADDRESS
 OUTPUT_FILE = "mongo_verification.txt"
 
 async def verify_databases():
-    client = AsyncIOMotorClient(MONGO_URI)
+    client = AsyncMongoClient(MONGO_URI)
     
     results = []
     
@@ -49,7 +49,7 @@ async def verify_databases():
     except Exception as e:
         results.append(f"Error: {e}")
     
-    client.close()
+    await client.close()
     
     with open(OUTPUT_FILE, "w") as f:
         f.write("\n".join(results))
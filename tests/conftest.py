@@ -0,0 +1,254 @@
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, List, Optional
+
+from bson import ObjectId
+
+# Required settings must exist before anything imports app.core.config.
+for _name in ("MONGO_USER", "MONGO_PASSWORD", "MONGO_ADDRESS", "MONGO_CLUSTER", "FIREBASE_API"):
+    os.environ.setdefault(_name, "test")
+
+
+# --- in-memory Mongo fakes ---------------------------------------------------
+# Shared by the tests that need a collection; import them with
+# `from conftest import FakeCollection`.
+
+_MISSING = object()
+
+
+def _get(doc: dict, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+def evaluate(expr: Any, doc: dict) -> Any:
+    """The handful of aggregation operators the app's projections and pipelines use."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == "$literal":
+        return args
+    if op == "$switch":
+        for branch in args["branches"]:
+            if evaluate(branch["case"], doc):
+                return evaluate(branch["then"], doc)
+        return evaluate(args["default"], doc)
+    if op == "$size":
+        return len(evaluate(args, doc))
+    values = [evaluate(arg, doc) for arg in args]
+    if op == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$max":
+        return max(values)
+    if op == "$multiply":
+        return values[0] * values[1]
+    if op == "$round":
+        return float(round(values[0], values[1]))
+    if op == "$add":
+        if isinstance(values[0], datetime):
+            return values[0] + timedelta(milliseconds=values[1])
+        return sum(values)
+    raise NotImplementedError(op)
+
+
+def apply_pipeline(pipeline: List[dict], doc: dict) -> dict:
+    """A `$set`-only update pipeline applied to `doc`."""
+    for stage in pipeline:
+        doc = {**doc, **{field: evaluate(expr, doc) for field, expr in stage["$set"].items()}}
+    return doc
+
+
+def matches(doc: dict, filter: dict) -> bool:
+    operators = {
+        "$in": lambda value, arg: value in arg,
+        "$gt": lambda value, arg: value is not _MISSING and value > arg,
+        "$gte": lambda value, arg: value is not _MISSING and value >= arg,
+        "$lt": lambda value, arg: value is not _MISSING and value < arg,
+        "$lte": lambda value, arg: value is not _MISSING and value <= arg,
+    }
+    for field, cond in filter.items():
+        value = _get(doc, field)
+        if isinstance(cond, dict) and cond and all(key.startswith("$") for key in cond):
+            if not all(operators[op](value, arg) for op, arg in cond.items()):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(doc)
+    if all(value in (0, False) for value in projection.values()):
+        return {key: value for key, value in doc.items() if key not in projection}
+    out = {} if projection.get("_id", 1) in (0, False) or "_id" not in doc else {"_id": doc["_id"]}
+    for field, spec in projection.items():
+        if field == "_id" and spec in (0, 1, True, False):
+            continue
+        if spec in (1, True):
+            value = _get(doc, field)
+            if value is _MISSING:
+                continue
+            target, *rest = field.split(".")
+            if rest:
+                # Keep the nesting of dotted paths.
+                out.setdefault(target, {})[".".join(rest)] = value
+            else:
+                out[field] = value
+        elif isinstance(spec, str) and spec.startswith("$") and _get(doc, spec[1:]) is _MISSING:
+            continue
+        else:
+            out[field] = evaluate(spec, doc)
+    return out
+
+
+class FakeCursor:
+    """An async cursor over `docs`."""
+
+    def __init__(self, docs: Iterable[dict]):
+        self.docs = list(docs)
+        self.closed = False
+
+    def sort(self, *args, **kwargs) -> "FakeCursor":
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self.docs[:length]
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeCollection:
+    """
+    A collection held in memory.
+
+    Reads honour equality, `$in` and range filters, projections, `sort` and
+    `limit`; `aggregate` answers with `aggregate(pipeline)`. Reads are kept in
+    `finds` (filter, projection, sort, limit), `pipelines` and `cursors`, and
+    `update_one` calls in `updates`, for assertions.
+    """
+
+    def __init__(self, docs: Iterable[dict] = (), aggregate: Optional[Callable[[list], Iterable[dict]]] = None):
+        self.docs = [dict(doc) for doc in docs]
+        self._aggregate = aggregate or (lambda pipeline: [])
+        self.finds: List[SimpleNamespace] = []
+        self.pipelines: List[list] = []
+        self.cursors: List[FakeCursor] = []
+        self.updates: List[tuple] = []
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.finds) + len(self.pipelines)
+
+    def put(self, doc: dict) -> None:
+        """Insert `doc`, or replace the one with its `_id`."""
+        self.docs = [d for d in self.docs if d.get("_id") != doc.get("_id")] + [dict(doc)]
+
+    def _select(self, filter: Optional[dict], projection: Optional[dict], sort=None, limit: int = 0) -> List[dict]:
+        self.finds.append(SimpleNamespace(filter=filter or {}, projection=projection, sort=sort, limit=limit))
+        docs = [doc for doc in self.docs if matches(doc, filter or {})]
+        for field, direction in reversed(list(dict(sort or {}).items())):
+            docs.sort(key=lambda doc: _get(doc, field), reverse=direction < 0)
+        if limit:
+            docs = docs[:limit]
+        return [project(doc, projection) for doc in docs]
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, **kwargs) -> FakeCursor:
+        self.cursors.append(FakeCursor(self._select(filter, projection, sort, limit)))
+        return self.cursors[-1]
+
+    async def find_one(self, filter=None, projection=None, **kwargs) -> Optional[dict]:
+        docs = self._select(filter, projection, limit=1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: dict) -> int:
+        return sum(1 for doc in self.docs if matches(doc, filter))
+
+    async def aggregate(self, pipeline: list) -> FakeCursor:
+        self.pipelines.append(pipeline)
+        return FakeCursor(self._aggregate(pipeline))
+
+    async def insert_one(self, doc: dict):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(dict(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False):
+        self.updates.append((filter, update))
+        doc = next((doc for doc in self.docs if matches(doc, filter)), None)
+        matched = int(doc is not None)
+        if doc is None and not upsert:
+            return SimpleNamespace(matched_count=0)
+        if doc is None:
+            doc = dict(filter)
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        return SimpleNamespace(matched_count=matched)
+
+    async def find_one_and_update(self, filter: dict, update: list, projection=None, upsert=False, **kwargs):
+        """Pipeline updates only; returns the document after the update."""
+        current = next((doc for doc in self.docs if matches(doc, filter)), None)
+        if current is None:
+            if not upsert:
+                return None
+            current = dict(filter)
+            self.docs.append(current)
+        updated = apply_pipeline(update, current)
+        current.clear()
+        current.update(updated)
+        return project(current, projection)
+
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        # ReplaceOne by `_id` is all the app writes in bulk through these fakes.
+        for request in requests:
+            self.put({**request._doc, "_id": request._filter["_id"]})
+
+    async def delete_many(self, filter: dict):
+        kept = [doc for doc in self.docs if not matches(doc, filter)]
+        deleted, self.docs = len(self.docs) - len(kept), kept
+        return SimpleNamespace(deleted_count=deleted)
+
+
+def _aggregate_word_cards(docs: List[dict], pipeline: list) -> List[dict]:
+    if "$group" in pipeline[0]:
+        # app.db.card_versions
+        levels: dict = {}
+        for doc in docs:
+            count, built_at = levels.get(doc["level"], (0, doc["built_at"]))
+            levels[doc["level"]] = (count + 1, max(built_at, doc["built_at"]))
+        return [{"_id": level, "cards": count, "built_at": built_at} for level, (count, built_at) in levels.items()]
+    # queries.sample_word_ids; "random" is the stored order.
+    sampled = [{"_id": doc["_id"]} for doc in docs if matches(doc, pipeline[0]["$match"])]
+    return sampled[: pipeline[-1]["$sample"]["size"]]
+
+
+def fake_word_cards(count: int, level: str = "A1", built_at: datetime = datetime(2025, 1, 1)) -> FakeCollection:
+    """`word_cards` holding `count` cards at `level` in ascending `_id` order."""
+    ids = sorted(ObjectId() for _ in range(count))
+    cards = FakeCollection(
+        (
+            {"_id": oid, "id": str(oid), "level": level, "word": f"w{i}", "translation": f"t{i}", "built_at": built_at}
+            for i, oid in enumerate(ids)
+        ),
+        aggregate=lambda pipeline: _aggregate_word_cards(cards.docs, pipeline),
+    )
+    return cards
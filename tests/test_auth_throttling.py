@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import State
+
+from app import dependencies
+from app.core.ratelimit import KeyedTokenBucket
+
+
+def make_request(ip="203.0.113.7"):
+    return SimpleNamespace(state=State(), client=SimpleNamespace(host=ip))
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    async def reject(token):
+        calls.append(token)
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    monkeypatch.setattr(dependencies, "verify_id_token", reject)
+    dependencies.token_cache.clear()
+    dependencies.rejected_token_cache.clear()
+    return calls
+
+
+def authenticate(token, ip="203.0.113.7"):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(dependencies.get_current_user(make_request(ip), f"Bearer {token}", db={}))
+    return exc.value.status_code
+
+
+def test_rejected_token_is_not_sent_upstream_again(upstream, monkeypatch):
+    monkeypatch.setattr(dependencies, "auth_failures", KeyedTokenBucket(rate=0, burst=100))
+
+    assert authenticate("garbage") == 401
+    assert authenticate("garbage") == 401
+    assert upstream == ["garbage"]
+
+
+def test_repeated_failures_from_one_ip_are_throttled(upstream, monkeypatch):
+    monkeypatch.setattr(dependencies, "auth_failures", KeyedTokenBucket(rate=0, burst=3))
+
+    statuses = [authenticate(f"garbage-{i}") for i in range(5)]
+    assert statuses == [401, 401, 401, 429, 429]
+    assert len(upstream) == 3
+
+    # Other clients are unaffected.
+    assert authenticate("garbage-other", ip="198.51.100.1") == 401
+
+
+def test_token_bucket_refills(monkeypatch):
+    from app.core import ratelimit
+
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    bucket = KeyedTokenBucket(rate=0.5, burst=1)
+
+    bucket.consume("ip")
+    assert bucket.is_limited("ip")
+    now[0] += 2
+    assert not bucket.is_limited("ip")
+
+
+def test_cached_principals_are_not_throttled_by_someone_elses_failures(upstream, monkeypatch):
+    monkeypatch.setattr(dependencies, "auth_failures", KeyedTokenBucket(rate=0, burst=1))
+    user = dependencies.UserInDB(id="u1", email="u1@example.com", role="student_free", permissions=[])
+    dependencies.token_cache.set(dependencies._token_key("good"), "u1")
+    dependencies.principal_cache.set("u1", dependencies.ResolvedUser({"_id": "u1"}, user))
+
+    # A client behind the same address burns the bucket...
+    assert [authenticate(f"garbage-{i}") for i in range(2)] == [401, 429]
+    # ...but a signed-in user whose token is cached still gets through.
+    resolved = asyncio.run(dependencies.get_current_user(make_request(), "Bearer good", db={}))
+    assert resolved.id == "u1"
+    dependencies.principal_cache.pop("u1")
+
+
+def test_client_ip_is_read_through_trusted_proxies_only(monkeypatch):
+    import ipaddress
+
+    monkeypatch.setattr(dependencies, "_trusted_proxies", [ipaddress.ip_network("172.16.0.0/12")])
+
+    def ip(peer, forwarded=None):
+        headers = {"x-forwarded-for": forwarded} if forwarded else {}
+        return dependencies._client_ip(SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers))
+
+    assert ip("172.18.0.5", "203.0.113.7") == "203.0.113.7"
+    # The client can prepend anything; only the hop our proxy appended counts.
+    assert ip("172.18.0.5", "198.51.100.9, 203.0.113.7") == "203.0.113.7"
+    assert ip("172.18.0.5", "203.0.113.7, 172.18.0.9") == "203.0.113.7"
+    # Untrusted peers can't pick their own bucket.
+    assert ip("203.0.113.7", "198.51.100.9") == "203.0.113.7"
+    assert ip("172.18.0.5") == "172.18.0.5"
@@ -0,0 +1,79 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from app.db.catalog import Catalog, CatalogRegistry
+
+
+def test_concurrent_misses_share_one_build():
+    builds = 0
+
+    async def build(db):
+        nonlocal builds
+        builds += 1
+        await asyncio.sleep(0.01)
+        return [builds]
+
+    async def scenario():
+        catalog = Catalog("test_shared", "words", build, max_age=60)
+        first = await asyncio.gather(*(catalog.get(None) for _ in range(20)))
+        return first, await catalog.get(None)
+
+    first, cached = asyncio.run(scenario())
+
+    assert builds == 1
+    assert all(value == [1] for value in first)
+    assert cached == [1]
+
+
+def test_invalidation_during_build_is_not_masked():
+    builds = 0
+
+    async def scenario():
+        catalog = None
+
+        async def build(db):
+            nonlocal builds
+            builds += 1
+            if builds == 1:
+                catalog.invalidate()
+            return builds
+
+        catalog = Catalog("test_overtaken", "words", build, max_age=60)
+        return await catalog.get(None), await catalog.get(None), await catalog.get(None)
+
+    assert asyncio.run(scenario()) == (1, 2, 2)
+
+
+class FakeVersions:
+    def __init__(self):
+        self.version = 1
+
+    async def find_one(self, filter, projection=None):
+        return {"_id": filter["_id"], "version": self.version}
+
+
+class StandaloneCollection:
+    async def watch(self, pipeline=None):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets")
+
+
+def test_watcher_falls_back_to_polling_the_version():
+    versions = FakeVersions()
+    db = {"words": StandaloneCollection(), "catalog_versions": versions}
+
+    async def scenario():
+        registry = CatalogRegistry()
+        catalog = registry.register(Catalog("test_polled", "words", lambda db: asyncio.sleep(0, "decks"), max_age=60))
+        registry.start(db, poll_interval=0.01)
+        await asyncio.sleep(0.03)
+        before = catalog.generation
+        versions.version += 1
+        await asyncio.sleep(0.03)
+        await registry.stop()
+        return before, catalog.generation
+
+    before, after = asyncio.run(scenario())
+
+    assert before == 0
+    assert after == 1
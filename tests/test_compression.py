@@ -0,0 +1,144 @@
+import gzip
+import zlib
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+BODY = "ein ziemlich wiederholbarer Satz " * 200
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, exclude_paths=[r"^/audio/"])
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("kurz")
+
+    @app.get("/stream")
+    def stream():
+        async def lines():
+            for i in range(50):
+                yield f'{{"line":{i}}}\n'
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/audio/{name}")
+    def audio(name: str):
+        return PlainTextResponse(BODY)
+
+    @app.get("/mp3")
+    def mp3():
+        return Response(BODY.encode(), media_type="audio/mpeg")
+
+    return TestClient(app)
+
+
+def _raw(client, path, encoding="gzip"):
+    # Read the body as sent, without httpx decoding it.
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    if compression.brotli is None:
+        assert choose_encoding("br") is None
+
+
+def test_large_body_is_gzipped_and_counted():
+    sent = compression.bytes_out.labels(encoding="gzip").value
+    response, raw = _raw(_app(), "/big")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) == len(raw) < len(BODY)
+    assert gzip.decompress(raw).decode() == BODY
+    assert compression.bytes_out.labels(encoding="gzip").value == sent + len(raw)
+
+
+def test_small_bodies_and_excluded_paths_are_left_alone():
+    client = _app()
+
+    for path in ("/small", "/audio/haus_m.mp3", "/mp3"):
+        response, raw = _raw(client, path)
+        assert "content-encoding" not in response.headers, path
+    assert raw == BODY.encode()
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    response, raw = _raw(_app(), "/stream")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(raw).decode().splitlines()
+    assert lines == [f'{{"line":{i}}}' for i in range(50)]
+
+
+def _layered_app():
+    # As in main.py: an `@app.middleware("http")` layer and CORS under the
+    # compression middleware, so bodies arrive re-streamed in several chunks.
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+    @app.middleware("http")
+    async def passthrough(request: Request, call_next):
+        return await call_next(request)
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("kurz")
+
+    @app.get("/empty")
+    def empty():
+        return Response(status_code=204)
+
+    return TestClient(app)
+
+
+def test_small_bodies_behind_http_middleware_are_left_alone():
+    client = _layered_app()
+    skipped = compression.skipped.labels(reason="small").value
+
+    response, raw = _raw(client, "/small")
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == "4" and raw == b"kurz"
+    assert compression.skipped.labels(reason="small").value == skipped + 1
+
+    preflight = client.options(
+        "/big",
+        headers={"Origin": "http://example.com", "Access-Control-Request-Method": "GET", "Accept-Encoding": "gzip"},
+    )
+    assert "content-encoding" not in preflight.headers
+    assert preflight.headers["content-length"] == "2" and preflight.content == b"OK"
+
+
+def test_large_bodies_behind_http_middleware_are_compressed():
+    client = _layered_app()
+
+    response, raw = _raw(client, "/big")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == BODY
+
+    response = client.get("/empty", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 204 and "content-encoding" not in response.headers
+    response = client.head("/big", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
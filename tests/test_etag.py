@@ -0,0 +1,37 @@
+from fastapi import Request
+
+from app.core.etag import content_etag, matches, not_modified
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_content_etag_is_strong_and_stable():
+    etag = content_etag("decks", [{"level": "A1", "wordCount": 3}])
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == content_etag("decks", [{"level": "A1", "wordCount": 3}])
+    assert etag != content_etag("decks", [{"level": "A1", "wordCount": 4}])
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = content_etag("x")
+
+    assert matches(_request(etag), etag)
+    assert matches(_request(f'"other", W/{etag}'), etag)
+    assert matches(_request("*"), etag)
+    assert not matches(_request('"other"'), etag)
+    assert not matches(_request(), etag)
+
+
+def test_not_modified_carries_the_tag_and_policy():
+    etag = content_etag("x")
+
+    response = not_modified(_request(etag), etag, "public, no-cache")
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert not_modified(_request('"other"'), etag, "public, no-cache") is None
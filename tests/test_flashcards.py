@@ -0,0 +1,164 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Request
+
+from app.db.card_versions import word_card_versions
+from app.models.user import UserInDB
+from app.routers.flashcards import MAX_SESSION_SIZE, FlashcardReview, get_flashcard_session, review_flashcard
+
+from conftest import FakeCollection, fake_word_cards
+
+USER = UserInDB(id="u1", email="u1@example.com", role="student_free", permissions=[])
+
+
+def _reviews(due):
+    """flashcard_reviews holding due dates for some of u1's A1 words."""
+    return FakeCollection({"user_id": "u1", "level": "A1", "word_id": oid, "due_at": at} for oid, at in due.items())
+
+
+def _cards_read(cards):
+    return sum(len(cursor.docs) for cursor in cards.cursors)
+
+
+def _active(session):
+    return {"user_id": "u1", "level": "A1", "is_active": True, **session}
+
+
+def teardown_function():
+    word_card_versions.invalidate()
+
+
+def _request(user_doc=None):
+    return Request({"type": "http", "headers": [], "state": {"user_doc": user_doc} if user_doc else {}})
+
+
+def _session(db, request, user):
+    response = asyncio.run(get_flashcard_session(level="A1", request=request, user=user, db=db))
+    return json.loads(response.body)
+
+
+def test_anonymous_session_is_sampled_by_the_server():
+    cards = fake_word_cards(500)
+    body = _session({"word_cards": cards}, _request(), None)
+
+    assert body["totalWords"] == 30
+    assert cards.pipelines == [[{"$match": {"level": "A1"}}, {"$project": {"_id": 1}}, {"$sample": {"size": 30}}]]
+    # Only the sampled cards are read.
+    assert _cards_read(cards) == 30
+
+
+def test_new_session_honors_flashcards_per_session():
+    cards, sessions, reviews = fake_word_cards(500), FakeCollection(), _reviews({})
+    db = {"word_cards": cards, "flashcard_sessions": sessions, "flashcard_reviews": reviews}
+
+    body = _session(db, _request({"_id": "u1", "settings": {"flashcards_per_session": 12}}), USER)
+    assert body["totalWords"] == 12
+    assert len(sessions.docs[0]["word_ids"]) == 12
+
+    db["flashcard_sessions"] = FakeCollection()
+    _session(db, _request({"_id": "u1", "settings": {"flashcards_per_session": 10_000}}), USER)
+    assert reviews.finds[-2].limit == MAX_SESSION_SIZE
+
+
+def test_new_session_puts_due_cards_first_and_skips_scheduled_ones():
+    cards = fake_word_cards(50)
+    ids = [doc["_id"] for doc in cards.docs]
+    now = datetime.now(timezone.utc)
+    overdue, due, later = ids[5], ids[6], ids[0]
+    reviews = _reviews({due: now - timedelta(hours=1), overdue: now - timedelta(days=3), later: now + timedelta(days=2)})
+    db = {"word_cards": cards, "flashcard_sessions": FakeCollection(), "flashcard_reviews": reviews}
+
+    body = _session(db, _request({"_id": "u1", "settings": {"flashcards_per_session": 5}}), USER)
+
+    ids = [word["id"] for word in body["words"]]
+    assert ids[:2] == [str(overdue), str(due)]
+    assert len(ids) == 5 and len(set(ids)) == 5
+    assert str(later) not in ids
+    assert reviews.finds[0].sort == [("due_at", 1)]
+
+
+def test_new_session_snapshots_cards():
+    cards, sessions = fake_word_cards(40), FakeCollection()
+    db = {"word_cards": cards, "flashcard_sessions": sessions, "flashcard_reviews": _reviews({})}
+
+    body = _session(db, _request({"_id": "u1", "settings": {"flashcards_per_session": 5}}), USER)
+
+    (session,) = sessions.docs
+    assert session["cards"] == body["words"]
+    assert session["word_ids"] == [ObjectId(card["id"]) for card in body["words"]]
+    assert session["catalog_version"] == [40, datetime(2025, 1, 1)]
+
+
+def test_resume_reads_only_the_session_document():
+    cards = fake_word_cards(40)
+    snapshot = [{"id": doc["id"], "targetWord": doc["word"]} for doc in cards.docs[:3]]
+    sessions = FakeCollection([_active({
+        "_id": ObjectId(), "word_ids": [doc["_id"] for doc in cards.docs[:3]], "cards": snapshot,
+        "catalog_version": [40, datetime(2025, 1, 1)], "current_index": 2,
+    })])
+
+    body = _session({"word_cards": cards, "flashcard_sessions": sessions}, _request(), USER)
+
+    assert body["words"] == snapshot and body["currentIndex"] == 2
+    assert cards.cursors == [] and sessions.updates == []
+
+
+def test_resume_refreshes_a_stale_snapshot():
+    cards = fake_word_cards(40)
+    word_ids = [doc["_id"] for doc in cards.docs[:3]]
+    session = _active({"_id": ObjectId(), "word_ids": [str(oid) for oid in word_ids],
+                       "cards": [{"id": "old"}], "catalog_version": [39, datetime(2025, 1, 1)]})
+    sessions = FakeCollection([session])
+
+    body = _session({"word_cards": cards, "flashcard_sessions": sessions}, _request(), USER)
+
+    assert [card["id"] for card in body["words"]] == [str(oid) for oid in word_ids]
+    ((filter, update),) = sessions.updates
+    assert filter == {"_id": session["_id"]}
+    assert update["$set"]["catalog_version"] == [40, datetime(2025, 1, 1)]
+    assert update["$set"]["word_ids"] == word_ids
+
+
+def test_review_needs_a_card_at_the_level():
+    cards, reviews = fake_word_cards(3), FakeCollection()
+    word_id = cards.docs[0]["_id"]
+    db = {"word_cards": cards, "flashcard_reviews": reviews}
+
+    def review(level, word_id):
+        return asyncio.run(review_flashcard(level=level, review=FlashcardReview(word_id=word_id, grade=4), user=USER, db=db))
+
+    assert json.loads(review("A1", str(word_id)).body)["interval"] == 1
+    for level, unknown in (("A1", str(ObjectId())), ("B2", str(word_id))):
+        with pytest.raises(HTTPException) as excinfo:
+            review(level, unknown)
+        assert excinfo.value.status_code == 404
+    assert [doc["word_id"] for doc in reviews.docs] == [word_id]
+
+
+def test_refreshed_snapshot_keeps_the_position_on_the_same_card():
+    cards = fake_word_cards(40)
+    kept = [doc["_id"] for doc in cards.docs[:3]]
+    gone = [ObjectId(), ObjectId()]
+    word_ids = [kept[0], gone[0], kept[1], gone[1], kept[2]]
+    sessions = FakeCollection([_active({
+        "_id": ObjectId(), "word_ids": word_ids, "cards": [{"id": str(oid)} for oid in word_ids],
+        "catalog_version": [39, datetime(2025, 1, 1)], "current_index": 2,
+    })])
+    db = {"word_cards": cards, "flashcard_sessions": sessions}
+
+    body = _session(db, _request(), USER)
+
+    # Two cards were deleted; index 2 pointed at kept[1], now at 1.
+    assert body["totalWords"] == 3
+    assert body["words"][body["currentIndex"]]["id"] == str(kept[1])
+    ((_, update),) = sessions.updates
+    assert update["$set"]["current_index"] == 1
+
+    # A position past the end, or on a deleted last card, is clamped to the last card.
+    sessions.docs[0].update(catalog_version=[39, datetime(2025, 1, 1)], current_index=4, word_ids=word_ids[:4])
+    body = _session(db, _request(), USER)
+    assert body["currentIndex"] == 1 == sessions.updates[-1][1]["$set"]["current_index"]
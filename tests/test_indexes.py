@@ -0,0 +1,54 @@
+import asyncio
+
+from app.db import indexes
+
+
+class FakeCollection:
+    def __init__(self):
+        self.models = []
+
+    async def create_indexes(self, models):
+        self.models.extend(models)
+        return [m.document["name"] for m in models]
+
+
+class FakeDB(dict):
+    def __init__(self, explains=None):
+        super().__init__()
+        self.explains = explains or {}
+
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    async def command(self, name, command, verbosity=None):
+        target = command.get("find") or command.get("aggregate") or command.get("distinct")
+        return self.explains.get(target, {"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}})
+
+
+def test_ensure_indexes_creates_every_registered_index():
+    db = FakeDB()
+    created = asyncio.run(indexes.ensure_indexes(db))
+
+    assert len(created) == sum(len(models) for models in indexes.INDEXES.values())
+    ttl = db["revoked_sessions"].models[0].document
+    assert ttl["expireAfterSeconds"] == 0
+
+
+def test_audit_flags_collscan_and_blocking_sort():
+    aggregate_explain = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {
+        "stage": "PROJECTION_SIMPLE", "inputStage": {"stage": "COLLSCAN"},
+    }}}}]}
+    find_explain = {"queryPlanner": {
+        "winningPlan": {"stage": "SORT", "inputStage": {"stage": "IXSCAN"}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}],
+    }}
+    db = FakeDB({"words": aggregate_explain, "podcasts": find_explain})
+
+    problems = asyncio.run(indexes.audit_query_plans(db))
+
+    assert any(p.startswith("word decks: COLLSCAN") for p in problems)
+    assert any(p.startswith("podcasts: SORT") for p in problems)
+    # Rejected plans don't count, and other collections stay clean.
+    assert not any("COLLSCAN" in p and "podcasts" in p for p in problems)
+    assert not any(p.startswith("notifications") for p in problems)
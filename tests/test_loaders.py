@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fastapi import Request, Response
+
+from app.db.loaders import BatchLoader, Loaders
+from app.models.user import UserInDB
+from app.routers import pronunciation, tests as tests_router
+
+from conftest import FakeCollection
+
+
+def _round_trips(db):
+    return sum(collection.round_trips for collection in db.values())
+
+
+def _module(i):
+    return {
+        "_id": f"m{i}",
+        "sound_id": f"sound_{i}",
+        "phoneme_ipa": "ʃ",
+        "name": f"Sound {i}",
+        "description": "",
+        "articulatory_tip": "",
+        "difficulty_level": "beginner",
+        "exercises": [{}, {}, {}],
+    }
+
+
+def _pronunciation_db(module_count):
+    return {
+        "pronunciation_modules": FakeCollection(_module(i) for i in range(module_count)),
+        "user_pronunciation_progress": FakeCollection([
+            {"userId": "u1", "sound_id": f"sound_{i}", "total_attempts": 2, "average_score": 40.0, "mastery_level": "practicing"}
+            for i in range(0, module_count, 2)
+        ]),
+    }
+
+
+USER = UserInDB(id="u1", email="u1@example.com", role="student_free", permissions=[])
+
+
+def test_loads_in_one_tick_share_one_batch():
+    batches = []
+
+    async def batch(keys):
+        batches.append(list(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def scenario():
+        loader = BatchLoader("test", batch)
+        first = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+        again = await loader.load_many(["a", "b"])
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert first == ["A", "B", "A", None]
+    assert again == ["A", "B"]
+    assert batches == [["a", "b", "missing"]]
+
+
+def test_failed_batch_fails_every_caller_and_is_retried():
+    calls = 0
+
+    async def batch(keys):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("boom")
+        return {key: key for key in keys}
+
+    async def scenario():
+        loader = BatchLoader("test", batch)
+        results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+        return results, await loader.load("a")
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retried == "a"
+
+
+@pytest.mark.parametrize("module_count", [3, 30])
+def test_pronunciation_modules_round_trips_are_constant(module_count):
+    db = _pronunciation_db(module_count)
+
+    pronunciation.module_summaries.invalidate()
+
+    modules = asyncio.run(pronunciation.get_pronunciation_modules(
+        request=Request({"type": "http", "headers": []}), response=Response(),
+        user=USER, db=db, difficulty=None, loaders=Loaders(db)
+    ))
+
+    assert len(modules) == module_count
+    assert modules[0].user_progress.total_attempts == 2
+    assert modules[1].user_progress is None
+    assert _round_trips(db) == 2
+
+
+@pytest.mark.parametrize("module_count", [3, 30])
+def test_recommended_modules_round_trips_are_constant(module_count):
+    db = _pronunciation_db(module_count)
+
+    modules = asyncio.run(pronunciation.get_recommended_modules(
+        user=USER, db=db, limit=3, loaders=Loaders(db)
+    ))
+
+    # Unstarted modules come first.
+    assert modules[0].user_progress is None
+    assert _round_trips(db) == 2
+
+
+@pytest.mark.parametrize("levels", [["A1"], ["A1", "A2", "B1", "B2", "C1", "C2"]])
+def test_test_levels_round_trips_are_constant(levels):
+    db = {
+        "words": FakeCollection(aggregate=lambda pipeline: [{"_id": level, "question_count": 10} for level in levels]),
+        "test_results": FakeCollection(aggregate=lambda pipeline: [{"_id": "A1", "best_score": 80, "attempts": 4}]),
+    }
+
+    result = asyncio.run(tests_router.get_test_levels(db=db, user=USER, loaders=Loaders(db)))
+
+    assert result[0].best_score == 80 and result[0].attempts == 4
+    assert all(level.attempts == 0 for level in result[1:])
+    assert _round_trips(db) == 2
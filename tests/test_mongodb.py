@@ -0,0 +1,162 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.db import mongodb
+from app.db import monitoring
+from app.db.monitoring import CommandMetricsListener, PoolMetricsListener, query_shape, track_route_queries
+
+
+class FakeAdmin:
+    async def command(self, name):
+        await asyncio.sleep(0.01)
+        return {"ok": 1}
+
+
+class FakeClient:
+    def __init__(self):
+        self.admin = FakeAdmin()
+        self.closed = False
+
+    def get_database(self, name):
+        return SimpleNamespace(name=name, client=self)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_concurrent_first_use_builds_one_client(monkeypatch):
+    built = []
+
+    def create(**overrides):
+        built.append(FakeClient())
+        return built[-1]
+
+    monkeypatch.setattr(mongodb, "create_mongo_client", create)
+
+    async def scenario():
+        databases = await asyncio.gather(*(mongodb.get_database() for _ in range(20)))
+        await mongodb.close_mongo_connection()
+        return databases
+
+    databases = asyncio.run(scenario())
+
+    assert len(built) == 1
+    assert all(database is databases[0] for database in databases)
+    assert built[0].closed
+    assert mongodb.db.client is None
+
+
+def test_connect_callbacks_run_once_the_client_exists(monkeypatch):
+    attempts = []
+
+    def create(**overrides):
+        attempts.append(overrides)
+        if len(attempts) == 1:
+            raise ConnectionError("SRV lookup failed")
+        return FakeClient()
+
+    monkeypatch.setattr(mongodb, "create_mongo_client", create)
+    started = []
+
+    async def start(database):
+        started.append(database)
+
+    async def scenario():
+        mongodb.on_connect(start)
+        try:
+            await mongodb.connect_to_mongo()
+        except ConnectionError:
+            pass
+        assert started == []
+        database = await mongodb.get_database()
+        await mongodb.get_database()
+        await mongodb.close_mongo_connection()
+        return database
+
+    assert started == [asyncio.run(scenario())]
+
+
+def test_pool_listener_tracks_checkouts():
+    listener = PoolMetricsListener()
+    in_use = listener.in_use.value
+    waits = listener.checkout_wait.count
+    address = ("localhost", 27017)
+
+    listener.connection_checked_out(SimpleNamespace(address=address, connection_id=1, duration=0.002))
+    listener.connection_checked_out(SimpleNamespace(address=address, connection_id=2, duration=0.004))
+    listener.connection_checked_in(SimpleNamespace(address=address, connection_id=1))
+    listener.connection_check_out_failed(SimpleNamespace(address=address, reason="timeout", duration=2.0))
+
+    assert listener.in_use.value == in_use + 1
+    assert listener.checkout_wait.count == waits + 3
+    assert listener.checkout_failed.labels(reason="timeout").value >= 1
+
+
+def _command(listener, request_id, name, command, reply, micros=1500):
+    listener.started(SimpleNamespace(
+        command_name=name, command=command, database_name="hackathon", connection_id=("h", 1), request_id=request_id
+    ))
+    listener.succeeded(SimpleNamespace(
+        command_name=name, reply=reply, duration_micros=micros, connection_id=("h", 1), request_id=request_id
+    ))
+
+
+def test_command_listener_attributes_commands_to_the_route():
+    listener = CommandMetricsListener()
+    per_request = monitoring.route_query_count.labels(route="/tests/levels")
+    requests = per_request.count
+
+    with track_route_queries() as queries:
+        _command(listener, 1, "aggregate", {"aggregate": "words", "pipeline": []}, {"cursor": {"firstBatch": [{}, {}]}})
+        _command(listener, 2, "find", {"find": "test_results", "filter": {}}, {"cursor": {"firstBatch": [{}]}})
+    _command(listener, 3, "find", {"find": "words", "filter": {}}, {"cursor": {"firstBatch": []}})
+    queries.observe("/tests/levels")
+
+    assert queries.count == 2
+    assert abs(queries.seconds - 0.003) < 1e-9
+    assert per_request.count == requests + 1
+    assert monitoring.route_docs_returned.labels(route="/tests/levels", collection="words").value >= 2
+    assert not listener._pending
+
+
+def test_query_shape_hides_literals():
+    command = {
+        "find": "words",
+        "filter": {"cerf_level": "A1", "_id": {"$in": [1, 2, 3]}},
+        "lsid": {"id": "x"},
+        "$db": "hackathon",
+    }
+
+    assert query_shape(command) == {"find": "?", "filter": {"cerf_level": "?", "_id": {"$in": ["?"]}}}
+
+
+def test_route_middleware_names_the_route_up_front_and_counts_streamed_queries(caplog):
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    listener = CommandMetricsListener(slow_query_ms=1)
+    app = FastAPI()
+
+    @app.get("/items/{level}")
+    async def stream_items(level: str):
+        _command(listener, 10, "find", {"find": "word_cards", "filter": {"level": level}}, {"cursor": {"firstBatch": [{}]}})
+
+        async def body():
+            # Later batches are fetched while the response is being sent.
+            _command(listener, 11, "getMore", {"getMore": 1, "collection": "word_cards"}, {"cursor": {"nextBatch": [{}]}})
+            yield b"[]"
+
+        return StreamingResponse(body())
+
+    app.add_middleware(monitoring.RouteQueriesMiddleware, routes=app.router.routes)
+    per_request = monitoring.route_query_count.labels(route="/items/{level}")
+    requests, total = per_request.count, per_request.sum
+
+    with caplog.at_level("WARNING", logger="app.db.slow_queries"):
+        assert TestClient(app).get("/items/A1").status_code == 200
+
+    assert per_request.count == requests + 1
+    assert per_request.sum == total + 2
+    assert len(caplog.messages) == 2
+    assert all("on route /items/{level}:" in message for message in caplog.messages)
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from starlette.datastructures import State
+
+from app import dependencies
+from app.core.cache import TTLCache
+from app.core.ratelimit import KeyedTokenBucket
+
+
+class CountingUsers:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        return self.docs.get(query["_id"])
+
+
+def make_request():
+    return SimpleNamespace(state=State())
+
+
+def make_db(docs):
+    users = CountingUsers(docs)
+    return {"user": users}, users
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache("test_cache", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=-1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None  # least recently used
+    assert cache.get("c") == 3
+
+
+def test_principal_is_cached_until_invalidated(monkeypatch):
+    verifications = []
+
+    async def fake_verify(token):
+        verifications.append(token)
+        return {"localId": "uid-1", "exp": time.time() + 3600}
+
+    monkeypatch.setattr(dependencies, "verify_id_token", fake_verify)
+    dependencies.token_cache.clear()
+    dependencies.principal_cache.clear()
+    db, users = make_db({"uid-1": {"_id": "uid-1", "email": "a@example.com", "role": "teacher"}})
+
+    async def resolve_three_times():
+        for _ in range(3):
+            user = await dependencies.get_current_user(make_request(), "Bearer token-1", db)
+            assert user.role == "teacher"
+
+    asyncio.run(resolve_three_times())
+    assert len(verifications) == 1
+    assert users.reads == 1
+
+    dependencies.invalidate_user("uid-1")
+    asyncio.run(dependencies.get_current_user(make_request(), "Bearer token-1", db))
+    assert len(verifications) == 1
+    assert users.reads == 2
+
+
+def test_expired_token_is_not_cached(monkeypatch):
+    async def fake_verify(token):
+        return {"localId": "uid-1", "exp": time.time() - 1}
+
+    monkeypatch.setattr(dependencies, "verify_id_token", fake_verify)
+    dependencies.token_cache.clear()
+    db, _ = make_db({"uid-1": {"_id": "uid-1", "email": "a@example.com"}})
+
+    asyncio.run(dependencies.get_current_user(make_request(), "Bearer token-2", db))
+    assert len(dependencies.token_cache) == 0
+
+
+def test_concurrent_requests_share_one_verification(monkeypatch):
+    verifications = []
+
+    async def slow_verify(token):
+        verifications.append(token)
+        await asyncio.sleep(0.05)
+        return {"localId": "uid-1", "exp": time.time() + 3600}
+
+    monkeypatch.setattr(dependencies, "verify_id_token", slow_verify)
+    dependencies.token_cache.clear()
+    dependencies.principal_cache.clear()
+    db, users = make_db({"uid-1": {"_id": "uid-1", "email": "a@example.com"}})
+
+    async def page_load():
+        return await asyncio.gather(*(
+            dependencies.get_current_user(make_request(), "Bearer token-3", db) for _ in range(8)
+        ))
+
+    results = asyncio.run(page_load())
+    assert {user.id for user in results} == {"uid-1"}
+    assert len(verifications) == 1
+    assert users.reads == 1
+    assert len(dependencies.auth_flight) == 0
+
+
+def test_failed_verification_reaches_every_waiter_and_is_not_cached(monkeypatch):
+    from fastapi import HTTPException
+
+    verifications = []
+
+    async def failing_verify(token):
+        verifications.append(token)
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    monkeypatch.setattr(dependencies, "verify_id_token", failing_verify)
+    monkeypatch.setattr(dependencies, "auth_failures", KeyedTokenBucket(rate=0, burst=100))
+    dependencies.token_cache.clear()
+    dependencies.rejected_token_cache.clear()
+    db, _ = make_db({})
+
+    async def page_load():
+        return await asyncio.gather(
+            *(dependencies.get_current_user(make_request(), "Bearer bad-token", db) for _ in range(4)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(page_load())
+    assert all(isinstance(r, HTTPException) and r.status_code == 401 for r in results)
+    assert len(verifications) == 1
+
+    # The single flight keeps nothing; only the negative cache remembers
+    # the rejection, and it is a separate, deliberate layer.
+    dependencies.rejected_token_cache.clear()
+    asyncio.run(page_load())
+    assert len(verifications) == 2
+
+
+def test_principal_is_resolved_once_per_request(monkeypatch):
+    async def fake_verify(token):
+        return {"localId": "uid-1", "exp": time.time() + 3600}
+
+    monkeypatch.setattr(dependencies, "verify_id_token", fake_verify)
+    dependencies.token_cache.clear()
+    dependencies.principal_cache.clear()
+    db, users = make_db({"uid-1": {"_id": "uid-1", "email": "a@example.com"}})
+    request = make_request()
+
+    async def resolve_in_one_request():
+        user = await dependencies.get_current_user(request, "Bearer token-4", db)
+        optional = await dependencies.get_optional_user(request, "Bearer token-4", db)
+        doc = await dependencies.get_current_user_doc(request, user)
+        return user, optional, doc
+
+    user, optional, doc = asyncio.run(resolve_in_one_request())
+    assert optional is user
+    assert doc["_id"] == "uid-1"
+    assert users.reads == 1
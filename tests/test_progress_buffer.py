@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.services.progress_buffer import ProgressBuffer
+
+
+class FakeSessions:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def bulk_write(self, requests, ordered=True):
+        if self.fail:
+            raise RuntimeError("primary stepped down")
+        self.batches.append([(r._filter, r._doc) for r in requests])
+
+
+def _run(coro_fn):
+    return asyncio.run(coro_fn())
+
+
+def test_writes_through_until_started():
+    sessions = FakeSessions()
+
+    async def scenario():
+        buffer = ProgressBuffer()
+        await buffer.record({"flashcard_sessions": sessions}, "u1", "A1", 3)
+
+    _run(scenario)
+    assert sessions.batches == [[
+        ({"user_id": "u1", "level": "A1", "is_active": True}, {"$set": {"current_index": 3}}),
+    ]]
+
+
+def test_coalesces_per_user_and_level_and_flushes_at_stop():
+    sessions = FakeSessions()
+    db = {"flashcard_sessions": sessions}
+    session_id = ObjectId()
+
+    async def scenario():
+        buffer = ProgressBuffer()
+        buffer.start(db, interval=60)
+        for index in range(1, 6):
+            await buffer.record(db, "u1", "A1", index, session_id)
+        await buffer.record(db, "u1", "B1", 2)
+        await buffer.record(db, "u2", "A1", 7)
+        assert buffer.pending("u1", "A1", session_id) == 5
+        assert buffer.pending("u1", "A1", ObjectId()) is None
+        assert sessions.batches == []
+        await buffer.stop()
+
+    _run(scenario)
+    (batch,) = sessions.batches
+    assert len(batch) == 3
+    assert ({"user_id": "u1", "level": "A1", "is_active": True, "_id": session_id}, {"$set": {"current_index": 5}}) in batch
+
+
+def test_flushes_early_when_full():
+    sessions = FakeSessions()
+    db = {"flashcard_sessions": sessions}
+
+    async def scenario():
+        buffer = ProgressBuffer(max_pending=2)
+        buffer.start(db, interval=60)
+        await buffer.record(db, "u1", "A1", 1)
+        await buffer.record(db, "u2", "A1", 1)
+        await asyncio.sleep(0.01)
+        assert len(sessions.batches) == 1
+        await buffer.stop()
+
+    _run(scenario)
+
+
+def test_failed_flush_is_retried_without_overwriting_newer_updates():
+    buffer = ProgressBuffer()
+
+    class FlakySessions:
+        async def bulk_write(self, requests, ordered=True):
+            # The user flips another card while the write is in flight.
+            await buffer.record(db, "u1", "A1", 9)
+            raise RuntimeError("primary stepped down")
+
+    db = {"flashcard_sessions": FlakySessions()}
+
+    async def scenario():
+        buffer.start(db, interval=60)
+        await buffer.record(db, "u1", "A1", 1)
+        await buffer.record(db, "u2", "A1", 1)
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        pending = dict(buffer._pending)
+        buffer._pending.clear()
+        await buffer.stop()
+        return pending
+
+    assert _run(scenario) == {("u1", "A1"): (9, None), ("u2", "A1"): (1, None)}
+
+
+def test_discard_drops_a_reset_session():
+    sessions = FakeSessions()
+    db = {"flashcard_sessions": sessions}
+
+    async def scenario():
+        buffer = ProgressBuffer()
+        buffer.start(db, interval=60)
+        await buffer.record(db, "u1", "A1", 4)
+        buffer.discard("u1", "A1")
+        await buffer.stop()
+
+    _run(scenario)
+    assert sessions.batches == []
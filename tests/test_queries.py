@@ -0,0 +1,18 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.db import queries
+
+from conftest import FakeCollection
+
+
+def test_flashcards_by_ids_keeps_requested_order_and_projects():
+    ids = [ObjectId() for _ in range(3)]
+    cards = FakeCollection({"_id": oid, "id": str(oid), "word": f"w{i}"} for i, oid in enumerate(ids))
+    requested = [str(ids[2]), str(ObjectId()), str(ids[0])]
+
+    flashcards = asyncio.run(queries.flashcards_by_ids({"word_cards": cards}, requested, "de-DE"))
+
+    assert [card["targetWord"] for card in flashcards] == ["w2", "w0"]
+    assert cards.finds[0].projection == queries.flashcard("de-DE")
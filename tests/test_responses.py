@@ -0,0 +1,48 @@
+import json
+from datetime import datetime, timezone
+from typing import List
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse, dumps
+from app.models.podcast import PodcastListItem
+
+
+def test_dumps_matches_pydantic_for_shaped_payloads():
+    item = {
+        "id": "p1",
+        "title": "Im Café",
+        "cefr_level": "A2",
+        "context": "Das Café",
+        "duration": None,
+        "audio_url": "/podcasts/p1/audio",
+        "created_at": datetime(2025, 1, 1, 12, 0, 0, 123000),
+    }
+
+    assert json.loads(dumps(item)) == PodcastListItem(**item).model_dump(mode="json")
+    aware = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert json.loads(dumps(aware)) == TypeAdapter(datetime).dump_python(aware, mode="json")
+
+
+def test_dumps_handles_object_ids():
+    oid = ObjectId()
+
+    assert dumps({"_id": oid}) == f'{{"_id":"{oid}"}}'.encode()
+
+
+def test_fast_response_keeps_the_openapi_schema():
+    app = FastAPI()
+
+    @app.get("/items", response_model=List[PodcastListItem])
+    async def items():
+        return FastJSONResponse([{"id": "p1"}])
+
+    client = TestClient(app)
+    schema = client.get("/openapi.json").json()["paths"]["/items"]["get"]["responses"]["200"]
+
+    # Not validated against the model: the handler vouches for the shape.
+    assert client.get("/items").json() == [{"id": "p1"}]
+    assert schema["content"]["application/json"]["schema"]["items"]["$ref"].endswith("PodcastListItem")
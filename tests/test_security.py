@@ -9,7 +9,10 @@ os.environ["MONGO_ADDRESS"] = "localhost"
 os.environ["MONGO_CLUSTER"] = "test"
 os.environ["FIREBASE_API"] = "test"
 
+from app.core.security import UserRole
+from app.dependencies import get_current_user
 from app.main import app
+from app.models.user import UserInDB
 
 client = TestClient(app)
 
@@ -38,3 +41,20 @@ def test_cors_disallowed_origin():
     response = client.options("/", headers=headers)
     # When origin is not allowed, no Access-Control-Allow-Origin header is sent
     assert "access-control-allow-origin" not in response.headers
+
+def test_metrics_are_for_admins_only():
+    assert client.get("/metrics").status_code == 422
+    assert client.get("/metrics", headers={"Authorization": "Basic x"}).status_code == 401
+
+    app.dependency_overrides[get_current_user] = lambda: UserInDB(
+        id="u1", email="u1@example.com", role="student_free", permissions=[]
+    )
+    try:
+        assert client.get("/metrics").status_code == 403
+        app.dependency_overrides[get_current_user] = lambda: UserInDB(
+            id="a1", email="a1@example.com", role=UserRole.ADMIN, permissions=[]
+        )
+        response = client.get("/metrics")
+        assert response.status_code == 200 and isinstance(response.json(), dict)
+    finally:
+        app.dependency_overrides.clear()
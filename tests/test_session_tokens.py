@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from starlette.datastructures import State
+
+from app import dependencies
+from app.models.user import UserInDB
+from app.services import session_tokens
+from app.services.session_tokens import InvalidSessionError, SessionSigner
+
+CURRENT = "current-secret-0123456789abcdefghij"
+OLD = "old-secret-0123456789abcdefghijklmn"
+FOREIGN = "someone-else-0123456789abcdefghijk"
+
+USER = UserInDB(id="uid-1", email="a@example.com", role="teacher", permissions=["create_deck"])
+
+
+class FakeRevocations:
+    def __init__(self):
+        self.docs = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.append({**query, **update["$set"]})
+
+
+@pytest.fixture
+def signer(monkeypatch):
+    signer = SessionSigner(CURRENT, [OLD], ttl=900)
+    monkeypatch.setattr(session_tokens, "session_signer", signer)
+    monkeypatch.setattr(session_tokens, "revocations", session_tokens.RevocationList())
+    return signer
+
+
+def test_claims_round_trip(signer):
+    token, _ = signer.issue(USER)
+    claims = session_tokens.verify_session_token(token)
+    user = session_tokens.user_from_claims(claims)
+    assert (user.id, user.role, user.permissions) == ("uid-1", "teacher", ["create_deck"])
+    assert session_tokens.is_session_token(token)
+
+
+def test_rotated_key_still_verifies_and_unknown_key_does_not(signer):
+    old_token, _ = SessionSigner(OLD, [], ttl=900).issue(USER)
+    assert session_tokens.verify_session_token(old_token)["sub"] == "uid-1"
+
+    foreign_token, _ = SessionSigner(FOREIGN, [], ttl=900).issue(USER)
+    with pytest.raises(InvalidSessionError):
+        session_tokens.verify_session_token(foreign_token)
+
+
+def test_expired_token_is_rejected(signer):
+    token, _ = SessionSigner(CURRENT, [], ttl=-120).issue(USER)
+    with pytest.raises(InvalidSessionError):
+        session_tokens.verify_session_token(token)
+
+
+def test_revoked_token_is_rejected(signer):
+    token, _ = signer.issue(USER)
+    claims = session_tokens.verify_session_token(token)
+    collection = FakeRevocations()
+    asyncio.run(session_tokens.revocations.revoke({"revoked_sessions": collection}, claims))
+
+    assert collection.docs[0]["_id"] == claims["jti"]
+    with pytest.raises(InvalidSessionError):
+        session_tokens.verify_session_token(token)
+
+
+def test_session_token_authorizes_without_firebase_or_mongo(signer, monkeypatch):
+    async def no_firebase(token):
+        raise AssertionError("Firebase should not be called")
+
+    monkeypatch.setattr(dependencies, "verify_id_token", no_firebase)
+    token, _ = signer.issue(USER)
+    request = SimpleNamespace(state=State())
+
+    user = asyncio.run(dependencies.get_current_user(request, f"Bearer {token}", db={}))
+    assert user.id == "uid-1"
+    assert user.role == "teacher"
+
+
+def test_role_change_revokes_outstanding_session_tokens(signer, monkeypatch):
+    from app.routers import users
+
+    class FakeUsers:
+        async def find_one_and_update(self, query, update, return_document=None):
+            return {"_id": query["_id"], "email": "a@example.com", **update["$set"]}
+
+    monkeypatch.setattr(users, "revocations", session_tokens.revocations)
+    token, _ = signer.issue(USER)
+    revoked = FakeRevocations()
+    db = {"user": FakeUsers(), "revoked_sessions": revoked}
+    response = asyncio.run(users.update_user_role("uid-1", users.UserRoleUpdate(role="student_free"), db))
+
+    assert (response.role, response.permissions) == ("student_free", ["access_basic_words", "public_decks"])
+    assert revoked.docs[0]["uid"] == "uid-1"
+    with pytest.raises(InvalidSessionError):
+        session_tokens.verify_session_token(token)
+
+
+def test_token_issued_in_the_same_second_as_a_role_change_is_revoked(signer, monkeypatch):
+    now = int(session_tokens.time.time()) + 0.5
+    monkeypatch.setattr(session_tokens.time, "time", lambda: now)
+    token, _ = signer.issue(USER)
+
+    asyncio.run(session_tokens.revocations.revoke_user({"revoked_sessions": FakeRevocations()}, "uid-1"))
+
+    with pytest.raises(InvalidSessionError):
+        session_tokens.verify_session_token(token)
+    # Tokens for other users are untouched.
+    other, _ = signer.issue(USER.model_copy(update={"id": "uid-2"}))
+    assert session_tokens.verify_session_token(other)["sub"] == "uid-2"
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services import srs
+
+from conftest import FakeCollection, apply_pipeline
+
+NOW = datetime(2025, 3, 1, 9, 0)
+WORD = ObjectId()
+
+
+def test_schedule_follows_sm2():
+    state = srs.schedule(None, 4, NOW)
+    assert (state["interval"], state["reps"], state["ease"]) == (1, 1, pytest.approx(2.5))
+    state = srs.schedule(state, 5, NOW)
+    assert (state["interval"], state["reps"], state["ease"]) == (6, 2, pytest.approx(2.6))
+    state = srs.schedule(state, 3, NOW)
+    assert (state["interval"], state["reps"]) == (16, 3)
+    assert state["ease"] == pytest.approx(2.46)
+    assert state["due_at"] == NOW + timedelta(days=16)
+
+    lapsed = srs.schedule(state, 1, NOW)
+    assert (lapsed["interval"], lapsed["reps"], lapsed["lapses"]) == (1, 0, 1)
+    assert lapsed["ease"] == pytest.approx(1.92)
+
+
+def test_ease_never_drops_below_minimum():
+    state = None
+    for _ in range(10):
+        state = srs.schedule(state, 0, NOW)
+    assert state["ease"] == srs.MIN_EASE
+
+
+def test_pipeline_matches_schedule():
+    doc = {"user_id": "u1", "word_id": WORD}
+    state = None
+    for grade in [5, 4, 4, 2, 3, 5, 0, 4]:
+        doc = apply_pipeline(srs.review_pipeline("u1", WORD, "A1", grade, NOW), doc)
+        state = srs.schedule(state, grade, NOW)
+        for field, value in state.items():
+            assert doc[field] == (pytest.approx(value) if isinstance(value, float) else value), field
+    assert doc["level"] == "A1"
+
+
+def test_record_review_is_one_upserting_write():
+    reviews = FakeCollection()
+    state = asyncio.run(srs.record_review({"flashcard_reviews": reviews}, "u1", WORD, "A1", 4, NOW))
+
+    assert state["due_at"] == NOW + timedelta(days=1)
+    # Upserted on first review, and only the review fields come back.
+    (doc,) = reviews.docs
+    assert (doc["user_id"], doc["word_id"], doc["level"]) == ("u1", WORD, "A1")
+    assert set(state) == {field for field, keep in srs.REVIEW_FIELDS.items() if keep}
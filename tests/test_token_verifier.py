@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.services.token_verifier import (
+    FirebaseTokenVerifier,
+    InvalidTokenError,
+    SigningKeyCache,
+    UnknownKeyError,
+    parse_max_age,
+)
+
+PROJECT_ID = "sprache-test"
+KID = "test-key-1"
+
+_private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+_public_pem = _private_key.public_key().public_bytes(
+    serialization.Encoding.PEM,
+    serialization.PublicFormat.SubjectPublicKeyInfo,
+).decode()
+
+
+def make_verifier(fetch_counter=None):
+    async def fetcher():
+        if fetch_counter is not None:
+            fetch_counter.append(1)
+        return {KID: _public_pem}, 3600
+
+    return FirebaseTokenVerifier(PROJECT_ID, SigningKeyCache(fetcher))
+
+
+def make_token(kid=KID, **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "user-123",
+        "iat": now,
+        "exp": now + 3600,
+        "auth_time": now - 10,
+        "email": "learner@example.com",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, _private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def test_valid_token_verifies_locally():
+    claims = asyncio.run(make_verifier().verify(make_token()))
+    assert claims["sub"] == "user-123"
+    assert claims["email"] == "learner@example.com"
+
+
+def test_keys_are_fetched_once():
+    fetches = []
+    verifier = make_verifier(fetches)
+
+    async def verify_many():
+        await asyncio.gather(*(verifier.verify(make_token()) for _ in range(5)))
+
+    asyncio.run(verify_many())
+    assert len(fetches) == 1
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "another-project"},
+    {"iss": "https://securetoken.google.com/another-project"},
+    {"exp": int(time.time()) - 3600},
+    {"auth_time": int(time.time()) + 3600},
+    {"sub": ""},
+])
+def test_bad_claims_are_rejected(overrides):
+    with pytest.raises(InvalidTokenError):
+        asyncio.run(make_verifier().verify(make_token(**overrides)))
+
+
+def test_unknown_kid_is_reported_for_fallback():
+    with pytest.raises(UnknownKeyError):
+        asyncio.run(make_verifier().verify(make_token(kid="rotated-key")))
+
+
+def test_wrong_signature_is_rejected():
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    token = jwt.encode(
+        {"sub": "user-123", "aud": PROJECT_ID},
+        other_key,
+        algorithm="RS256",
+        headers={"kid": KID},
+    )
+    with pytest.raises(InvalidTokenError):
+        asyncio.run(make_verifier().verify(token))
+
+
+def test_parse_max_age():
+    assert parse_max_age("public, max-age=22296, must-revalidate, no-transform") == 22296
+    assert parse_max_age(None) == 3600
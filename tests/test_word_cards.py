@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.db.word_cards import build_word_card, rebuild_word_cards
+
+from conftest import FakeCollection
+
+
+def test_build_word_card():
+    oid = ObjectId("65a000000000000000000001")
+    card = build_word_card({
+        "_id": oid,
+        "word": "Haus",
+        "cerf_level": "A1",
+        "ipa_transcription": "/haʊ̯s/",
+        "audio": {"male": "https://storage.example/hackathon/audio/haus_m.mp3"},
+        "translations": [{"language_code": "fr", "content": "maison"}, {"language_code": "en", "content": "house"}],
+    })
+
+    assert card == {
+        "_id": oid,
+        "id": "65a000000000000000000001",
+        "level": "A1",
+        "word": "Haus",
+        "translation": "house",
+        "phonetic": "haʊ̯s",
+        "audioMale": "/audio/haus_m.mp3",
+        "audioFemale": "",
+    }
+    assert build_word_card({"_id": 1, "translations": [{"language_code": "fr", "content": "x"}]})["translation"] == "x"
+    assert build_word_card({"_id": 1})["translation"] == ""
+
+
+def test_rebuild_replaces_cards_and_drops_stale_ones():
+    words = [{"_id": ObjectId(), "word": f"w{i}", "cerf_level": "A1"} for i in range(5)]
+    gone = ObjectId()
+    cards = FakeCollection([{"_id": gone, "built_at": datetime.now(timezone.utc) - timedelta(days=1)}])
+    versions = FakeCollection()
+    db = {"words": FakeCollection(words), "word_cards": cards, "catalog_versions": versions}
+
+    written = asyncio.run(rebuild_word_cards(db, batch_size=2))
+
+    assert written == 5
+    assert gone not in [doc["_id"] for doc in cards.docs]
+    assert sorted(doc["word"] for doc in cards.docs) == [f"w{i}" for i in range(5)]
+    # Servers polling for changes drop their card-derived catalogs.
+    assert [(doc["_id"], doc["version"]) for doc in versions.docs] == [("word_cards", 1)]
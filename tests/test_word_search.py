@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.db.mongodb import get_database
+from app.main import app
+from app.services.word_search import WordSearchIndex, fold
+
+from conftest import FakeCollection
+
+T0 = datetime(2025, 1, 1)
+
+
+def _card(id, word, translation, level="A1"):
+    return {"id": id, "word": word, "translation": translation, "level": level}
+
+
+def _cards(cards):
+    return FakeCollection(dict(card, _id=card["id"], built_at=T0) for card in cards)
+
+
+def _write(cards, card, built_at):
+    cards.put(dict(card, _id=card["id"], built_at=built_at))
+
+
+def _filters(cards):
+    return [find.filter for find in cards.finds]
+
+
+CARDS = [
+    _card("1", "das Haus", "house"),
+    _card("2", "häufig", "frequent"),
+    _card("3", "gehen", "to go"),
+    _card("4", "Straße", "street"),
+    _card("5", "Hund", "dog"),
+]
+
+
+def _words(results):
+    return [result["word"] for result in results]
+
+
+def test_fold_ignores_case_and_umlauts():
+    assert fold("Häufig") == "haufig"
+    assert fold("STRASSE") == fold("Straße") == "strasse"
+    assert fold("  Éclair ") == "eclair"
+
+
+def test_prefix_matches_headwords_then_translations():
+    cards = _cards(CARDS)
+    index = WordSearchIndex()
+
+    results = asyncio.run(index.search({"word_cards": cards}, "hau"))
+    assert _words(results) == ["häufig", "das Haus"]
+    assert asyncio.run(index.search({"word_cards": cards}, "HÄU")) == results
+    assert _words(asyncio.run(index.search({"word_cards": cards}, "go"))) == ["gehen"]
+    assert _words(asyncio.run(index.search({"word_cards": cards}, "strass"))) == ["Straße"]
+    assert _words(asyncio.run(index.search({"word_cards": cards}, "h", limit=2))) == ["häufig", "das Haus"]
+    assert asyncio.run(index.search({"word_cards": cards}, "xyz")) == []
+    # Loaded once, then served from memory.
+    assert _filters(cards) == [{}]
+
+
+def test_changes_are_merged_without_a_full_reload():
+    cards = _cards(CARDS)
+    index = WordSearchIndex()
+    db = {"word_cards": cards}
+    asyncio.run(index.search(db, "hau"))
+
+    _write(cards, _card("1", "das Gebäude", "building"), T0 + timedelta(minutes=1))
+    _write(cards, _card("6", "Haustier", "pet"), T0 + timedelta(minutes=1))
+    index.invalidate()
+
+    assert _words(asyncio.run(index.search(db, "hau"))) == ["häufig", "Haustier"]
+    assert _words(asyncio.run(index.search(db, "geb"))) == ["das Gebäude"]
+    assert _filters(cards) == [{}, {"built_at": {"$gt": T0}}]
+    assert index.built_at == T0 + timedelta(minutes=1)
+
+
+def test_deletions_trigger_a_full_reload():
+    cards = _cards(CARDS)
+    index = WordSearchIndex()
+    db = {"word_cards": cards}
+    asyncio.run(index.search(db, "hund"))
+
+    cards.docs = [card for card in cards.docs if card["id"] != "5"]
+    index.invalidate()
+
+    assert asyncio.run(index.search(db, "hund")) == []
+    assert _filters(cards)[-1] == {}
+
+
+def test_max_age_picks_up_changes_without_an_invalidation():
+    cards = _cards(CARDS)
+    db = {"word_cards": cards}
+    fresh, expiring = WordSearchIndex(), WordSearchIndex(max_age=0)
+    for index in (fresh, expiring):
+        asyncio.run(index.search(db, "hund"))
+
+    _write(cards, _card("7", "Hündin", "female dog"), T0 + timedelta(minutes=1))
+
+    assert _words(asyncio.run(fresh.search(db, "hund"))) == ["Hund"]
+    assert _words(asyncio.run(expiring.search(db, "hund"))) == ["Hund", "Hündin"]
+
+
+def test_search_route(monkeypatch):
+    from app.routers import words
+
+    index = WordSearchIndex()
+    monkeypatch.setattr(words, "word_search", index)
+    app.dependency_overrides[get_database] = lambda: {"word_cards": _cards(CARDS)}
+    try:
+        client = TestClient(app)
+        response = client.get("/words/search", params={"q": "stra"})
+        assert response.status_code == 200
+        assert response.json() == [{"id": "4", "word": "Straße", "translation": "street", "level": "A1"}]
+        assert client.get("/words/search", params={"q": ""}).status_code == 422
+    finally:
+        app.dependency_overrides.clear()
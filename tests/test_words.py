@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.db.card_versions import word_card_versions
+from app.db.mongodb import get_database
+from app.main import app
+from app.routers import words
+
+from conftest import fake_word_cards
+
+
+def _client(cards):
+    app.dependency_overrides[get_database] = lambda: {"word_cards": cards}
+    return TestClient(app)
+
+
+def teardown_function():
+    app.dependency_overrides.clear()
+    word_card_versions.invalidate()
+
+
+def test_whole_level_is_streamed_as_a_json_array(monkeypatch):
+    monkeypatch.setattr(words, "STREAM_CHUNK_SIZE", 3)
+    cards = fake_word_cards(10)
+
+    response = _client(cards).get("/words/A1")
+
+    assert response.status_code == 200
+    assert [card["original"] for card in response.json()] == [f"w{i}" for i in range(10)]
+    assert "X-Next-Cursor" not in response.headers
+    assert cards.cursors[0].closed
+
+
+def test_ndjson_stream_yields_one_card_per_line():
+    response = _client(fake_word_cards(4)).get("/words/A1", headers={"Accept": "application/x-ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["original"] for line in response.text.splitlines()] == ["w0", "w1", "w2", "w3"]
+
+
+def test_pages_follow_the_next_cursor():
+    cards = fake_word_cards(5)
+    client = _client(cards)
+
+    first = client.get("/words/A1", params={"limit": 3})
+    second = client.get("/words/A1", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [card["original"] for card in first.json()] == ["w0", "w1", "w2"]
+    assert [card["id"] for card in second.json()] == [doc["id"] for doc in cards.docs[3:]]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_invalid_cursor_is_rejected():
+    response = _client(fake_word_cards(1)).get("/words/A1", params={"cursor": "nope", "limit": 2})
+
+    assert response.status_code == 400
+
+
+def test_unchanged_level_is_revalidated_without_reading_cards():
+    cards = fake_word_cards(3)
+    client = _client(cards)
+
+    first = client.get("/words/A1", params={"limit": 2})
+    again = client.get("/words/A1", params={"limit": 2}, headers={"If-None-Match": first.headers["ETag"]})
+    other_page = client.get("/words/A1", params={"limit": 3}, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.headers["Cache-Control"] == "public, no-cache"
+    assert again.status_code == 304 and again.content == b""
+    assert other_page.status_code == 200
+    assert len(cards.cursors) == 2
+
+    cards.docs[0]["built_at"] = datetime(2025, 2, 1)
+    word_card_versions.invalidate()
+    changed = client.get("/words/A1", params={"limit": 2}, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200